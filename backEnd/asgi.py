@@ -0,0 +1,13 @@
+"""
+ASGI入口：异步视图直接在事件循环中执行，适合大量并发的轮询和长连接请求
+启动方式：uvicorn asgi:application --host 0.0.0.0 --port 3000（在backEnd目录下）
+或直接运行 python asgi.py
+"""
+from run import app
+from src.component.asgi import AsgiApp
+
+application = AsgiApp(app)
+
+if __name__ == '__main__':
+  import uvicorn
+  uvicorn.run(application, port=3000, host='0.0.0.0')
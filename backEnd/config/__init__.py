@@ -2,6 +2,8 @@
 配置模块初始化文件
 """
 
-from .db_config import get_db_config, DB_CONFIG
+from .db_config import get_db_config, DB_CONFIG, DB_POOL_CONFIG, BILL_WRITER_CONFIG, METADATA_CACHE_CONFIG
+from .station_config import get_station_config, STATION_CONFIG
+from .auth_config import AUTH_CONFIG
 
-__all__ = ['get_db_config', 'DB_CONFIG'] 
\ No newline at end of file
+__all__ = ['get_db_config', 'DB_CONFIG', 'DB_POOL_CONFIG', 'BILL_WRITER_CONFIG', 'METADATA_CACHE_CONFIG', 'get_station_config', 'STATION_CONFIG', 'AUTH_CONFIG'] 
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+登录令牌配置
+签名密钥通过环境变量 AUTH_SECRET 设置；未设置时每次启动随机生成，重启后需要重新登录
+"""
+import os
+import secrets
+
+AUTH_CONFIG = {
+    # 令牌签名密钥
+    'secret': (os.environ.get('AUTH_SECRET') or secrets.token_hex(32)).encode('utf-8'),
+    # 令牌有效期（秒）
+    'ttl': 24 * 3600
+}
@@ -2,6 +2,7 @@
 数据库配置文件
 包含所有与数据库连接相关的参数
 """
+import os
 
 # 数据库连接配置
 DB_CONFIG = {
@@ -13,6 +14,40 @@ DB_CONFIG = {
     'database': 'pile'
 }
 
+# 数据库连接池配置
+DB_POOL_CONFIG = {
+    # 最大连接数
+    'max_size': 10,
+    # 借连接的等待超时（秒）
+    'acquire_timeout': 10,
+    # 连接最长存活时间（秒），应小于MySQL的wait_timeout
+    'recycle_seconds': 3600,
+    # 空闲超过该时间的连接借出前先ping检查（秒）
+    'health_check_interval': 30
+}
+
+# 充电详单异步批量写入配置
+BILL_WRITER_CONFIG = {
+    # 本地缓冲文件，数据库不可用期间的详单保存在这里，启动时重放
+    'spool_path': os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bill_spool.jsonl'),
+    # 内存队列最大长度，超出的详单只保存在缓冲文件中
+    'max_queue': 10000,
+    # 每批写入的最大条数
+    'batch_size': 100,
+    # 详单最长等待时间（秒）
+    'flush_interval': 1.0,
+    # 写入失败后的重试间隔（秒）
+    'retry_interval': 5.0
+}
+
+# 车辆和用户元数据缓存配置
+METADATA_CACHE_CONFIG = {
+    # 缓存有效期（秒）
+    'ttl': 60,
+    # 最大缓存条数
+    'max_entries': 10000
+}
+
 def get_db_config():
     """
     获取数据库配置
@@ -0,0 +1,93 @@
+"""
+充电站配置文件
+包含充电桩数量、功率、充电桩队列长度、等候区大小和叫号阈值
+可通过环境变量 STATION_CONFIG_FILE 指定JSON配置文件覆盖默认配置
+"""
+import json
+import os
+
+# 充电桩类型的默认功率（度/小时）
+DEFAULT_POWER = {
+    'F': 30,
+    'T': 7
+}
+
+# 充电站默认配置（2个快充桩、3个慢充桩）
+STATION_CONFIG = {
+    # 等候区车位数
+    'waiting_area_size': 10,
+    # 每个充电桩的默认队列长度（含正在充电的车辆）
+    'queue_length': 2,
+    # 每个充电桩在内存中保留的最近充电详单数，更早的详单从数据库分页查询
+    'recent_bills': 20,
+    # 叫号阈值：充电桩空位数达到阈值时才从等候区叫号，为None时取该类型充电桩的数量
+    'dispatch_thresholds': {
+        'F': None,
+        'T': None
+    },
+    # 充电桩列表，power、queue_length和recent_bills可省略
+    'piles': [
+        {'pile_id': 'A', 'charging_category': 'F'},
+        {'pile_id': 'B', 'charging_category': 'F'},
+        {'pile_id': 'C', 'charging_category': 'T'},
+        {'pile_id': 'D', 'charging_category': 'T'},
+        {'pile_id': 'E', 'charging_category': 'T'}
+    ]
+}
+
+# 状态日志配置：等候区、排队号、充电桩队列和充电会话的预写日志和快照，重启后据此恢复
+JOURNAL_CONFIG = {
+    'enabled': True,
+    # 快照和日志文件所在目录
+    'directory': os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'journal'),
+    # 两次快照之间最多的日志条数，决定启动时最多重放的条数
+    'snapshot_interval': 1000,
+    # 每条日志是否等待写入磁盘（关闭时进程崩溃不丢失，操作系统崩溃可能丢失最后几条）
+    'fsync': False
+}
+
+
+def _expand_piles(config):
+    """
+    展开充电桩配置
+    除了逐个列出的piles，还支持按类型批量生成，例如
+    "pile_groups": [{"charging_category": "T", "count": 150, "prefix": "T", "power": 7}]
+    """
+    piles = [dict(pile) for pile in config.get('piles', [])]
+    for group in config.get('pile_groups', []):
+        prefix = group.get('prefix', group['charging_category'])
+        for index in range(1, group['count'] + 1):
+            pile = {key: value for key, value in group.items() if key not in ('count', 'prefix')}
+            pile['pile_id'] = f"{prefix}{index}"
+            piles.append(pile)
+
+    for pile in piles:
+        pile.setdefault('power', DEFAULT_POWER.get(pile['charging_category'], 0))
+        pile.setdefault('queue_length', config['queue_length'])
+        pile.setdefault('recent_bills', config['recent_bills'])
+    return piles
+
+
+def get_station_config(path=None):
+    """
+    获取充电站配置
+    :param path: JSON配置文件路径，为None时读取环境变量 STATION_CONFIG_FILE，均未设置时使用默认配置
+    :return: 配置字典，piles已展开并补全功率和队列长度
+    """
+    config = dict(STATION_CONFIG)
+    config['dispatch_thresholds'] = dict(STATION_CONFIG['dispatch_thresholds'])
+
+    path = path or os.environ.get('STATION_CONFIG_FILE')
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            file_config = json.load(f)
+        config.update({key: value for key, value in file_config.items() if key != 'dispatch_thresholds'})
+        config['dispatch_thresholds'].update(file_config.get('dispatch_thresholds', {}))
+        if 'pile_groups' in file_config and 'piles' not in file_config:
+            config['piles'] = []
+
+    config['piles'] = _expand_piles(config)
+    pile_ids = [pile['pile_id'] for pile in config['piles']]
+    if len(pile_ids) != len(set(pile_ids)):
+        raise ValueError("充电桩ID不能重复")
+    return config
@@ -0,0 +1,71 @@
+"""
+把charging_bills表按月导出为列式归档，供离线分析使用
+用法：python export_bill_archive.py 2025-06 [2025-07 ...] [--output 目录]
+"""
+import pymysql
+import sys
+import os
+from datetime import datetime
+
+# 添加当前目录到系统路径，确保可以导入config模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入数据库配置
+from config.db_config import DB_CONFIG
+from src.dataStructure.BillArchive import write_month
+from src.dataStructure.BillQuery import BILL_COLUMNS
+
+# 默认归档目录
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+
+def export_month(conn, month, output):
+    """导出一个月（按开始充电时间）的详单"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+    # 不缓存结果集的游标，逐批读取
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        sql = f"""
+            SELECT {', '.join(BILL_COLUMNS)} FROM charging_bills
+            WHERE start_time >= %s AND start_time < %s
+        """
+        cursor.execute(sql, (start, end))
+        bills = []
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            bills.extend(dict(zip(BILL_COLUMNS, row)) for row in rows)
+    finally:
+        cursor.close()
+
+    path = write_month(output, month, bills)
+    print(f"{month}: 导出{len(bills)}条详单到{path}")
+
+def main(argv):
+    output = DEFAULT_ARCHIVE_DIR
+    if '--output' in argv:
+        index = argv.index('--output')
+        output = argv[index + 1]
+        argv = argv[:index] + argv[index + 2:]
+    if not argv:
+        print(__doc__)
+        sys.exit(1)
+
+    conn = pymysql.connect(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        charset=DB_CONFIG['charset'],
+        database=DB_CONFIG['database']
+    )
+    try:
+        for month in argv:
+            export_month(conn, month, output)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
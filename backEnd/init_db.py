@@ -7,6 +7,38 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 导入数据库配置
 from config.db_config import DB_CONFIG
+from src.dataStructure.ReportRollup import CREATE_ROLLUP_TABLE_SQL, ROLLUP_TABLE, rebuild_statements
+
+# 后续版本新增的索引：(表名, 索引名, 列)
+UPGRADE_INDEXES = [
+    # 详单按 (create_time, bill_id) 游标分页，并可按用户名或充电桩筛选
+    ('charging_bills', 'idx_create_time_bill', '`create_time`, `bill_id`'),
+    ('charging_bills', 'idx_username_create_time', '`username`, `create_time`, `bill_id`'),
+    ('charging_bills', 'idx_pile_create_time', '`pile_id`, `create_time`, `bill_id`'),
+]
+
+def upgrade_database(cursor):
+    """为已存在的数据库补充新增的索引和报表汇总表（已存在的跳过）"""
+    for table, index_name, columns in UPGRADE_INDEXES:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (table, index_name))
+        if cursor.fetchone()[0]:
+            continue
+        cursor.execute(f"ALTER TABLE `{table}` ADD KEY `{index_name}` ({columns})")
+        print(f"已为表{table}添加索引{index_name}")
+
+    cursor.execute("SHOW TABLES LIKE %s", (ROLLUP_TABLE,))
+    if cursor.fetchone() is None:
+        cursor.execute(CREATE_ROLLUP_TABLE_SQL)
+        rebuild_report_rollups(cursor)
+
+def rebuild_report_rollups(cursor):
+    """从charging_bills全量重建报表汇总表（回填历史详单，或修复不一致的汇总）"""
+    for sql, params in rebuild_statements():
+        cursor.execute(sql, params)
+    print(f"报表汇总表{ROLLUP_TABLE}已重建")
 
 def check_and_create_database():
     """检查数据库pile是否存在，不存在则创建"""
@@ -34,6 +66,9 @@ def check_and_create_database():
         
         if result:
             print("数据库'pile'已存在")
+            cursor.execute("USE pile")
+            upgrade_database(cursor)
+            conn.commit()
             return
         
         print("数据库'pile'不存在，开始创建...")
@@ -258,6 +293,7 @@ COMMIT;
             if statement.strip():
                 cursor.execute(statement)
         
+        upgrade_database(cursor)
         conn.commit()
         print("数据库表结构创建成功")
         
@@ -268,5 +304,30 @@ COMMIT;
         cursor.close()
         conn.close()
 
+def rebuild_report_rollups_command():
+    """命令行重建报表汇总表：python init_db.py --rebuild-rollups"""
+    conn = pymysql.connect(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        charset=DB_CONFIG['charset'],
+        database=DB_CONFIG['database']
+    )
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREATE_ROLLUP_TABLE_SQL)
+        rebuild_report_rollups(cursor)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"重建报表汇总表失败: {str(e)}")
+    finally:
+        cursor.close()
+        conn.close()
+
 if __name__ == "__main__":
-    check_and_create_database() 
\ No newline at end of file
+    if '--rebuild-rollups' in sys.argv:
+        rebuild_report_rollups_command()
+    else:
+        check_and_create_database() 
\ No newline at end of file
@@ -1,43 +1,99 @@
 __all__ = ['blueprint']
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, json, Response, stream_with_context, g, url_for
 import pymysql
 from ...dataStructure.User import *
 from ...dataStructure.WaitingQueue import Queue
 from ...dataStructure.ChargerPile import ChargingPile, ChargingStatus
 from ...dataStructure.Scheduler import Scheduler
+from ...dataStructure.Clock import Clock
+from ...dataStructure.BillWriter import BillWriter
+from ...dataStructure.StateFeed import StationFeed
+from ...dataStructure.Records import Record
+from ...dataStructure.ResponseCache import ResponseCache
+from ...dataStructure.StateJournal import StateJournal
+from ...dataStructure.ReportRollup import (GRANULARITY_FORMATS, ROLLUP_TABLE, ROLLUP_UPSERT_SQL, format_period,
+                                           rollup_rows)
+from ...dataStructure.BillQuery import (BILL_FILTERS, build_bill_query, encode_cursor, parse_fields,
+                                        parse_limit, row_to_bill)
 from flask_cors import CORS
+from ..database import get_db_connection, get_db_pool_stats
+from ..cache import get_cars, get_cache_stats
+from ..auth import get_current_user, TokenError
+from ..aio import run_db, run_command
 import time
+import atexit
 import sys
 import os
 from decimal import Decimal
+from datetime import datetime
 
 # 添加项目根目录到系统路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
-from config.db_config import DB_CONFIG
+from config.db_config import DB_CONFIG, BILL_WRITER_CONFIG
+from config.station_config import get_station_config, JOURNAL_CONFIG
 
 blueprint = Blueprint('server', __name__)
 
-def get_db_connection():
-    """获取数据库连接"""
-    return pymysql.connect(
-        host=DB_CONFIG['host'],
-        port=DB_CONFIG['port'],
-        user=DB_CONFIG['user'],
-        password=DB_CONFIG['password'],
-        charset=DB_CONFIG['charset'],
-        database=DB_CONFIG['database']
-    )
 
-def save_charging_bill(bill: dict):
-    """保存充电详单到数据库"""
-    conn = None
-    cursor = None
+class StationJSONEncoder(json.JSONEncoder):
+    """调度器命令结果中的车辆和排队记录按其字典视图编码"""
+
+    def default(self, o):
+        if isinstance(o, Record):
+            return o.to_json()
+        return super().default(o)
+
+
+blueprint.json_encoder = StationJSONEncoder
+
+@blueprint.before_request
+def check_token():
+    """
+    携带令牌的请求在本地校验令牌，管理员接口必须携带管理员角色的令牌
+    未携带令牌时只有仍接收username参数的用户接口保持原有行为
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        claims = get_current_user()
+    except TokenError as e:
+        return jsonify({
+            "status": False,
+            "msg": str(e),
+            "data": None
+        }), 401
+    g.user_claims = claims
+    is_admin_api = request.url_rule is not None and '/admin/' in request.url_rule.rule
+    if is_admin_api and claims is None:
+        return jsonify({
+            "status": False,
+            "msg": "请先登录",
+            "data": None
+        }), 401
+    if is_admin_api and claims['role'] != 'admin':
+        return jsonify({
+            "status": False,
+            "msg": "需要管理员权限",
+            "data": None
+        }), 403
+
+def write_charging_bills(bills: list):
+    """
+    批量写入充电详单并累加到报表汇总表，失败时抛出异常由写入器重试
+    重放缓冲文件时已写入的详单会被跳过，不会重复计入汇总
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # 跳过已写入的详单（同一批内重复的也只保留一条）
+        bills = list({bill['bill_id']: bill for bill in bills}.values())
+        sql = f"SELECT bill_id FROM charging_bills WHERE bill_id IN ({', '.join(['%s'] * len(bills))})"
+        cursor.execute(sql, [bill['bill_id'] for bill in bills])
+        existing = {row[0] for row in cursor.fetchall()}
+        bills = [bill for bill in bills if bill['bill_id'] not in existing]
+        if not bills:
+            return
+
         sql = """
-            INSERT INTO charging_bills (
+            INSERT IGNORE INTO charging_bills (
                 bill_id, create_time, pile_id, vehicle_id, username,
                 charging_amount, charging_duration, start_time, end_time,
                 charging_cost, service_cost, total_cost
@@ -45,7 +101,7 @@ def save_charging_bill(bill: dict):
                 %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             )
         """
-        cursor.execute(sql, (
+        cursor.executemany(sql, [(
             bill['bill_id'],
             bill['create_time'],
             bill['pile_id'],
@@ -58,28 +114,47 @@ def save_charging_bill(bill: dict):
             bill['charging_cost'],
             bill['service_cost'],
             bill['total_cost']
-        ))
+        ) for bill in bills])
+        cursor.executemany(ROLLUP_UPSERT_SQL, rollup_rows(bills))
         conn.commit()
-    except Exception as e:
-        print(f"保存充电详单失败: {str(e)}")
-        if conn:
-            conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        cursor.close()
+        conn.close()
+
+# 充电详单由后台线程批量写入，调度线程和请求处理不等待数据库
+bill_writer = BillWriter(write_charging_bills, **BILL_WRITER_CONFIG)
+bill_writer.start()
+atexit.register(bill_writer.stop)
+
+def save_charging_bill(bill: dict):
+    """提交充电详单到写入队列"""
+    bill_writer.submit(bill)
+
+# 创建本充电站的时钟，注入到队列、充电桩和调度器
+clock = Clock()
+
+# 读取充电站配置（充电桩数量、功率、队列长度、等候区大小）
+station_config = get_station_config()
 
 # 创建全局队列实例
-waiting_queue = Queue()
+waiting_queue = Queue(clock=clock)
+waiting_queue.max_capacity = station_config['waiting_area_size']
+waiting_queue.dispatch_thresholds.update(station_config['dispatch_thresholds'])
 
 # 创建充电桩实例
 charging_piles = {
-    'A': ChargingPile('A', 'F'),  # 快充桩A
-    'B': ChargingPile('B', 'F'),  # 快充桩B
-    'C': ChargingPile('C', 'T'),  # 慢充桩C
-    'D': ChargingPile('D', 'T'),  # 慢充桩D
-    'E': ChargingPile('E', 'T'),  # 慢充桩E
+    pile['pile_id']: ChargingPile(
+        pile['pile_id'],
+        pile['charging_category'],
+        clock=clock,
+        power=pile['power'],
+        queue_length=pile['queue_length'],
+        recent_bills=pile['recent_bills']
+    )
+    for pile in station_config['piles']
 }
 
 # 注册充电桩信息到队列
@@ -87,23 +162,115 @@ for pile in charging_piles.values():
     waiting_queue.register_charging_pile(pile.get_queue_info())
 
 # 创建并启动调度器，传入保存账单的函数
-scheduler = Scheduler(waiting_queue, charging_piles, save_charging_bill)
+scheduler = Scheduler(waiting_queue, charging_piles, save_charging_bill, clock=clock)
+# 从状态日志恢复重启前的等候区、排队号和充电会话
+if JOURNAL_CONFIG['enabled']:
+    recovery = scheduler.attach_journal(StateJournal(
+        JOURNAL_CONFIG['directory'],
+        snapshot_interval=JOURNAL_CONFIG['snapshot_interval'],
+        fsync=JOURNAL_CONFIG['fsync']
+    ))
+    print(f"已从状态日志恢复：加载快照{recovery['snapshot_loaded']}，重放{recovery['replayed']}条，"
+          f"耗时{recovery['elapsed_ms']}毫秒")
+# 状态推送在调度器启动前订阅快照
+station_feed = StationFeed(scheduler)
 scheduler.start()
+# 停止时写入状态快照（在详单写入器停止之前执行）
+atexit.register(scheduler.stop)
+
+# 状态接口按版本缓存编码后的响应体
+response_cache = ResponseCache()
 
 @blueprint.route('/', methods=['POST', 'GET'])
 async def index():
     return "welcome to use server system"
 
+def _parse_since():
+    """
+    解析增量查询参数 ?since=<版本号>
+    :return: 版本号，未提供时返回None
+    """
+    since = request.args.get('since')
+    if since in (None, ''):
+        return None
+    try:
+        return int(since)
+    except ValueError:
+        raise ValueError("since必须是整数版本号")
+
+def _status_etag(snapshot, live=False):
+    """
+    状态接口的ETag：快照版本号，状态未变化时客户端收到304
+    :param live: 响应是否包含随时间变化的实时充电量和费用，有车辆正在充电时ETag再加上当前秒数
+    """
+    etag = f"v{snapshot.version}"
+    if live and snapshot.any_charging():
+        etag += f"-t{int(scheduler.get_current_time())}"
+    return etag
+
+def _parse_covered_since(snapshot):
+    """
+    解析?since=<版本号>，版本号过旧无法计算增量时按未提供处理（返回全量）
+    :return: 版本号或None
+    """
+    since = _parse_since()
+    if since is not None and not snapshot.covers(since):
+        return None
+    return since
+
+def _cached_json(key, etag, build):
+    """
+    返回按版本缓存的JSON响应，同一版本的请求共享编码后的响应体
+    :param key: 缓存键（接口和影响响应内容的参数）
+    :param etag: 当前ETag
+    :param build: 构建响应数据的函数
+    """
+    return Response(response_cache.get(key, etag, build), mimetype='application/json')
+
+def _conditional_response(etag, build):
+    """
+    条件请求：If-None-Match与当前ETag相同时返回304，不构建响应内容
+    :param etag: 当前ETag
+    :param build: 构建完整响应的函数
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # 每次都向服务器确认
+    return response
+
 @blueprint.route('/queue/status', methods=['GET'])
 async def get_queue_status():
-    """获取队列状态"""
+    """
+    获取队列状态
+    响应中的version为状态版本号；携带?since=<版本号>时只返回之后加入或修改的车辆（data.removed为离开的排队号），
+    版本号过旧无法计算增量时返回全量（full为true）
+    """
     try:
-        status = waiting_queue.get_queue_status()
-        return jsonify({
-            "status": True,
-            "msg": "获取成功",
-            "data": status
-        })
+        # 读取调度器发布的快照，不直接访问调度线程正在修改的队列
+        snapshot = scheduler.get_snapshot()
+        since = _parse_covered_since(snapshot)
+        etag = _status_etag(snapshot)
+
+        def build():
+            full = since is None
+            if full:
+                status = dict(snapshot.queue_status)
+            else:
+                status = snapshot.changed_queue_entries(since)
+                status['removed'] = snapshot.removed_queue_numbers(since)
+                status['total_vehicles'] = snapshot.queue_status['total_vehicles']
+            return {
+                "status": True,
+                "msg": "获取成功",
+                "data": status,
+                "version": snapshot.version,
+                "full": full
+            }
+
+        return _conditional_response(etag, lambda: _cached_json(('queue', since), etag, build))
     except Exception as e:
         print("Error getting queue status:", e)
         return jsonify({
@@ -112,6 +279,30 @@ async def get_queue_status():
             "data": None
         })
 
+@blueprint.route('/events', methods=['GET'])
+async def get_station_events():
+    """
+    充电站状态推送（Server-Sent Events），代替轮询/pile/status、/queue/status等接口
+    连接后先收到snapshot事件（全量状态），之后调度器每次状态变化收到一条delta事件：
+    queue_join/queue_leave/queue_update（等候区）、dispatch（调度到充电桩）、pile（充电桩状态）、session（充电会话）
+    浏览器重连时通过Last-Event-ID从断开处继续；推送内容与公开的状态接口相同，不需要令牌
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    # ASGI方式下订阅者只占用一个Future，WSGI方式下占用一个线程
+    if 'asgi.scope' in request.environ:
+        body = station_feed.astream(last_event_id)
+    else:
+        body = station_feed.stream(last_event_id)
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 禁止反向代理缓冲
+    })
+
 @blueprint.route('/queue/join', methods=['POST'])
 async def join_queue():
     """加入等候队列"""
@@ -119,34 +310,23 @@ async def join_queue():
     data = request.get_json()
     
     try:
-        # 检查队列是否已满
-        if waiting_queue.is_full():
-            return jsonify({
-                "status": False,
-                "msg": "等候区已满",
-                "data": None
-            })
-
         # 准备车辆信息
         vehicle_info = {
             'username': data['username'],
             'car_id': data['carId'],
             'charging_amount': data['chargingAmount']
         }
+        # 电池容量随车辆信息推送给管理员视图（元数据缓存，查询失败不影响排队）
+        try:
+            car = (await run_db(get_cars, [data['carId']])).get(str(data['carId']))
+            if car and car.battery_capacity is not None:
+                vehicle_info['battery_capacity'] = float(car.battery_capacity)
+        except Exception as e:
+            print(f"Error getting battery capacity: {str(e)}")
 
-        # 添加到队列
-        queue_number = waiting_queue.add_vehicle(
-            data['chargeType'],
-            vehicle_info
-        )
-
-        return jsonify({
-            "status": True,
-            "msg": "加入队列成功",
-            "data": {
-                "queue_number": queue_number
-            }
-        })
+        # 由调度线程检查容量并加入队列
+        result = await run_command(scheduler, 'join_queue', charge_type=data['chargeType'], vehicle_info=vehicle_info)
+        return jsonify(result)
 
     except Exception as e:
         print("Error joining queue:", str(e))
@@ -164,19 +344,8 @@ async def leave_queue():
     queue_number = data.get('queue_number')
 
     try:
-        vehicle = waiting_queue.remove_vehicle(queue_number)
-        if vehicle:
-            return jsonify({
-                "status": True,
-                "msg": "离开队列成功",
-                "data": vehicle
-            })
-        else:
-            return jsonify({
-                "status": False,
-                "msg": "未找到该排队号码",
-                "data": None
-            })
+        result = await run_command(scheduler, 'leave_queue', queue_number=queue_number)
+        return jsonify(result)
     except Exception as e:
         print("Error leaving queue:", e)
         return jsonify({
@@ -187,46 +356,16 @@ async def leave_queue():
 
 @blueprint.route('/pile/status', methods=['GET'])
 async def get_pile_status():
-    """获取所有充电桩状态"""
+    """
+    获取所有充电桩状态
+    携带?since=<版本号>时只返回之后状态变化的充电桩和正在充电的充电桩（实时充电量变化）
+    """
     try:
-        status = {}
-        for pile_id, pile in charging_piles.items():
-            pile_status = pile.get_status()
-            
-            # 使用安全方法获取当前充电量
-            current_charging_amount = pile.get_current_charging_amount()
-            pile_status['current_charging_amount'] = round(current_charging_amount, 2)
-            
-            # 添加当前充电费用信息（如果正在充电）
-            if pile.status == ChargingStatus.CHARGING and pile.connected_vehicle is not None and pile.start_time is not None:
-                # 计算当前费用
-                from_time = pile.start_time 
-                to_time = scheduler.get_current_time()
-                
-                # 计算当前费用
-                _, current_charging_cost = pile._calculate_charging_cost(from_time, to_time)
-                
-                # 计算服务费（0.8元/度）
-                current_service_cost = round(current_charging_amount * 0.8, 2)
-                
-                # 计算总费用（充电费 + 服务费）
-                current_total_cost = round(current_charging_cost + current_service_cost, 2)
-                
-                pile_status['current_charging_cost'] = round(current_charging_cost, 2)
-                pile_status['current_service_cost'] = current_service_cost
-                pile_status['current_total_cost'] = current_total_cost
-            else:
-                pile_status['current_charging_cost'] = 0
-                pile_status['current_service_cost'] = 0
-                pile_status['current_total_cost'] = 0
-            
-            status[pile_id] = pile_status
-            
-        return jsonify({
-            "status": True,
-            "msg": "获取成功",
-            "data": status
-        })
+        snapshot = scheduler.get_snapshot()
+        since = _parse_covered_since(snapshot)
+        etag = _status_etag(snapshot, live=True)
+        return _conditional_response(etag, lambda: _cached_json(
+            ('pile', since), etag, lambda: _build_pile_status(snapshot, since)))
     except Exception as e:
         print("Error getting pile status:", e)
         return jsonify({
@@ -235,6 +374,60 @@ async def get_pile_status():
             "data": None
         })
 
+def _changed_pile_ids(snapshot, since):
+    """
+    需要返回的充电桩
+    :return: (充电桩ID列表, 是否为全量)
+    """
+    if since is None or not snapshot.covers(since):
+        return list(snapshot.piles), True
+    changed = set(snapshot.changed_piles(since))
+    return [pile_id for pile_id in snapshot.piles if pile_id in changed or snapshot.is_charging(pile_id)], False
+
+def _build_pile_status(snapshot, since):
+    """构建/pile/status的响应数据"""
+    status = {}
+    current_time = scheduler.get_current_time()
+    pile_ids, full = _changed_pile_ids(snapshot, since)
+    for pile_id in pile_ids:
+        snapshot_status = snapshot.piles[pile_id]
+        pile_status = dict(snapshot_status)
+        # 充电详单只返回数量，历史详单通过分页接口查询
+        pile_status['bills_url'] = url_for('.get_charging_bills', pile_id=pile_id)
+
+        # 按快照中的开始时间计算当前充电量
+        current_charging_amount = snapshot.current_charging_amount(pile_id, current_time)
+        pile_status['current_charging_amount'] = round(current_charging_amount, 2)
+
+        # 添加当前充电费用信息（如果正在充电）
+        if snapshot.is_charging(pile_id):
+            # 从会话累计器读取当前费用
+            current_charging_cost = snapshot.current_charging_cost(pile_id, current_time)
+
+            # 计算服务费（0.8元/度）
+            current_service_cost = round(current_charging_amount * 0.8, 2)
+
+            # 计算总费用（充电费 + 服务费）
+            current_total_cost = round(current_charging_cost + current_service_cost, 2)
+
+            pile_status['current_charging_cost'] = round(current_charging_cost, 2)
+            pile_status['current_service_cost'] = current_service_cost
+            pile_status['current_total_cost'] = current_total_cost
+        else:
+            pile_status['current_charging_cost'] = 0
+            pile_status['current_service_cost'] = 0
+            pile_status['current_total_cost'] = 0
+
+        status[pile_id] = pile_status
+
+    return {
+        "status": True,
+        "msg": "获取成功",
+        "data": status,
+        "version": snapshot.version,
+        "full": full
+    }
+
 @blueprint.route('/pile/disconnect', methods=['POST'])
 async def disconnect_vehicle():
     """断开车辆连接并生成充电详单"""
@@ -242,30 +435,10 @@ async def disconnect_vehicle():
     pile_id = data.get('pile_id')
     
     try:
-        if pile_id not in charging_piles:
-            return jsonify({
-                "status": False,
-                "msg": "充电桩不存在",
-                "data": None
-            })
-        
-        result = charging_piles[pile_id].disconnect_vehicle()
-        if isinstance(result, dict) and 'error' in result:
-            return jsonify({
-                "status": False,
-                "msg": result['error'],
-                "data": None
-            })
-        
-        # 保存充电详单到数据库
-        if result.get('bill'):
-            save_charging_bill(result['bill'])
-        
-        return jsonify({
-            "status": True,
-            "msg": result['message'],
-            "data": result.get('bill')
-        })
+        # 充电详单由调度线程提交保存
+        result = await run_command(scheduler, 'disconnect', pile_id=pile_id)
+        result.pop('bill', None)
+        return jsonify(result)
         
     except Exception as e:
         print("Error disconnecting vehicle:", str(e))
@@ -294,72 +467,12 @@ async def modify_charging():
         
         # 如果提供了queue_number，表示修改等候队列中的车辆
         if queue_number:
-            # 在等候队列中查找并修改
-            vehicle = waiting_queue.find_vehicle_by_queue_number(queue_number)
-            if not vehicle:
-                return jsonify({
-                    "status": False,
-                    "msg": "未找到该排队号码对应的车辆",
-                    "data": None
-                })
-            
-            # 修改充电请求量
-            old_amount = vehicle['vehicle_info'].get('charging_amount', 0)
-            vehicle['vehicle_info']['charging_amount'] = charging_amount
-            
-            return jsonify({
-                "status": True,
-                "msg": f"等候队列中的充电请求已从{old_amount}度修改为{charging_amount}度",
-                "data": {
-                    "queue_number": queue_number,
-                    "charging_amount": charging_amount
-                }
-            })
+            result = await run_command(scheduler, 'modify_waiting_request', queue_number=queue_number, charging_amount=charging_amount)
+            return jsonify(result)
         
         # 否则是修改正在充电的车辆
-        if pile_id not in charging_piles:
-            return jsonify({
-                "status": False,
-                "msg": "充电桩不存在",
-                "data": None
-            })
-        
-        pile = charging_piles[pile_id]
-        
-        # 检查充电桩是否有连接的车辆
-        if pile.status != ChargingStatus.CHARGING or not pile.connected_vehicle:
-            return jsonify({
-                "status": False,
-                "msg": "该充电桩当前没有连接车辆",
-                "data": None
-            })
-        
-        # 获取当前充电量
-        current_charging_amount = pile.get_current_charging_amount()
-        
-        # 如果新的充电量小于已充电量，则拒绝修改
-        if charging_amount < current_charging_amount:
-            return jsonify({
-                "status": False,
-                "msg": f"新的充电量({charging_amount}度)不能小于已充电量({current_charging_amount:.2f}度)",
-                "data": None
-            })
-        
-        # 获取旧的充电量
-        old_amount = pile.connected_vehicle.get('charging_amount', 0)
-        
-        # 更新充电请求
-        pile.connected_vehicle['charging_amount'] = charging_amount
-        
-        return jsonify({
-            "status": True,
-            "msg": f"充电请求已从{old_amount}度修改为{charging_amount}度",
-            "data": {
-                "pile_id": pile_id,
-                "charging_amount": charging_amount,
-                "current_charging_amount": round(current_charging_amount, 2)
-            }
-        })
+        result = await run_command(scheduler, 'modify_charging_request', pile_id=pile_id, charging_amount=charging_amount)
+        return jsonify(result)
         
     except Exception as e:
         print("Error modifying charging request:", str(e))
@@ -392,22 +505,8 @@ async def change_charge_mode():
             })
         
         # 修改充电模式
-        vehicle = waiting_queue.change_charge_mode(queue_number, new_mode)
-        if not vehicle:
-            return jsonify({
-                "status": False,
-                "msg": "未找到该排队号码对应的车辆",
-                "data": None
-            })
-        
-        return jsonify({
-            "status": True,
-            "msg": f"充电模式已修改为{'快充' if new_mode == 'F' else '慢充'}，新的排队号为{vehicle['queue_number']}",
-            "data": {
-                "queue_number": vehicle['queue_number'],
-                "charge_mode": new_mode
-            }
-        })
+        result = await run_command(scheduler, 'change_mode', queue_number=queue_number, new_mode=new_mode)
+        return jsonify(result)
         
     except Exception as e:
         print("Error changing charge mode:", str(e))
@@ -427,8 +526,8 @@ async def cancel_charging():
     try:
         # 等候区取消
         if queue_number:
-            vehicle = waiting_queue.remove_vehicle(queue_number)
-            if not vehicle:
+            result = await run_command(scheduler, 'leave_queue', queue_number=queue_number)
+            if not result['status']:
                 return jsonify({
                     "status": False,
                     "msg": "未找到该排队号码对应的车辆",
@@ -443,40 +542,18 @@ async def cancel_charging():
                 }
             })
         
-        # 充电区取消
+        # 充电区取消：断开车辆并生成详单
         if pile_id:
-            if pile_id not in charging_piles:
-                return jsonify({
-                    "status": False,
-                    "msg": "充电桩不存在",
-                    "data": None
-                })
-                
-            pile = charging_piles[pile_id]
-            if pile.status != ChargingStatus.CHARGING or not pile.connected_vehicle:
-                return jsonify({
-                    "status": False,
-                    "msg": "该充电桩当前没有连接车辆",
-                    "data": None
-                })
-                
-            # 断开车辆并生成详单
-            result = pile.disconnect_vehicle()
-            if isinstance(result, dict) and 'error' in result:
-                return jsonify({
-                    "status": False,
-                    "msg": result['error'],
-                    "data": None
-                })
-            
-            # 保存充电详单到数据库
-            if result.get('bill'):
-                save_charging_bill(result['bill'])
+            result = await run_command(scheduler, 'disconnect', pile_id=pile_id, require_charging=True)
+            if not result['status']:
+                return jsonify(result)
             
+            # 充电详单由调度线程提交保存
+            bill = result.pop('bill', None)
             return jsonify({
                 "status": True,
                 "msg": "已成功取消充电并生成详单",
-                "data": result.get('bill')
+                "data": bill
             })
         
         return jsonify({
@@ -495,49 +572,50 @@ async def cancel_charging():
 
 @blueprint.route('/bills', methods=['GET'])
 async def get_charging_bills():
-    """获取充电详单列表"""
-    username = request.args.get('username')  # 可选参数，按用户名筛选
-    
-    conn = None
-    cursor = None
-    
+    """
+    获取充电详单列表（按生成时间倒序，游标分页）
+    查询参数：
+    - username / pile_id：可选，按用户名或充电桩筛选
+    - limit：每页条数，默认50，最多500
+    - cursor：上一页返回的next_cursor，从该位置之后继续
+    - fields：逗号分隔的列名，只返回这些列
+    - stream：为1时不分页，流式返回从cursor开始的所有详单
+    """
+    filters = {column: request.args.get(column) or None for column in BILL_FILTERS}
+    claims = g.user_claims
+    if claims is not None and claims['role'] != 'admin':
+        # 普通用户只能查看自己的详单
+        filters['username'] = claims['sub']
+    cursor_token = request.args.get('cursor') or None
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()  # 使用普通游标
-        
-        if username:
-            # 按用户名筛选
-            sql = """
-                SELECT * FROM charging_bills 
-                WHERE username = %s
-                ORDER BY create_time DESC
-            """
-            cursor.execute(sql, (username,))
-        else:
-            # 获取所有详单
-            sql = """
-                SELECT * FROM charging_bills 
-                ORDER BY create_time DESC
-            """
-            cursor.execute(sql)
-            
-        columns = [col[0] for col in cursor.description]
-        bills = []
-        
-        for row in cursor.fetchall():
-            bill = {}
-            for i, value in enumerate(row):
-                # 处理Decimal类型
-                if isinstance(value, Decimal):
-                    bill[columns[i]] = float(value)
-                else:
-                    bill[columns[i]] = value
-            bills.append(bill)
-        
+        fields = parse_fields(request.args.get('fields'))
+        limit = parse_limit(request.args.get('limit'))
+        stream = request.args.get('stream') in ('1', 'true')
+        # 分页时多取一条判断是否还有下一页
+        sql, params, columns = build_bill_query(filters, fields, cursor_token, None if stream else limit + 1)
+    except ValueError as e:
+        return jsonify({
+            "status": False,
+            "msg": str(e),
+            "data": None
+        })
+
+    try:
+        if stream:
+            conn, cursor = await run_db(_open_bill_stream, sql, params)
+            response = Response(stream_with_context(_stream_bills(cursor, columns, fields)),
+                                mimetype='application/json')
+            # 响应结束（包括客户端中途断开）时再归还连接
+            response.call_on_close(lambda: (cursor.close(), conn.close()))
+            return response
+
+        bills, next_cursor = await run_db(_fetch_bills, sql, params, columns, fields, limit)
         return jsonify({
             "status": True,
             "msg": "获取充电详单成功",
-            "data": bills
+            "data": bills,
+            "next_cursor": next_cursor
         })
         
     except Exception as e:
@@ -547,11 +625,61 @@ async def get_charging_bills():
             "msg": f"获取充电详单失败: {str(e)}",
             "data": None
         })
+
+def _fetch_bills(sql, params, columns, fields, limit):
+    """
+    查询一页详单
+    :return: (详单列表, 下一页游标)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()  # 使用普通游标
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        cursor.close()
+        conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor(last['create_time'], last['bill_id'])
+    return [row_to_bill(columns, row, fields) for row in rows], next_cursor
+
+def _open_bill_stream(sql, params):
+    """
+    执行流式查询，使用不缓存结果集的游标，由调用方在输出结束后关闭
+    :return: (连接, 游标)
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(sql, params)
+    except Exception:
+        conn.close()
+        raise
+    return conn, cursor
+
+def _stream_bills(cursor, columns, fields, batch_size=500):
+    """
+    流式输出详单列表，从不缓存结果集的游标分批读取，内存占用与详单总数无关
+    输出格式与分页接口相同：{"status": true, "msg": ..., "data": [...]}
+    """
+    try:
+        yield '{"status": true, "msg": "获取充电详单成功", "data": ['
+        first = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            chunk = ','.join(json.dumps(row_to_bill(columns, row, fields)) for row in rows)
+            yield chunk if first else ',' + chunk
+            first = False
+    except Exception as e:
+        # 响应头已经发出，只能记录错误并结束输出
+        print("Error streaming charging bills:", str(e))
+    yield ']}'
 
 # 管理员API接口
 @blueprint.route('/admin/pile/toggle', methods=['POST'])
@@ -562,65 +690,10 @@ async def toggle_charging_pile():
     action = data.get('action')  # 'start' 或 'stop'
     
     try:
-        if pile_id not in charging_piles:
-            return jsonify({
-                "status": False,
-                "msg": "充电桩不存在",
-                "data": None
-            })
-            
-        pile = charging_piles[pile_id]
-        
-        if action == 'start':
-            # 启动充电桩
-            if pile.status == ChargingStatus.OFFLINE:
-                pile.status = ChargingStatus.IDLE
-                return jsonify({
-                    "status": True,
-                    "msg": f"充电桩{pile_id}已启动",
-                    "data": pile.get_status()
-                })
-            else:
-                return jsonify({
-                    "status": False,
-                    "msg": f"充电桩{pile_id}已处于启动状态",
-                    "data": pile.get_status()
-                })
-        elif action == 'stop':
-            # 关闭充电桩
-            if pile.status != ChargingStatus.OFFLINE:
-                # 如果有车辆正在充电，先断开连接并生成详单
-                if pile.status == ChargingStatus.CHARGING and pile.connected_vehicle:
-                    result = pile.disconnect_vehicle()
-                    # 检查结果是否包含错误信息
-                    if isinstance(result, dict) and 'error' in result:
-                        return jsonify({
-                            "status": False,
-                            "msg": result['error'],
-                            "data": None
-                        })
-                    # 保存充电详单
-                    if isinstance(result, dict) and 'bill' in result:
-                        save_charging_bill(result['bill'])
-                
-                pile.status = ChargingStatus.OFFLINE
-                return jsonify({
-                    "status": True,
-                    "msg": f"充电桩{pile_id}已关闭",
-                    "data": pile.get_status()
-                })
-            else:
-                return jsonify({
-                    "status": False,
-                    "msg": f"充电桩{pile_id}已处于关闭状态",
-                    "data": pile.get_status()
-                })
-        else:
-            return jsonify({
-                "status": False,
-                "msg": "无效的操作，必须是'start'或'stop'",
-                "data": None
-            })
+        # 关闭时断开了正在充电的车辆，充电详单由调度线程提交保存
+        result = await run_command(scheduler, 'toggle_pile', pile_id=pile_id, action=action)
+        result.pop('bill', None)
+        return jsonify(result)
             
     except Exception as e:
         print("Error toggling charging pile:", str(e))
@@ -632,66 +705,16 @@ async def toggle_charging_pile():
 
 @blueprint.route('/admin/pile/status', methods=['GET'])
 async def get_admin_pile_status():
-    """获取所有充电桩详细状态（管理员视图）"""
+    """
+    获取所有充电桩详细状态（管理员视图）
+    携带?since=<版本号>时只返回之后状态变化的充电桩和正在充电的充电桩
+    """
     try:
-        status = {}
-        for pile_id, pile in charging_piles.items():
-            # 获取基本状态
-            pile_status = pile.get_status()
-            
-            # 添加管理员需要的详细信息
-            pile_status.update({
-                'charging_count': pile.charging_count,
-                'total_charging_duration': round(pile.total_charging_duration / 60, 2),  # 转换为小时
-                'total_energy_delivered': round(pile.total_energy_delivered, 2),
-                'total_earnings': round(pile.total_earnings, 2),
-                'is_working': pile.status != ChargingStatus.OFFLINE and pile.status != ChargingStatus.FAULT
-            })
-            
-            # 添加当前充电车辆信息
-            if pile.status == ChargingStatus.CHARGING and pile.connected_vehicle is not None:
-                # 获取当前充电量
-                current_charging_amount = pile.get_current_charging_amount()
-                
-                # 计算当前费用
-                # 获取当前和开始时间
-                from_time = pile.start_time if pile.start_time is not None else scheduler.get_current_time()
-                to_time = scheduler.get_current_time()
-                
-                # 计算当前费用
-                _, current_charging_cost = pile._calculate_charging_cost(from_time, to_time)
-                
-                # 计算服务费（0.8元/度）
-                current_service_cost = round(current_charging_amount * 0.8, 2)
-                
-                # 计算总费用（充电费 + 服务费）
-                current_total_cost = round(current_charging_cost + current_service_cost, 2)
-                
-                car_id = pile.connected_vehicle.get('car_id', '未知车辆')
-                
-                pile_status.update({
-                    'charging_vehicle_id': car_id,
-                    'current_charging_amount': round(current_charging_amount, 2),
-                    'current_charging_cost': round(current_charging_cost, 2),
-                    'current_service_cost': current_service_cost,
-                    'current_total_cost': current_total_cost
-                })
-            else:
-                pile_status.update({
-                    'charging_vehicle_id': None,
-                    'current_charging_amount': 0,
-                    'current_charging_cost': 0,
-                    'current_service_cost': 0,
-                    'current_total_cost': 0
-                })
-            
-            status[pile_id] = pile_status
-            
-        return jsonify({
-            "status": True,
-            "msg": "获取充电桩状态成功",
-            "data": status
-        })
+        snapshot = scheduler.get_snapshot()
+        since = _parse_covered_since(snapshot)
+        etag = _status_etag(snapshot, live=True)
+        return _conditional_response(etag, lambda: _cached_json(
+            ('admin_pile', since), etag, lambda: _build_admin_pile_status(snapshot, since)))
     except Exception as e:
         print("Error getting admin pile status:", str(e))
         return jsonify({
@@ -700,12 +723,73 @@ async def get_admin_pile_status():
             "data": None
         })
 
+def _build_admin_pile_status(snapshot, since):
+    """构建/admin/pile/status的响应数据"""
+    status = {}
+    current_time = scheduler.get_current_time()
+    pile_ids, full = _changed_pile_ids(snapshot, since)
+    for pile_id in pile_ids:
+        snapshot_status = snapshot.piles[pile_id]
+        # 获取快照中的基本状态
+        pile_status = dict(snapshot_status)
+
+        # 添加管理员需要的详细信息
+        pile_status.update({
+            'total_charging_duration': round(snapshot_status['total_charging_duration'] / 60, 2),  # 转换为小时
+            'total_energy_delivered': round(snapshot_status['total_energy_delivered'], 2),
+            'is_working': snapshot_status['status'] not in (ChargingStatus.OFFLINE.value, ChargingStatus.FAULT.value),
+            'bills_url': url_for('.get_charging_bills', pile_id=pile_id)
+        })
+
+        # 添加当前充电车辆信息
+        if snapshot.is_charging(pile_id):
+            # 获取当前充电量
+            current_charging_amount = snapshot.current_charging_amount(pile_id, current_time)
+
+            # 从会话累计器读取当前费用
+            current_charging_cost = snapshot.current_charging_cost(pile_id, current_time)
+
+            # 计算服务费（0.8元/度）
+            current_service_cost = round(current_charging_amount * 0.8, 2)
+
+            # 计算总费用（充电费 + 服务费）
+            current_total_cost = round(current_charging_cost + current_service_cost, 2)
+
+            car_id = snapshot_status['connected_vehicle'].get('car_id', '未知车辆')
+
+            pile_status.update({
+                'charging_vehicle_id': car_id,
+                'current_charging_amount': round(current_charging_amount, 2),
+                'current_charging_cost': round(current_charging_cost, 2),
+                'current_service_cost': current_service_cost,
+                'current_total_cost': current_total_cost
+            })
+        else:
+            pile_status.update({
+                'charging_vehicle_id': None,
+                'current_charging_amount': 0,
+                'current_charging_cost': 0,
+                'current_service_cost': 0,
+                'current_total_cost': 0
+            })
+
+        status[pile_id] = pile_status
+
+    return {
+        "status": True,
+        "msg": "获取充电桩状态成功",
+        "data": status,
+        "version": snapshot.version,
+        "full": full
+    }
+
 @blueprint.route('/admin/queue/waiting', methods=['GET'])
 async def get_waiting_vehicles():
     """获取等候服务的车辆信息"""
     try:
-        # 获取所有等候队列中的车辆
-        queue_status = waiting_queue.get_queue_status()
+        # 获取快照中所有等候队列中的车辆
+        queue_status = scheduler.get_snapshot().queue_status
+        current_time = scheduler.get_current_time()
         
         # 处理等候车辆信息
         waiting_vehicles = []
@@ -713,14 +797,14 @@ async def get_waiting_vehicles():
         # 处理快充队列
         for vehicle in queue_status['fast_queue']:
             # 计算排队时长（分钟）使用调度器时间
-            queue_time = (scheduler.get_current_time() - vehicle['join_time']) / 60
+            queue_time = (current_time - vehicle['join_time']) / 60
             
             waiting_vehicles.append({
                 'queue_number': vehicle['queue_number'],
                 'user_id': vehicle['vehicle_info']['username'],
                 'car_id': vehicle['vehicle_info']['car_id'],
                 'charge_mode': '快充',
-                'battery_capacity': 0,  # 需要从数据库获取
+                'battery_capacity': vehicle['vehicle_info'].get('battery_capacity', 0),
                 'charging_amount': vehicle['vehicle_info']['charging_amount'],
                 'queue_time': round(queue_time, 2)  # 排队时长（分钟）
             })
@@ -728,37 +812,28 @@ async def get_waiting_vehicles():
         # 处理慢充队列
         for vehicle in queue_status['slow_queue']:
             # 计算排队时长（分钟）使用调度器时间
-            queue_time = (scheduler.get_current_time() - vehicle['join_time']) / 60
+            queue_time = (current_time - vehicle['join_time']) / 60
             
             waiting_vehicles.append({
                 'queue_number': vehicle['queue_number'],
                 'user_id': vehicle['vehicle_info']['username'],
                 'car_id': vehicle['vehicle_info']['car_id'],
                 'charge_mode': '慢充',
-                'battery_capacity': 0,  # 需要从数据库获取
+                'battery_capacity': vehicle['vehicle_info'].get('battery_capacity', 0),
                 'charging_amount': vehicle['vehicle_info']['charging_amount'],
                 'queue_time': round(queue_time, 2)  # 排队时长（分钟）
             })
             
-        # 获取车辆电池容量信息
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        for vehicle in waiting_vehicles:
-            try:
-                sql = """
-                    SELECT battery_capacity FROM cars 
-                    WHERE id = %s
-                """
-                cursor.execute(sql, (vehicle['car_id'],))
-                result = cursor.fetchone()
-                if result:
-                    vehicle['battery_capacity'] = float(result[0])
-            except Exception as e:
-                print(f"Error getting battery capacity for car {vehicle['car_id']}: {str(e)}")
-                
-        cursor.close()
-        conn.close()
+        # 加入队列时没有取到电池容量的车辆再查询（缓存未命中的车辆一次查询批量加载）
+        missing = [vehicle for vehicle in waiting_vehicles if not vehicle['battery_capacity']]
+        try:
+            cars = await run_db(get_cars, [vehicle['car_id'] for vehicle in missing]) if missing else {}
+            for vehicle in missing:
+                car = cars.get(str(vehicle['car_id']))
+                if car and car.battery_capacity is not None:
+                    vehicle['battery_capacity'] = float(car.battery_capacity)
+        except Exception as e:
+            print(f"Error getting battery capacity: {str(e)}")
             
         return jsonify({
             "status": True,
@@ -773,85 +848,108 @@ async def get_waiting_vehicles():
             "data": None
         })
 
+@blueprint.route('/admin/db/pool', methods=['GET'])
+async def get_db_pool_status():
+    """获取数据库连接池状态（连接数、等待次数和饱和度）和元数据缓存命中情况"""
+    return jsonify({
+        "status": True,
+        "msg": "获取数据库状态成功",
+        "data": {
+            "pool": get_db_pool_stats(),
+            "cache": get_cache_stats()
+        }
+    })
+
+@blueprint.route('/admin/bills/writer', methods=['GET'])
+async def get_bill_writer_status():
+    """获取充电详单写入队列状态（积压、失败和溢出条数）"""
+    return jsonify({
+        "status": True,
+        "msg": "获取详单写入状态成功",
+        "data": bill_writer.get_stats()
+    })
+
+@blueprint.route('/admin/events/status', methods=['GET'])
+async def get_station_feed_status():
+    """获取状态推送的订阅者数量和缓冲区状态"""
+    return jsonify({
+        "status": True,
+        "msg": "获取状态推送信息成功",
+        "data": station_feed.get_stats()
+    })
+
+@blueprint.route('/admin/responses/cache', methods=['GET'])
+async def get_response_cache_status():
+    """获取状态接口响应缓存的命中情况和使用的JSON编码库"""
+    return jsonify({
+        "status": True,
+        "msg": "获取响应缓存状态成功",
+        "data": response_cache.get_stats()
+    })
+
+@blueprint.route('/admin/journal/status', methods=['GET'])
+async def get_journal_status():
+    """获取状态日志的序号、待合并的日志条数和快照次数"""
+    if scheduler.journal is None:
+        return jsonify({
+            "status": False,
+            "msg": "状态日志未启用",
+            "data": None
+        })
+    return jsonify({
+        "status": True,
+        "msg": "获取状态日志信息成功",
+        "data": scheduler.journal.get_stats()
+    })
+
 @blueprint.route('/admin/reports', methods=['GET'])
 async def get_charging_reports():
-    """获取充电报表数据"""
-    report_type = request.args.get('type', 'day')  # 报表类型：day, week, month
-    start_date = request.args.get('start_date')  # 开始日期
-    
-    conn = None
-    cursor = None
+    """
+    获取充电报表数据
+    从按小时、日、周、月和充电桩汇总的报表汇总表读取，查询代价与时间段数量成正比，与详单数量无关
+    """
+    report_type = request.args.get('type', 'day')  # 报表类型：hour, day, week, month
+    start_date = request.args.get('start_date')  # 开始日期，按所在的统计时间段对齐
     
+    if report_type not in GRANULARITY_FORMATS:
+        return jsonify({
+            "status": False,
+            "msg": "无效的报表类型，必须是'hour'、'day'、'week'或'month'",
+            "data": None
+        })
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 根据报表类型构建SQL查询
-        if report_type == 'day':
-            # 按日统计
-            date_format = "%Y-%m-%d"
-        elif report_type == 'week':
-            # 按周统计
-            date_format = "%Y-%u"  # 年-周数
-        elif report_type == 'month':
-            # 按月统计
-            date_format = "%Y-%m"
-        else:
-            return jsonify({
-                "status": False,
-                "msg": "无效的报表类型，必须是'day'、'week'或'month'",
-                "data": None
-            })
-            
-        # 构建SQL查询 - 使用子查询避免GROUP BY问题
-        sql = """
+        sql = f"""
             SELECT 
                 time_period,
                 pile_id,
-                COUNT(*) as charging_count,
-                SUM(charging_duration) as total_duration,
-                SUM(charging_amount) as total_amount,
-                SUM(charging_cost) as total_charging_cost,
-                SUM(service_cost) as total_service_cost,
-                SUM(total_cost) as total_cost
-            FROM (
-                SELECT 
-                    DATE_FORMAT(start_time, %s) as time_period,
-                    pile_id,
-                    charging_duration,
-                    charging_amount,
-                    charging_cost,
-                    service_cost,
-                    total_cost
-                FROM charging_bills
+                charging_count,
+                total_duration,
+                total_amount,
+                total_charging_cost,
+                total_service_cost,
+                total_cost
+            FROM {ROLLUP_TABLE}
+            WHERE granularity = %s
         """
-        
-        params = [date_format]
+        params = [report_type]
         
         # 添加日期筛选条件
         if start_date:
-            sql += " WHERE start_time >= %s"
-            params.append(start_date)
+            try:
+                start = datetime.strptime(start_date[:10], "%Y-%m-%d")
+            except ValueError:
+                return jsonify({
+                    "status": False,
+                    "msg": "开始日期格式错误，应为YYYY-MM-DD",
+                    "data": None
+                })
+            sql += " AND time_period >= %s"
+            params.append(format_period(start, report_type))
             
-        sql += """
-            ) AS temp
-            GROUP BY time_period, pile_id
-            ORDER BY time_period DESC, pile_id
-        """
-        
-        cursor.execute(sql, params)
-        columns = [col[0] for col in cursor.description]
-        reports = []
+        sql += " ORDER BY time_period DESC, pile_id"
         
-        for row in cursor.fetchall():
-            report = {}
-            for i, value in enumerate(row):
-                # 处理Decimal类型
-                if isinstance(value, Decimal):
-                    report[columns[i]] = float(value)
-                else:
-                    report[columns[i]] = value
-            reports.append(report)
+        reports = await run_db(_query_reports, sql, params)
             
         return jsonify({
             "status": True,
@@ -866,11 +964,29 @@ async def get_charging_reports():
             "msg": f"获取充电报表失败: {str(e)}",
             "data": None
         })
+
+def _query_reports(sql, params):
+    """查询报表汇总表，返回字典列表"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        reports = []
+        
+        for row in cursor.fetchall():
+            report = {}
+            for i, value in enumerate(row):
+                # 处理Decimal类型
+                if isinstance(value, Decimal):
+                    report[columns[i]] = float(value)
+                else:
+                    report[columns[i]] = value
+            reports.append(report)
+        return reports
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        cursor.close()
+        conn.close()
 
 @blueprint.route('/admin/pile/fault', methods=['POST'])
 async def set_pile_fault():
@@ -881,7 +997,7 @@ async def set_pile_fault():
     
     try:
         # 使用调度器处理充电桩故障
-        result = scheduler.handle_pile_fault(pile_id, schedule_strategy)
+        result = await run_command(scheduler, 'pile_fault', pile_id=pile_id, schedule_strategy=schedule_strategy)
         return jsonify(result)
         
     except Exception as e:
@@ -900,7 +1016,7 @@ async def repair_pile():
     
     try:
         # 使用调度器处理充电桩修复
-        result = scheduler.handle_pile_repair(pile_id)
+        result = await run_command(scheduler, 'pile_repair', pile_id=pile_id)
         return jsonify(result)
         
     except Exception as e:
@@ -926,13 +1042,8 @@ async def set_time_speedup():
                 "data": None
             })
             
-        scheduler.set_time_speedup(speedup)
-        
-        return jsonify({
-            "status": True,
-            "msg": f"时间加速倍数已设置为{speedup}",
-            "data": {"speedup": speedup}
-        })
+        result = await run_command(scheduler, 'set_time_speedup', speedup=speedup)
+        return jsonify(result)
     except ValueError:
         return jsonify({
             "status": False,
@@ -953,7 +1064,16 @@ async def set_simulation_time():
             "data": None
         })
     
-    result = scheduler.set_simulation_time_from_str(time_str)
+    try:
+        timestamp, _ = Scheduler.parse_time_str(time_str)
+    except ValueError as e:
+        return jsonify({
+            "status": False,
+            "msg": f"设置模拟时间失败: {str(e)}",
+            "data": None
+        })
+
+    result = await run_command(scheduler, 'set_simulation_time', timestamp=timestamp)
     return jsonify(result)
 
 @blueprint.route('/admin/get_time', methods=['GET'])
@@ -984,7 +1104,7 @@ async def get_simulation_time():
 async def reset_to_real_time():
     """恢复使用实时系统时间"""
     try:
-        result = scheduler.reset_to_real_time()
+        result = await run_command(scheduler, 'reset_to_real_time')
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -3,6 +3,10 @@ from flask import Blueprint, request, jsonify
 import pymysql
 from ...dataStructure.User import *
 from flask_cors import CORS
+from ..database import get_db_connection
+from ..cache import get_user_info, invalidate_user
+from ..auth import token_signer, get_current_user, resolve_username, TokenError
+from ..aio import run_db
 import sys
 import os
 
@@ -12,28 +16,12 @@ from config.db_config import DB_CONFIG
 
 blueprint = Blueprint('user', __name__)
 
-# 获取数据库连接的函数
-def get_db_connection():
-    """获取数据库连接"""
-    return pymysql.connect(
-        host=DB_CONFIG['host'],
-        port=DB_CONFIG['port'],
-        user=DB_CONFIG['user'],
-        password=DB_CONFIG['password'],
-        charset=DB_CONFIG['charset'],
-        database=DB_CONFIG['database']
-    )
-
 @blueprint.route('/', methods=['POST', 'GET'])
 async def index():
     return "welcome to use user system"
 
-@blueprint.route('/login', methods=["POST"])
-async def login():
-    print("receive req for login", request.get_json())
-    user = User.from_json(request.get_json())
-    print("user", user)
-
+def _login(user):
+    """校验用户名和密码，成功时签发令牌"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -53,11 +41,12 @@ async def login():
         else:
             print("login success")
             is_admin = data[3] if len(data) > 3 else 0
+            role = "admin" if is_admin == 1 else "user"
             res = LoginResponse({
                 "status": True,
                 "msg": "login success",
-                "token": "",
-                "role": "admin" if is_admin == 1 else "user"
+                "token": token_signer.issue(data[0], data[1], role),
+                "role": role
             })
     except Exception as e:
         print("Error during login:", e)
@@ -71,14 +60,35 @@ async def login():
         cursor.close()
         conn.close()
 
-    return jsonify(res)
+    return res
 
-@blueprint.route('/register', methods=["POST"])
-async def register():
-    print("receive req for register", request.get_json())
+@blueprint.route('/login', methods=["POST"])
+async def login():
+    print("receive req for login", request.get_json())
     user = User.from_json(request.get_json())
     print("user", user)
 
+    return jsonify(await run_db(_login, user))
+
+@blueprint.route('/logout', methods=["POST"])
+async def logout():
+    """退出登录，注销请求携带的令牌"""
+    try:
+        claims = get_current_user()
+    except TokenError:
+        # 令牌已无效，无需注销
+        claims = None
+    if claims is not None:
+        token_signer.revoke(claims)
+    return jsonify(LoginResponse({
+        "status": True,
+        "msg": "已退出登录",
+        "token": "",
+        "role": claims['role'] if claims else "user"
+    }))
+
+def _register(user):
+    """注册新用户"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -91,6 +101,8 @@ async def register():
             sql = "INSERT INTO users (username, password) VALUES (%s, %s)"
             cursor.execute(sql, (user.username, user.password))
             conn.commit()
+            # 注册前查询过的用户名被缓存为不存在，注册后立即失效
+            invalidate_user(user.username)
             print("register successfully")
             res = LoginResponse({
                 "status": True,
@@ -118,24 +130,18 @@ async def register():
         cursor.close()
         conn.close()
 
-    return jsonify(res)
+    return res
 
-@blueprint.route('/changePassword', methods=["POST"])
-async def change_password():
-    print("receive req for change password", request.get_json())
-    data = request.get_json()
-    username = data.get('username')  # 需要从token中获取
-    old_password = data.get('oldPassword')
-    new_password = data.get('newPassword')
+@blueprint.route('/register', methods=["POST"])
+async def register():
+    print("receive req for register", request.get_json())
+    user = User.from_json(request.get_json())
+    print("user", user)
 
-    if not all([username, old_password, new_password]):
-        return jsonify(LoginResponse({
-            "status": False,
-            "msg": "参数不完整",
-            "token": "",
-            "role": "user"
-        }))
+    return jsonify(await run_db(_register, user))
 
+def _change_password(username, claims, old_password, new_password):
+    """验证旧密码并修改密码"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -147,41 +153,80 @@ async def change_password():
 
         if data is None:
             print("旧密码验证失败")
-            return jsonify(LoginResponse({
+            return LoginResponse({
                 "status": False,
                 "msg": "旧密码错误",
                 "token": "",
                 "role": "user"
-            }))
+            })
 
         # 更新密码
         sql = "UPDATE users SET password = %s WHERE username = %s"
         cursor.execute(sql, (new_password, username))
         conn.commit()
         print("密码修改成功")
-        return jsonify(LoginResponse({
+        # 之前签发的令牌全部失效，为当前会话签发新令牌
+        token_signer.revoke_user(username)
+        token = token_signer.issue(claims['uid'], username, claims['role']) if claims else ""
+        return LoginResponse({
             "status": True,
             "msg": "密码修改成功",
-            "token": "",
-            "role": "user"
-        }))
+            "token": token,
+            "role": claims['role'] if claims else "user"
+        })
 
     except Exception as e:
         print("Error during password change:", e)
-        return jsonify(LoginResponse({
+        return LoginResponse({
             "status": False,
             "msg": "内部服务器错误",
             "token": "",
             "role": "user"
-        }))
+        })
     finally:
         cursor.close()
         conn.close()
 
+@blueprint.route('/changePassword', methods=["POST"])
+async def change_password():
+    print("receive req for change password", request.get_json())
+    data = request.get_json()
+    try:
+        # 携带令牌时以令牌中的用户名为准
+        username, claims = resolve_username(data.get('username'))
+    except TokenError as e:
+        return jsonify(LoginResponse({
+            "status": False,
+            "msg": str(e),
+            "token": "",
+            "role": "user"
+        }))
+    old_password = data.get('oldPassword')
+    new_password = data.get('newPassword')
+
+    if not all([username, old_password, new_password]):
+        return jsonify(LoginResponse({
+            "status": False,
+            "msg": "参数不完整",
+            "token": "",
+            "role": "user"
+        }))
+
+    return jsonify(await run_db(_change_password, username, claims, old_password, new_password))
+
 @blueprint.route('/cars', methods=["GET"])
 async def get_user_cars():
     print("receive req for get user cars")
-    username = request.args.get('username')  # 从查询参数获取用户名
+    try:
+        # 携带令牌时以令牌中的用户名为准，否则从查询参数获取用户名
+        username, claims = resolve_username(request.args.get('username'))
+    except TokenError as e:
+        return jsonify(LoginResponse({
+            "status": False,
+            "msg": str(e),
+            "token": "",
+            "role": "user"
+        }))
 
     if not username:
         return jsonify(LoginResponse({
@@ -191,16 +236,11 @@ async def get_user_cars():
             "role": "user"
         }))
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        # 获取用户ID和权限
-        sql = "SELECT id, isadmin FROM users WHERE username = %s"
-        cursor.execute(sql, (username,))
-        user_data = cursor.fetchone()
-        
-        if user_data is None:
+        # 车辆列表来自元数据缓存，添加车辆时失效
+        user_info = await run_db(get_user_info, username)
+
+        if user_info is None:
             return jsonify(LoginResponse({
                 "status": False,
                 "msg": "用户不存在",
@@ -208,36 +248,17 @@ async def get_user_cars():
                 "role": "user"
             }))
 
-        user_id = user_data[0]
-        is_admin = user_data[1]
-
-        # 获取用户的车辆列表
-        sql = """
-            SELECT id, user_id, plate_number, brand, model, battery_capacity 
-            FROM cars 
-            WHERE user_id = %s
-        """
-        cursor.execute(sql, (user_id,))
-        cars_data = cursor.fetchall()
-
-        # 转换为Car对象列表
-        cars = []
-        for car_data in cars_data:
-            car = Car(
-                id=str(car_data[0]),
-                user_id=str(car_data[1]),
-                plate_number=car_data[2],
-                brand=car_data[3],
-                model=car_data[4],
-                battery_capacity=car_data[5]
-            )
-            cars.append(car)
+        # 携带令牌时角色以令牌为准，不依赖数据库中的权限
+        if claims is not None:
+            role = claims['role']
+        else:
+            role = "admin" if user_info['is_admin'] == 1 else "user"
 
         return jsonify({
             "status": True,
             "msg": "获取成功",
-            "data": [Car.to_json(car) for car in cars],
-            "role": "admin" if is_admin == 1 else "user"
+            "data": [Car.to_json(car) for car in user_info['cars']],
+            "role": role
         })
 
     except Exception as e:
@@ -248,55 +269,44 @@ async def get_user_cars():
             "token": "",
             "role": "user"
         }))
-    finally:
-        cursor.close()
-        conn.close()
-
-@blueprint.route('/cars', methods=["POST"])
-async def add_car():
-    print("receive req for add car", request.get_json())
-    data = request.get_json()
-    username = data.get('username')
-    car_data = data.get('car')
-
-    if not all([username, car_data]):
-        return jsonify(LoginResponse({
-            "status": False,
-            "msg": "参数不完整",
-            "token": "",
-            "role": "user"
-        }))
 
+def _add_car(username, claims, car_data):
+    """为用户添加车辆"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        # 获取用户ID和权限
-        sql = "SELECT id, isadmin FROM users WHERE username = %s"
-        cursor.execute(sql, (username,))
-        user_data = cursor.fetchone()
-        
-        if user_data is None:
-            return jsonify(LoginResponse({
-                "status": False,
-                "msg": "用户不存在",
-                "token": "",
-                "role": "user"
-            }))
-
-        user_id = user_data[0]
-        is_admin = user_data[1]
+        if claims is not None:
+            # 用户ID和权限来自令牌，不查询数据库
+            user_id = claims['uid']
+            is_admin = 1 if claims['role'] == 'admin' else 0
+        else:
+            # 未携带令牌时按用户名查询用户ID和权限
+            sql = "SELECT id, isadmin FROM users WHERE username = %s"
+            cursor.execute(sql, (username,))
+            user_data = cursor.fetchone()
+
+            if user_data is None:
+                return LoginResponse({
+                    "status": False,
+                    "msg": "用户不存在",
+                    "token": "",
+                    "role": "user"
+                })
+
+            user_id = user_data[0]
+            is_admin = user_data[1]
 
         # 检查车牌号是否已存在
         sql = "SELECT id FROM cars WHERE plate_number = %s"
         cursor.execute(sql, (car_data['plate_number'],))
         if cursor.fetchone():
-            return jsonify(LoginResponse({
+            return LoginResponse({
                 "status": False,
                 "msg": "该车牌号已存在",
                 "token": "",
                 "role": "admin" if is_admin == 1 else "user"
-            }))
+            })
 
         # 添加新车辆
         sql = """
@@ -311,22 +321,49 @@ async def add_car():
             car_data['battery_capacity']
         ))
         conn.commit()
+        invalidate_user(username, cursor.lastrowid)
 
-        return jsonify(LoginResponse({
+        return LoginResponse({
             "status": True,
             "msg": "添加成功",
             "token": "",
             "role": "admin" if is_admin == 1 else "user"
-        }))
+        })
 
     except Exception as e:
         print("Error during adding car:", e)
-        return jsonify(LoginResponse({
+        return LoginResponse({
             "status": False,
             "msg": "内部服务器错误",
             "token": "",
             "role": "user"
-        }))
+        })
     finally:
         cursor.close()
         conn.close()
+
+@blueprint.route('/cars', methods=["POST"])
+async def add_car():
+    print("receive req for add car", request.get_json())
+    data = request.get_json()
+    try:
+        username, claims = resolve_username(data.get('username'))
+    except TokenError as e:
+        return jsonify(LoginResponse({
+            "status": False,
+            "msg": str(e),
+            "token": "",
+            "role": "user"
+        }))
+    car_data = data.get('car')
+
+    if not all([username, car_data]):
+        return jsonify(LoginResponse({
+            "status": False,
+            "msg": "参数不完整",
+            "token": "",
+            "role": "user"
+        }))
+
+    return jsonify(await run_db(_add_car, username, claims, car_data))
+
@@ -0,0 +1,39 @@
+"""
+异步视图中的阻塞调用
+数据库访问交给有界线程池执行，调度器命令通过Future等待，事件循环本身不被阻塞。
+WSGI（run.py）和ASGI（asgi.py）两种运行方式下都可以使用
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.db_config import DB_POOL_CONFIG
+
+# 线程数与连接池大小一致，等待连接的请求在线程池队列中排队而不是占用线程
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_CONFIG['max_size'], thread_name_prefix='db')
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    在数据库线程池中执行阻塞函数
+    :param func: 访问数据库的函数
+    :return: 函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_command(scheduler, command, **params):
+    """
+    提交调度器命令并等待结果，不占用线程
+    :param scheduler: 调度器
+    :param command: 命令名称
+    :param params: 命令参数
+    :return: 命令执行结果
+    """
+    future = scheduler.submit(command, **params)
+    return await asyncio.wait_for(asyncio.wrap_future(future), scheduler.command_timeout)
@@ -0,0 +1,222 @@
+"""
+Flask应用的ASGI适配器
+异步视图直接在服务器的事件循环中执行，不再像WSGI方式那样每个请求占用一个线程并各自创建事件循环；
+请求上下文保存在ContextVar中，每个请求是独立的任务，上下文互不干扰。
+视图中的数据库访问和调度器命令通过aio模块交给线程池或调度线程，等待期间事件循环可以处理其他请求
+"""
+import asyncio
+import contextvars
+import io
+import sys
+
+from flask import request, request_started
+
+from .aio import db_executor
+
+
+def _build_environ(scope, body: bytes) -> dict:
+    """
+    根据ASGI的HTTP请求信息构造WSGI环境，供Flask创建请求上下文
+    :param scope: ASGI连接信息
+    :param body: 请求体
+    :return: WSGI环境字典
+    """
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,  # 视图据此判断可以返回异步生成器作为流式响应体
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue  # 以实际读取的请求体长度为准
+        if name != 'CONTENT_TYPE':
+            name = 'HTTP_' + name
+        # 重复的请求头按HTTP规范用逗号合并
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class AsgiApp:
+    """
+    把Flask应用包装为ASGI应用（http和lifespan协议）
+    分发过程与Flask.full_dispatch_request一致（before_request、视图、after_request、错误处理器），
+    区别只在于协程视图由事件循环直接await
+    """
+
+    def __init__(self, app):
+        """
+        :param app: Flask应用
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"不支持的ASGI协议: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        """服务器启动和关闭通知，应用在导入时已经完成初始化，直接确认"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        environ = _build_environ(scope, body)
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                response = await self._full_dispatch_request()
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            except:  # noqa: B001
+                error = sys.exc_info()[1]
+                raise
+            status_headers = []
+            app_iter = response(environ, lambda status, headers, exc_info=None: status_headers.extend([status, headers]))
+        finally:
+            if app.should_ignore_error(error):
+                error = None
+            ctx.auto_pop(error)
+
+        await self._send_response(receive, send, status_headers[0], status_headers[1], response, app_iter)
+
+    async def _full_dispatch_request(self):
+        """对应Flask.full_dispatch_request，视图通过_dispatch_request调用"""
+        app = self.app
+        app.try_trigger_before_first_request_functions()
+        try:
+            request_started.send(app)
+            rv = app.preprocess_request()
+            if rv is None:
+                rv = await self._dispatch_request()
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        return app.finalize_request(rv)
+
+    async def _dispatch_request(self):
+        """对应Flask.dispatch_request，协程视图在当前事件循环中执行，同步视图直接调用"""
+        app = self.app
+        req = request._get_current_object()
+        if req.routing_exception is not None:
+            app.raise_routing_exception(req)
+        rule = req.url_rule
+        if getattr(rule, 'provide_automatic_options', False) and req.method == 'OPTIONS':
+            return app.make_default_options_response()
+        view = app.view_functions[rule.endpoint]
+        if asyncio.iscoroutinefunction(view):
+            return await view(**req.view_args)
+        return view(**req.view_args)
+
+    async def _send_response(self, receive, send, status, headers, response, app_iter):
+        """
+        发送响应；同步生成器的流式响应（例如详单流式导出）在线程池中逐块生成，
+        所有块在同一个上下文中生成，保证stream_with_context推入的请求上下文能正确弹出；
+        异步生成器的流式响应（例如状态推送）直接在事件循环中迭代，客户端断开时停止
+        """
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        context = contextvars.copy_context()
+        try:
+            if response.is_sequence:
+                for chunk in app_iter:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            elif hasattr(response.response, '__aiter__'):
+                if not await self._send_async_body(receive, send, response.response, response.charset):
+                    return
+            else:
+                loop = asyncio.get_running_loop()
+                iterator = iter(app_iter)
+                end = object()
+                while True:
+                    chunk = await loop.run_in_executor(db_executor, context.run, next, iterator, end)
+                    if chunk is end:
+                        break
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # 触发call_on_close等清理（例如归还流式查询占用的连接），客户端中途断开时生成器也在同一上下文中关闭
+            close = getattr(app_iter, 'close', None)
+            if close is not None:
+                context.run(close)
+
+    async def _send_async_body(self, receive, send, body, charset):
+        """
+        逐块发送异步生成器产生的响应体，同时监听客户端断开
+        :return: 是否完整发送（客户端断开时为False）
+        """
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        iterator = body.__aiter__()
+        try:
+            while True:
+                chunk = asyncio.ensure_future(iterator.__anext__())
+                await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    # 等生成器处理完取消后再关闭
+                    chunk.cancel()
+                    await asyncio.gather(chunk, return_exceptions=True)
+                    return False
+                try:
+                    data = chunk.result()
+                except StopAsyncIteration:
+                    return True
+                if isinstance(data, str):
+                    data = data.encode(charset)
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            aclose = getattr(iterator, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
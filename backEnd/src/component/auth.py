@@ -0,0 +1,49 @@
+"""
+登录令牌
+登录时签发，之后的请求在 Authorization: Bearer <令牌> 中携带（不接受查询参数中的令牌，避免写入访问日志和代理日志），
+身份和角色校验只做本地HMAC计算，不查询数据库
+"""
+from flask import request
+import sys
+import os
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.auth_config import AUTH_CONFIG
+from ..dataStructure.SessionToken import TokenSigner, TokenError
+
+token_signer = TokenSigner(AUTH_CONFIG['secret'], AUTH_CONFIG['ttl'])
+
+
+def get_request_token():
+    """获取Authorization请求头中的令牌，没有时返回None"""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip() or None
+    return None
+
+
+def get_current_user():
+    """
+    校验请求携带的令牌
+    :return: 令牌载荷（uid、sub、role等），未携带令牌时返回None
+    :raises TokenError: 令牌无效、过期或已注销
+    """
+    token = get_request_token()
+    if token is None:
+        return None
+    return token_signer.verify(token)
+
+
+def resolve_username(username):
+    """
+    确定请求对应的用户名
+    携带有效令牌时以令牌中的用户名为准，未携带令牌时沿用请求参数中的用户名
+    :param username: 请求参数中的用户名
+    :return: (用户名, 令牌载荷或None)
+    :raises TokenError: 令牌无效、过期或已注销
+    """
+    claims = get_current_user()
+    if claims is not None:
+        return claims['sub'], claims
+    return username, None
@@ -0,0 +1,111 @@
+"""
+车辆和用户元数据缓存
+用户和服务端两个蓝图共享，未命中的数据用一条 IN (...) 查询批量加载
+"""
+import sys
+import os
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.db_config import METADATA_CACHE_CONFIG
+from ..dataStructure.MetadataCache import BulkTTLCache
+from ..dataStructure.User import Car
+from .database import get_db_connection
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _row_to_car(row):
+    return Car(
+        id=str(row[0]),
+        user_id=str(row[1]),
+        plate_number=row[2],
+        brand=row[3],
+        model=row[4],
+        battery_capacity=row[5]
+    )
+
+
+def _load_cars(car_ids):
+    """按车辆ID批量加载车辆信息"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        sql = f"""
+            SELECT id, user_id, plate_number, brand, model, battery_capacity
+            FROM cars
+            WHERE id IN ({_placeholders(car_ids)})
+        """
+        cursor.execute(sql, tuple(car_ids))
+        return {str(row[0]): _row_to_car(row) for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _load_users(usernames):
+    """按用户名批量加载用户ID、权限和车辆列表"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        sql = f"SELECT id, username, isadmin FROM users WHERE username IN ({_placeholders(usernames)})"
+        cursor.execute(sql, tuple(usernames))
+        users = {row[1]: {'user_id': row[0], 'is_admin': row[2], 'cars': []} for row in cursor.fetchall()}
+        if not users:
+            return {}
+
+        by_user_id = {user['user_id']: user for user in users.values()}
+        sql = f"""
+            SELECT id, user_id, plate_number, brand, model, battery_capacity
+            FROM cars
+            WHERE user_id IN ({_placeholders(by_user_id)})
+        """
+        cursor.execute(sql, tuple(by_user_id))
+        for row in cursor.fetchall():
+            by_user_id[row[1]]['cars'].append(_row_to_car(row))
+        return users
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# 车辆ID(字符串) -> Car
+car_cache = BulkTTLCache(_load_cars, **METADATA_CACHE_CONFIG)
+# 用户名 -> {'user_id', 'is_admin', 'cars'}
+user_cache = BulkTTLCache(_load_users, **METADATA_CACHE_CONFIG)
+
+
+def get_cars(car_ids):
+    """
+    批量获取车辆信息
+    :param car_ids: 车辆ID列表
+    :return: 车辆ID(字符串) -> Car
+    """
+    return car_cache.get_many(str(car_id) for car_id in car_ids)
+
+
+def get_user_info(username):
+    """
+    获取用户ID、权限和车辆列表
+    :param username: 用户名
+    :return: {'user_id', 'is_admin', 'cars'}，用户不存在时返回None
+    """
+    return user_cache.get(username)
+
+
+def invalidate_user(username, car_id=None):
+    """
+    用户信息或车辆变化后使缓存失效
+    :param username: 用户名
+    :param car_id: 新增或修改的车辆ID
+    """
+    user_cache.invalidate(username)
+    if car_id is not None:
+        car_cache.invalidate(str(car_id))
+
+
+def get_cache_stats():
+    """获取缓存统计"""
+    return {'cars': car_cache.get_stats(), 'users': user_cache.get_stats()}
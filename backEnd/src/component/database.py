@@ -0,0 +1,37 @@
+"""
+数据库连接
+用户和服务端两个蓝图共享同一个连接池
+"""
+import pymysql
+import sys
+import os
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.db_config import DB_CONFIG, DB_POOL_CONFIG
+from ..dataStructure.ConnectionPool import ConnectionPool
+
+
+def _connect():
+    """建立新的数据库连接"""
+    return pymysql.connect(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        charset=DB_CONFIG['charset'],
+        database=DB_CONFIG['database']
+    )
+
+
+db_pool = ConnectionPool(_connect, **DB_POOL_CONFIG)
+
+
+def get_db_connection():
+    """从连接池获取数据库连接，close()时归还到连接池"""
+    return db_pool.connection()
+
+
+def get_db_pool_stats():
+    """获取连接池统计信息"""
+    return db_pool.get_stats()
@@ -0,0 +1,61 @@
+from typing import List, Tuple
+import numpy as np
+
+
+def solve_assignment(cost_matrix: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    求解最小代价指派问题（匈牙利算法，最短增广路 + 势函数实现，复杂度O(n²m)）
+    每一行最多分配一列，每一列最多分配一行；行数大于列数时只有列数个行会被分配
+    :param cost_matrix: n×m 代价矩阵，cost_matrix[i][j] 表示把第i行分配给第j列的代价
+    :return: 分配结果列表，每个元素是(行号, 列号)，按行号升序
+    """
+    cost = np.asarray(cost_matrix, dtype=float)
+    if cost.ndim != 2 or cost.size == 0:
+        return []
+
+    # 算法要求行数不超过列数，否则转置求解
+    if cost.shape[0] > cost.shape[1]:
+        return sorted((row, col) for col, row in solve_assignment(cost.T))
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)  # 行势
+    v = np.zeros(m + 1)  # 列势
+    match = np.zeros(m + 1, dtype=int)  # match[j]: 第j列分配到的行（1开始，0表示未分配）
+    way = np.zeros(m + 1, dtype=int)  # 增广路上第j列的前驱列
+
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            free = ~used[1:]
+
+            # 用新加入交错树的行一次性更新所有未访问列的松弛量
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            improved = free & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = j0
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            # 调整势函数，使新的列变为可达
+            u[match[used]] += delta
+            v[used] -= delta
+            min_slack[1:][free] -= delta
+
+            j0 = j1
+            if match[j0] == 0:
+                break
+
+        # 沿增广路翻转匹配
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    return sorted((int(match[j]) - 1, j - 1) for j in range(1, m + 1) if match[j])
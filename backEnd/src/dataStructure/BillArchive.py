@@ -0,0 +1,226 @@
+import calendar
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .Tariff import DEFAULT_TARIFF, SECONDS_PER_DAY, TariffSchedule
+
+ARCHIVE_VERSION = 1
+
+# 时间列：以"本地时间当作UTC"的秒数存储，除以86400的余数即一天中的秒数
+TIME_COLUMNS = ['create_time', 'start_time', 'end_time']
+# 数值列
+NUMERIC_COLUMNS = ['charging_amount', 'charging_duration', 'charging_cost', 'service_cost', 'total_cost']
+# 字典编码的字符串列：每个值存为int32编码，字典保存在meta.json中
+DICTIONARY_COLUMNS = ['pile_id', 'vehicle_id', 'username']
+# 定长字符串列
+BILL_ID_WIDTH = 36
+
+_EPOCH = datetime(1970, 1, 1)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_seconds(value: Any) -> int:
+    if not isinstance(value, datetime):
+        value = datetime.strptime(str(value), TIME_FORMAT)
+    return int((value - _EPOCH).total_seconds())
+
+
+def _month_seconds(month: str) -> int:
+    year, month_number = (int(part) for part in month.split('-'))
+    return calendar.monthrange(year, month_number)[1] * SECONDS_PER_DAY
+
+
+def write_month(directory: str, month: str, bills: Iterable[Dict[str, Any]]) -> str:
+    """
+    把一个月的充电详单写成列式归档
+    每列一个.npy文件（可用内存映射打开），字符串列字典编码，字典和元数据保存在meta.json中
+    :param directory: 归档根目录
+    :param month: 月份，格式YYYY-MM
+    :param bills: 详单字典（ChargingBill或charging_bills表的行）
+    :return: 该月归档目录
+    """
+    bills = sorted(bills, key=lambda bill: (_to_seconds(bill['start_time']), str(bill['bill_id'])))
+    path = os.path.join(directory, f"bills-{month}")
+    os.makedirs(path, exist_ok=True)
+
+    columns = {
+        'bill_id': np.array([str(bill['bill_id']) for bill in bills], dtype=f'S{BILL_ID_WIDTH}')
+    }
+    for column in TIME_COLUMNS:
+        columns[column] = np.array([_to_seconds(bill[column]) for bill in bills], dtype=np.int64)
+    for column in NUMERIC_COLUMNS:
+        columns[column] = np.array([float(bill[column]) for bill in bills], dtype=np.float64)
+
+    dictionaries = {}
+    for column in DICTIONARY_COLUMNS:
+        values = [str(bill[column]) for bill in bills]
+        dictionary = sorted(set(values))
+        index = {value: code for code, value in enumerate(dictionary)}
+        columns[column] = np.array([index[value] for value in values], dtype=np.int32)
+        dictionaries[column] = dictionary
+
+    for column, values in columns.items():
+        np.save(os.path.join(path, f"{column}.npy"), values)
+
+    meta = {
+        'version': ARCHIVE_VERSION,
+        'month': month,
+        'count': len(bills),
+        'columns': {column: values.dtype.str for column, values in columns.items()},
+        'dictionaries': dictionaries
+    }
+    # 元数据最后写入，读取时以meta.json存在作为归档完整的标志
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return path
+
+
+class BillArchive:
+    """一个月的列式详单归档，列以内存映射方式按需加载"""
+
+    def __init__(self, path: str, mmap: bool = True):
+        """
+        打开归档
+        :param path: write_month返回的归档目录
+        :param mmap: 是否以内存映射方式打开列文件
+        """
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"不支持的归档版本: {self.meta.get('version')}")
+        self.path = path
+        self.month: str = self.meta['month']
+        self.dictionaries: Dict[str, List[str]] = self.meta['dictionaries']
+        self._mmap_mode = 'r' if mmap else None
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        获取一列（字典编码的列返回编码）
+        :param name: 列名
+        :return: 数组
+        """
+        if name not in self._columns:
+            if name not in self.meta['columns']:
+                raise KeyError(f"归档中没有列: {name}")
+            # 空文件不能内存映射
+            mmap_mode = self._mmap_mode if len(self) else None
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=mmap_mode)
+        return self._columns[name]
+
+    def decode(self, name: str) -> np.ndarray:
+        """
+        获取字典编码列的原始字符串
+        :param name: 列名
+        :return: 字符串数组
+        """
+        return np.asarray(self.dictionaries[name], dtype=object)[self.column(name)]
+
+    @property
+    def span_seconds(self) -> int:
+        """归档覆盖的时长（整月秒数）"""
+        return _month_seconds(self.month)
+
+
+def open_archives(directory: str, months: Optional[Sequence[str]] = None) -> List[BillArchive]:
+    """
+    打开目录下的月度归档
+    :param directory: 归档根目录
+    :param months: 月份列表，为None时打开所有完整的归档
+    :return: 按月份排序的归档列表
+    """
+    if months is None:
+        months = sorted(name[len('bills-'):] for name in os.listdir(directory)
+                        if name.startswith('bills-') and os.path.exists(os.path.join(directory, name, 'meta.json')))
+    return [BillArchive(os.path.join(directory, f"bills-{month}")) for month in months]
+
+
+ArchiveArg = Union[BillArchive, Sequence[BillArchive]]
+
+
+def _as_list(archives: ArchiveArg) -> List[BillArchive]:
+    return [archives] if isinstance(archives, BillArchive) else list(archives)
+
+
+def _group_sum(archives: List[BillArchive], key: str, columns: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """按字典编码列分组求和，各月字典不同，按解码后的值合并"""
+    result: Dict[str, Dict[str, float]] = {}
+    for archive in archives:
+        codes = archive.column(key)
+        dictionary = archive.dictionaries[key]
+        sums = {'charging_count': np.bincount(codes, minlength=len(dictionary))}
+        for column in columns:
+            sums[column] = np.bincount(codes, weights=archive.column(column), minlength=len(dictionary))
+        for code, value in enumerate(dictionary):
+            row = result.setdefault(value, {name: 0.0 for name in sums})
+            for name, totals in sums.items():
+                row[name] += float(totals[code])
+    for row in result.values():
+        row['charging_count'] = int(row['charging_count'])
+    return result
+
+
+def utilization_by_pile(archives: ArchiveArg) -> Dict[str, Dict[str, float]]:
+    """
+    各充电桩的充电次数、充电时长、电量、收入和利用率
+    :param archives: 一个或多个月度归档
+    :return: 充电桩编号 -> 统计，utilization为充电时长占归档覆盖时长的比例
+    """
+    archives = _as_list(archives)
+    result = _group_sum(archives, 'pile_id', ['charging_duration', 'charging_amount', 'total_cost'])
+    span_minutes = sum(archive.span_seconds for archive in archives) / 60
+    for row in result.values():
+        row['utilization'] = row['charging_duration'] / span_minutes if span_minutes else 0.0
+    return result
+
+
+def revenue_by_user(archives: ArchiveArg) -> Dict[str, Dict[str, float]]:
+    """
+    各用户的充电次数、电量和费用
+    :param archives: 一个或多个月度归档
+    :return: 用户名 -> 统计
+    """
+    return _group_sum(_as_list(archives), 'username',
+                      ['charging_amount', 'charging_cost', 'service_cost', 'total_cost'])
+
+
+def energy_by_tariff_period(archives: ArchiveArg, tariff: TariffSchedule = DEFAULT_TARIFF) -> Dict[float, float]:
+    """
+    按电价时段拆分的充电电量，假设每次充电在开始到结束之间功率恒定
+    对每个电价预先计算一天内的累计秒数，所有详单一次向量化计算，与详单数量成线性关系
+    :param archives: 一个或多个月度归档
+    :param tariff: 分时电价表
+    :return: 电价(元/度) -> 电量(度)
+    """
+    boundaries = np.asarray(tariff.boundaries + [SECONDS_PER_DAY], dtype=np.float64)
+    rates = np.asarray(tariff.rates, dtype=np.float64)
+    result = {float(rate): 0.0 for rate in np.unique(rates)}
+
+    for archive in _as_list(archives):
+        if len(archive) == 0:
+            continue
+        start = archive.column('start_time')
+        end = archive.column('end_time')
+        amount = archive.column('charging_amount')
+        duration = (end - start).astype(np.float64)
+        start_day, start_second = np.divmod(start, SECONDS_PER_DAY)
+        end_day, end_second = np.divmod(end, SECONDS_PER_DAY)
+        for rate in result:
+            # 该电价在一天内从零点起的累计秒数，在分界点处分段线性
+            in_rate = np.where(rates == rate, np.diff(boundaries), 0.0)
+            cumulative = np.concatenate(([0.0], np.cumsum(in_rate)))
+            seconds = ((end_day - start_day) * cumulative[-1]
+                       + np.interp(end_second, boundaries, cumulative)
+                       - np.interp(start_second, boundaries, cumulative))
+            # 时长为0的详单整体计入开始时刻所在的时段
+            at_start = rates[np.searchsorted(boundaries, start_second, side='right') - 1] == rate
+            share = np.where(duration > 0, seconds / np.where(duration > 0, duration, 1), at_start)
+            result[rate] += float(np.dot(amount, share))
+    return result
@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# charging_bills表的所有列（同时作为fields参数的白名单）
+BILL_COLUMNS = [
+    'bill_id', 'create_time', 'pile_id', 'vehicle_id', 'username',
+    'charging_amount', 'charging_duration', 'start_time', 'end_time',
+    'charging_cost', 'service_cost', 'total_cost'
+]
+
+# 可用于筛选的列
+BILL_FILTERS = ['username', 'pile_id']
+
+# 分页键，详单按 (create_time, bill_id) 倒序排列
+KEYSET_COLUMNS = ['create_time', 'bill_id']
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def encode_cursor(create_time: Any, bill_id: str) -> str:
+    """
+    把一页最后一条详单的分页键编码为游标
+    :param create_time: 详单生成时间（datetime或字符串）
+    :param bill_id: 详单编号
+    :return: 游标字符串
+    """
+    if isinstance(create_time, datetime):
+        create_time = create_time.strftime(TIME_FORMAT)
+    raw = json.dumps([str(create_time), bill_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    解码游标
+    :param cursor: 游标字符串
+    :return: (create_time, bill_id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        create_time, bill_id = json.loads(raw.decode('utf-8'))
+        datetime.strptime(create_time, TIME_FORMAT)
+    except Exception:
+        raise ValueError("无效的游标")
+    return create_time, str(bill_id)
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    解析需要返回的列
+    :param fields: 逗号分隔的列名，为空时返回所有列
+    :return: 列名列表
+    """
+    if not fields:
+        return list(BILL_COLUMNS)
+    selected = []
+    for field in fields.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field not in BILL_COLUMNS:
+            raise ValueError(f"不支持的字段: {field}")
+        if field not in selected:
+            selected.append(field)
+    return selected or list(BILL_COLUMNS)
+
+
+def parse_limit(limit: Optional[str]) -> int:
+    """
+    解析每页条数
+    :param limit: 每页条数字符串，为空时使用默认值
+    :return: 1 ~ MAX_PAGE_SIZE 之间的整数
+    """
+    if limit in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        value = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit必须是整数")
+    return max(1, min(value, MAX_PAGE_SIZE))
+
+
+def build_bill_query(filters: Dict[str, Any], fields: Sequence[str], cursor: Optional[str] = None,
+                     limit: Optional[int] = None) -> Tuple[str, list, List[str]]:
+    """
+    构造按 (create_time, bill_id) 倒序的分页查询
+    使用"上一页最后一条之后"的条件代替OFFSET，配合 (筛选列, create_time, bill_id) 索引，
+    每页的代价与翻到第几页无关
+    :param filters: 筛选条件，键为BILL_FILTERS中的列，值为None时忽略
+    :param fields: 需要返回的列
+    :param cursor: 上一页返回的游标，为None时从第一条开始
+    :param limit: 查询条数，为None时不限制（用于流式输出）
+    :return: (SQL, 参数, 实际查询的列)，实际查询的列总是包含分页键
+    """
+    columns = list(fields) + [column for column in KEYSET_COLUMNS if column not in fields]
+    conditions = []
+    params = []
+    for column in BILL_FILTERS:
+        value = filters.get(column)
+        if value is not None:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+    if cursor:
+        create_time, bill_id = decode_cursor(cursor)
+        conditions.append("(create_time < %s OR (create_time = %s AND bill_id < %s))")
+        params.extend([create_time, create_time, bill_id])
+
+    sql = f"SELECT {', '.join(columns)} FROM charging_bills"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY create_time DESC, bill_id DESC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params, columns
+
+
+def row_to_bill(columns: Sequence[str], row: Sequence[Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    把查询结果的一行转换为详单字典（只保留需要返回的列，Decimal转换为float）
+    :param columns: 查询的列
+    :param row: 查询结果
+    :param fields: 需要返回的列
+    :return: 详单字典
+    """
+    bill = {}
+    for column, value in zip(columns, row):
+        if column not in fields:
+            continue
+        if isinstance(value, Decimal):
+            value = float(value)
+        bill[column] = value
+    return bill
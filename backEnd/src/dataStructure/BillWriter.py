@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+class BillWriter:
+    """
+    充电详单异步批量写入器（write-behind）
+    - submit()先把详单追加到本地缓冲文件，再放入内存队列后立即返回，调度线程不会被数据库阻塞
+    - 后台线程在积累到batch_size条或最早的详单等待超过flush_interval秒时批量写入数据库
+    - 写入失败时保留详单并按retry_interval重试；内存队列满时详单只保留在缓冲文件中，队列清空后从文件补写
+    - 所有详单都已写入时清空缓冲文件；启动时重放缓冲文件，数据库故障期间的详单不会丢失
+    写入函数需要幂等（例如INSERT IGNORE），因为进程在写入成功后、清空缓冲文件前退出时，重放会重复写入
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], None], spool_path: str,
+                 max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 1.0,
+                 retry_interval: float = 5.0):
+        """
+        初始化写入器
+        :param write_batch: 批量写入详单的函数，失败时抛出异常
+        :param spool_path: 本地缓冲文件路径（每行一条JSON详单）
+        :param max_queue: 内存队列最大长度
+        :param batch_size: 每批写入的最大条数
+        :param flush_interval: 详单最长等待时间（秒）
+        :param retry_interval: 写入失败后的重试间隔（秒）
+        """
+        self.write_batch = write_batch
+        self.spool_path = spool_path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+
+        self._condition = threading.Condition()
+        self._pending: Deque[tuple] = deque()  # (详单, 入队时间)
+        self._writing = 0  # 正在写入的条数
+        self._spool_backlog = False  # 是否有只保存在缓冲文件中的详单
+        self._spool_offset = 0  # 缓冲文件中第一条未加载到内存的详单的位置
+        self._spool_file = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'batches': 0,
+            'failures': 0,
+            'spilled': 0,
+            'replayed': 0
+        }
+
+    def start(self) -> None:
+        """打开缓冲文件，加载上次未写入的详单并启动后台线程"""
+        with self._condition:
+            if self._running:
+                return
+            directory = os.path.dirname(self.spool_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._spool_file = open(self.spool_path, 'a+b')
+            self._spool_offset = 0
+            replayed = self._load_spool()
+            self._stats['replayed'] += replayed
+            if replayed:
+                print(f"从缓冲文件恢复{replayed}条未写入的充电详单")
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name='bill-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, bill: Dict[str, Any]) -> None:
+        """
+        提交一条详单（不等待写入数据库）
+        :param bill: 详单字典
+        """
+        line = (json.dumps(bill, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._condition:
+            self._stats['submitted'] += 1
+            if self._spool_file is None:
+                # 未启动时直接同步写入
+                self._write_now([bill])
+                return
+
+            position = self._spool_file.tell()
+            self._spool_file.write(line)
+            self._spool_file.flush()
+            if self._spool_backlog or len(self._pending) >= self.max_queue:
+                # 内存队列已满，详单只保存在缓冲文件中，稍后从文件补写
+                if not self._spool_backlog:
+                    self._spool_backlog = True
+                    self._spool_offset = position
+                self._stats['spilled'] += 1
+            else:
+                self._pending.append((bill, time.monotonic()))
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _write_now(self, bills: List[Dict[str, Any]]) -> None:
+        try:
+            self.write_batch(bills)
+            self._stats['written'] += len(bills)
+            self._stats['batches'] += 1
+        except Exception as e:
+            self._stats['failures'] += 1
+            print(f"保存充电详单失败: {str(e)}")
+
+    def _load_spool(self) -> int:
+        """从_spool_offset开始把缓冲文件中的详单加载到内存队列（需持有锁），返回加载条数"""
+        self._spool_file.seek(self._spool_offset)
+        now = time.monotonic()
+        loaded = 0
+        self._spool_backlog = False
+        while True:
+            if len(self._pending) >= self.max_queue:
+                self._spool_backlog = True
+                break
+            line = self._spool_file.readline()
+            if not line:
+                break
+            self._spool_offset = self._spool_file.tell()
+            if not line.strip():
+                continue
+            try:
+                bill = json.loads(line.decode('utf-8'))
+            except ValueError:
+                # 进程崩溃时可能留下不完整的最后一行
+                print(f"忽略缓冲文件中损坏的详单: {line[:80]!r}")
+                continue
+            self._pending.append((bill, now))
+            loaded += 1
+        self._spool_file.seek(0, os.SEEK_END)
+        return loaded
+
+    def _truncate_spool(self) -> None:
+        """所有详单都已写入，清空缓冲文件（需持有锁）"""
+        if self._spool_file is not None:
+            self._spool_file.seek(0)
+            self._spool_file.truncate()
+            self._spool_file.flush()
+            self._spool_offset = 0
+
+    def _next_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """等待下一批需要写入的详单，停止且队列为空时返回None"""
+        with self._condition:
+            while True:
+                if not self._pending and self._spool_backlog:
+                    # 内存队列已清空，从缓冲文件补写溢出的详单
+                    self._load_spool()
+                if self._pending:
+                    due = self._pending[0][1] + self.flush_interval
+                    remaining = due - time.monotonic()
+                    if len(self._pending) >= self.batch_size or remaining <= 0 or not self._running:
+                        batch = [bill for bill, _ in list(self._pending)[:self.batch_size]]
+                        self._writing = len(batch)
+                        return batch
+                    self._condition.wait(remaining)
+                elif not self._running:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self) -> None:
+        """后台写入线程"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                with self._condition:
+                    self._writing = 0
+                    self._stats['failures'] += 1
+                    self._condition.notify_all()
+                    print(f"批量保存充电详单失败，{self.retry_interval}秒后重试: {str(e)}")
+                    if not self._running:
+                        # 正在停止，剩余详单留在缓冲文件中，下次启动时重放
+                        return
+                    self._condition.wait(self.retry_interval)
+                continue
+
+            with self._condition:
+                for _ in range(len(batch)):
+                    self._pending.popleft()
+                self._writing = 0
+                self._stats['written'] += len(batch)
+                self._stats['batches'] += 1
+                if not self._pending and not self._spool_backlog:
+                    self._truncate_spool()
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入所有待写详单并等待完成
+        :param timeout: 最长等待时间（秒），为None时一直等待
+        :return: 是否全部写入
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            # 把所有待写详单视为已到期
+            expired = time.monotonic() - self.flush_interval
+            self._pending = deque((bill, min(queued_at, expired)) for bill, queued_at in self._pending)
+            self._condition.notify_all()
+            while self._pending or self._writing or self._spool_backlog:
+                if not self._running:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止后台线程，尽量写完剩余详单，未写入的保留在缓冲文件中
+        :param timeout: 等待写入的最长时间（秒）
+        """
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            if self._spool_file is not None:
+                self._spool_file.close()
+                self._spool_file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取写入统计
+        :return: 提交、写入、失败、溢出和重放的条数以及当前积压
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            stats['spool_backlog'] = self._spool_backlog
+        return stats
@@ -1,9 +1,12 @@
 import time
 from enum import Enum
-from typing import Dict, TypedDict, Any, Union, List, Optional, cast
-from datetime import datetime, time as dt_time
+from typing import Deque, Dict, TypedDict, Any, Union, List, Optional, cast
+from datetime import datetime
 from collections import deque
-from .ChargingBill import create_charging_bill
+from .ChargingBill import BillFactory
+from .Clock import Clock, default_clock
+from .Tariff import TariffSchedule, SessionMeter, DEFAULT_TARIFF
+from .Records import VehicleRecord, to_json
 
 
 class ChargingStatus(Enum):
@@ -25,17 +28,156 @@ class ChargingBill(TypedDict, total=False):
 class ErrorResponse(TypedDict):
     error: str
 
+
+class ChargeQueue(deque):
+    """
+    充电桩队列
+    在deque的基础上维护队列中所有车辆剩余请求充电量之和，入队、出队时O(1)更新，
+    调度和预计完成时间查询不再需要遍历队列；车辆请求量原地修改后需调用refresh。
+    同时维护 车辆ID -> 车辆数 的索引，按车辆ID或车辆对象判断是否在队列中都是O(1)
+    """
+
+    def __init__(self, iterable=(), maxlen: Optional[int] = None):
+        super().__init__(maxlen=maxlen)
+        self._amounts: Dict[int, List[float]] = {}  # id(车辆) -> 入队时记录的剩余请求充电量
+        self._car_ids: Dict[str, int] = {}  # 车辆ID -> 队列中该车辆的记录数
+        self.total_amount = 0.0  # 队列中车辆剩余请求充电量之和（度）
+        self.extend(iterable)
+
+    @staticmethod
+    def remaining_amount(vehicle: dict) -> float:
+        """车辆剩余请求充电量（请求充电量扣除故障前已充电量）"""
+        return max(0.0, vehicle.get('charging_amount', 0) - vehicle.get('already_charged_amount', 0.0))
+
+    def _track(self, vehicle: dict) -> None:
+        amount = self.remaining_amount(vehicle)
+        self._amounts.setdefault(id(vehicle), []).append(amount)
+        self.total_amount += amount
+        car_id = vehicle.get('car_id')
+        self._car_ids[car_id] = self._car_ids.get(car_id, 0) + 1
+
+    def _untrack(self, vehicle: dict) -> None:
+        amounts = self._amounts.get(id(vehicle))
+        if not amounts:
+            return
+        self.total_amount -= amounts.pop()
+        if not amounts:
+            del self._amounts[id(vehicle)]
+        car_id = vehicle.get('car_id')
+        self._car_ids[car_id] -= 1
+        if not self._car_ids[car_id]:
+            del self._car_ids[car_id]
+        if not self._amounts:
+            self.total_amount = 0.0  # 队列为空时消除浮点累计误差
+
+    def contains(self, vehicle: dict) -> bool:
+        """O(1)判断车辆（同一对象）是否在队列中"""
+        return id(vehicle) in self._amounts
+
+    def __contains__(self, vehicle) -> bool:
+        """O(1)判断车辆是否在队列中，可传入车辆ID或车辆对象（同一对象）"""
+        if isinstance(vehicle, str):
+            return vehicle in self._car_ids
+        return id(vehicle) in self._amounts
+
+    def refresh(self, vehicle: dict) -> None:
+        """车辆请求充电量或已充电量变化后重新计算其剩余请求充电量"""
+        amounts = self._amounts.get(id(vehicle))
+        if not amounts:
+            return
+        amount = self.remaining_amount(vehicle)
+        self.total_amount += amount - amounts[-1]
+        amounts[-1] = amount
+
+    def append(self, vehicle: dict) -> None:
+        if self.maxlen is not None and len(self) == self.maxlen:
+            if self.maxlen == 0:
+                return
+            self._untrack(self[0])
+        super().append(vehicle)
+        self._track(vehicle)
+
+    def appendleft(self, vehicle: dict) -> None:
+        if self.maxlen is not None and len(self) == self.maxlen:
+            if self.maxlen == 0:
+                return
+            self._untrack(self[-1])
+        super().appendleft(vehicle)
+        self._track(vehicle)
+
+    def extend(self, vehicles) -> None:
+        for vehicle in list(vehicles):
+            self.append(vehicle)
+
+    def extendleft(self, vehicles) -> None:
+        for vehicle in list(vehicles):
+            self.appendleft(vehicle)
+
+    def insert(self, index: int, vehicle: dict) -> None:
+        super().insert(index, vehicle)
+        self._track(vehicle)
+
+    def pop(self) -> dict:
+        vehicle = super().pop()
+        self._untrack(vehicle)
+        return vehicle
+
+    def popleft(self) -> dict:
+        vehicle = super().popleft()
+        self._untrack(vehicle)
+        return vehicle
+
+    def remove(self, vehicle: dict) -> None:
+        # 按对象身份定位（车辆记录的相等比较即身份比较），扣除实际存放在队列中的对象的记录
+        for index, queued in enumerate(self):
+            if queued is vehicle:
+                del self[index]
+                return
+        del self[self.index(vehicle)]
+
+    def __delitem__(self, index) -> None:
+        vehicle = self[index]
+        super().__delitem__(index)
+        self._untrack(vehicle)
+
+    def __setitem__(self, index, vehicle: dict) -> None:
+        old_vehicle = self[index]
+        super().__setitem__(index, vehicle)
+        self._untrack(old_vehicle)
+        self._track(vehicle)
+
+    def __iadd__(self, vehicles):
+        self.extend(vehicles)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._amounts.clear()
+        self._car_ids.clear()
+        self.total_amount = 0.0
+
 class ChargingPile:
-    def __init__(self, pile_id: str, charging_category: str):
+    def __init__(self, pile_id: str, charging_category: str, clock: Optional[Clock] = None,
+                 power: Optional[float] = None, queue_length: int = 2, tariff: Optional[TariffSchedule] = None,
+                 recent_bills: int = 20):
         """
         初始化充电桩
         :param pile_id: 充电桩唯一标识
         :param charging_category: 充电桩类型（F:快充, T:慢充）
+        :param clock: 时钟，为None时使用默认时钟
+        :param power: 充电功率（度/小时），为None时按类型取默认值
+        :param queue_length: 充电桩队列长度（含正在充电的车辆）
+        :param tariff: 分时电价表，为None时使用默认电价
+        :param recent_bills: 内存中保留的最近充电详单数，更早的详单只保存在数据库中
         """
         self.pile_id = pile_id
+        self.clock = clock if clock is not None else default_clock
+        self.bill_factory = BillFactory(self.clock)
         self.charging_category = charging_category
         
-        if charging_category == 'F':
+        if power is not None:
+            self.power = power  # 单位：度/每小时
+        elif charging_category == 'F':
             self.power = 30  # 单位：度/每小时
         elif charging_category == 'T':
             self.power = 7
@@ -47,27 +189,28 @@ class ChargingPile:
         self.start_time: Optional[float] = None
         self.total_energy_delivered = 0.0
         self.total_earnings = 0.0
-        self.charge_queue = deque(maxlen=2)
-        self.charging_bills = []  # 存储充电详单
+        self.charge_queue = ChargeQueue(maxlen=queue_length)
+        self.charging_bills: Deque[Dict] = deque(maxlen=recent_bills)  # 最近的充电详单（环形缓冲区）
+        self.bill_count = 0  # 生成的充电详单总数
         self.current_charging_amount = 0.0  # 当前充电量
         
         # 管理员统计信息
         self.charging_count = 0  # 充电次数
         self.total_charging_duration = 0.0  # 总充电时长（分钟）
 
-        self.rate_periods = [
-            # 谷时(0.4元/度): 23:00~次日7:00
-            (dt_time(23, 0), dt_time(7, 0), 0.4),
-            
-            # 平时(0.7元/度): 7:00~10:00, 15:00~18:00, 21:00~23:00
-            (dt_time(7, 0), dt_time(10, 0), 0.7),
-            (dt_time(15, 0), dt_time(18, 0), 0.7),
-            (dt_time(21, 0), dt_time(23, 0), 0.7),
-            
-            # 峰时(1.0元/度): 10:00~15:00, 18:00~21:00
-            (dt_time(10, 0), dt_time(15, 0), 1.0),
-            (dt_time(18, 0), dt_time(21, 0), 1.0),
-        ]
+        # 分时电价表，默认所有充电桩共享同一份
+        self.tariff = tariff if tariff is not None else DEFAULT_TARIFF
+        # 当前充电会话的电量、电费累计器
+        self.session: Optional[SessionMeter] = None
+
+    def _get_current_time(self) -> float:
+        """获取当前时间戳（自动考虑时间加速、模拟时间和仿真虚拟时间）"""
+        return self.clock.now()
+
+    def _record_bill(self, bill: Dict) -> None:
+        """记录新生成的充电详单，缓冲区满时丢弃最早的详单（已交给save_bill_func写入数据库）"""
+        self.charging_bills.append(bill)
+        self.bill_count += 1
 
     def join_queue(self, vehicle: dict) -> Union[str, ErrorResponse]:
         """
@@ -82,7 +225,7 @@ class ChargingPile:
         if vehicle_id in self.charge_queue:
             return {"error": f"操作失败: 车辆[{vehicle_id}]已在队列中"}
         
-        if len(self.charge_queue) >= 2:
+        if len(self.charge_queue) >= (self.charge_queue.maxlen or 0):
             return {"error": f"操作失败: 充电桩{self.pile_id}队列已满"}
         
         self.charge_queue.append(vehicle)
@@ -120,15 +263,12 @@ class ChargingPile:
         if vehicle not in self.charge_queue:
             return {"error": f"操作失败: 车辆[{vehicle_id}]不在队列中"}
         
-        if self.charge_queue[0] != vehicle:
+        if self.charge_queue[0] is not vehicle:
             return {"error": f"操作失败: 车辆[{vehicle_id}]不是队列中的第一辆车"}
         
-        # 使用调度器的时间函数，自动考虑时间加速和模拟时间
-        from ..component.Server.controller import scheduler
-        
         self.connected_vehicle = vehicle
         self.status = ChargingStatus.CHARGING
-        self.start_time = scheduler.get_current_time()  # 使用调度器的时间
+        self.start_time = self._get_current_time()  # 使用调度器的时间
         
         # 考虑已充电的电量
         if 'already_charged_amount' in vehicle and vehicle['already_charged_amount'] > 0:
@@ -150,23 +290,20 @@ class ChargingPile:
         if not self.connected_vehicle:
             return {"error": f"系统错误: 充电桩{self.pile_id}未连接车辆"}
         
-        # 使用调度器的时间函数，自动考虑时间加速和模拟时间
-        from ..component.Server.controller import scheduler
-        
         # 保证 start_time 不为 None
         if self.start_time is None:
-            self.start_time = scheduler.get_current_time()
+            self.start_time = self._get_current_time()
         
         if is_auto_end:
             end_time = self.start_time + self.connected_vehicle['charging_amount'] / self.power * 3600
         else:
-            end_time = scheduler.get_current_time()  # 使用调度器的时间
+            end_time = self._get_current_time()  # 使用调度器的时间
 
         start_time = cast(float, self.start_time)  # 明确告诉类型检查器 start_time 是 float
         charging_duration = (end_time - start_time) / 60  # 转换为分钟
         
-        # 计算总电量和总费用（考虑分时电价）
-        this_session_energy, cost = self._calculate_charging_cost(start_time, end_time)
+        # 计算总电量和总费用（考虑分时电价），复用会话累计值
+        this_session_energy, cost = self._get_session_totals(start_time, end_time)
         
         # 获取已充电电量（如果有）
         already_charged_amount = self.connected_vehicle.get('already_charged_amount', 0.0)
@@ -188,7 +325,7 @@ class ChargingPile:
             print(f"车辆[{self.connected_vehicle['car_id']}]本次充电{this_session_energy}度，已有充电量{already_charged_amount}度，总计{total_energy}度")
         
         # 生成充电详单
-        bill = create_charging_bill(
+        bill = self.bill_factory.create(
             pile_id=self.pile_id,
             vehicle_info=self.connected_vehicle,
             charging_amount=total_energy,
@@ -197,7 +334,7 @@ class ChargingPile:
             end_time=end_time,
             charging_cost=cost
         )
-        self.charging_bills.append(bill)
+        self._record_bill(bill)
         
         # 保存当前车辆信息用于返回
         vehicle = self.connected_vehicle
@@ -210,6 +347,7 @@ class ChargingPile:
         self.connected_vehicle = None
         self.status = ChargingStatus.IDLE
         self.start_time = None
+        self.session = None
         self.current_charging_amount = 0.0
         
         # 从队列中移除已充电的车辆
@@ -236,19 +374,16 @@ class ChargingPile:
         if not self.connected_vehicle:
             return {"error": f"系统错误: 充电桩{self.pile_id}未连接车辆"}
         
-        # 使用调度器的时间函数，自动考虑时间加速和模拟时间
-        from ..component.Server.controller import scheduler
-        
         # 保证 start_time 不为 None
         if self.start_time is None:
-            self.start_time = scheduler.get_current_time()
+            self.start_time = self._get_current_time()
             
-        end_time = scheduler.get_current_time()  # 使用调度器的时间
+        end_time = self._get_current_time()  # 使用调度器的时间
         start_time = cast(float, self.start_time)  # 明确告诉类型检查器 start_time 是 float
         charging_duration = (end_time - start_time) / 60  # 转换为分钟
         
-        # 计算总电量和总费用（考虑分时电价）
-        this_session_energy, cost = self._calculate_charging_cost(start_time, end_time)
+        # 计算总电量和总费用（考虑分时电价），复用会话累计值
+        this_session_energy, cost = self._get_session_totals(start_time, end_time)
         
         # 获取已充电电量（如果有）
         already_charged_amount = self.connected_vehicle.get('already_charged_amount', 0.0)
@@ -270,7 +405,7 @@ class ChargingPile:
             print(f"车辆[{self.connected_vehicle['car_id']}]故障断开：本次充电{this_session_energy}度，已有充电量{already_charged_amount}度，总计{total_energy}度")
         
         # 生成充电详单
-        bill = create_charging_bill(
+        bill = self.bill_factory.create(
             pile_id=self.pile_id,
             vehicle_info=self.connected_vehicle,
             charging_amount=total_energy,
@@ -279,7 +414,7 @@ class ChargingPile:
             end_time=end_time,
             charging_cost=cost
         )
-        self.charging_bills.append(bill)
+        self._record_bill(bill)
         
         # 保存当前车辆信息用于返回
         vehicle = self.connected_vehicle
@@ -290,6 +425,7 @@ class ChargingPile:
         # 重置状态
         self.connected_vehicle = None
         self.start_time = None
+        self.session = None
         self.current_charging_amount = 0.0
         
         return {
@@ -349,59 +485,46 @@ class ChargingPile:
         :param timestamp: 时间戳
         :return: 当前电价(元/度)
         """
-        dt = datetime.fromtimestamp(timestamp)
-        current_time = dt.time()
-        
-        # 处理跨天的谷时时段(23:00~24:00)
-        if current_time >= dt_time(23, 0):
-            return 0.4
-        
-        # 处理跨天的谷时时段(00:00~07:00)
-        if current_time < dt_time(7, 0):
-            return 0.4
-        
-        # 检查其他时段
-        for start, end, rate in self.rate_periods:
-            if start <= current_time < end:
-                return rate
-        
-        # 默认返回谷时电价
-        return 0.4
+        return self.tariff.rate_at(timestamp)
+
+    def _get_session(self) -> Optional[SessionMeter]:
+        """
+        获取当前充电会话的累计器，开始时间或功率变化时重新创建
+        :return: 累计器，未在充电时返回None
+        """
+        if self.start_time is None:
+            self.session = None
+            return None
+        if self.session is None or self.session.start_time != self.start_time or self.session.power != self.power:
+            self.session = SessionMeter(self.tariff, self.power, self.start_time)
+        return self.session
+
+    def advance_session(self) -> None:
+        """把当前会话的累计器推进到当前时刻（由调度线程调用）"""
+        session = self._get_session()
+        if session is not None:
+            session.advance(self._get_current_time())
+
+    def _get_session_totals(self, start_time: float, end_time: float) -> tuple:
+        """
+        获取本次会话到end_time为止的电量和电费
+        :param start_time: 会话开始时间戳
+        :param end_time: 结束时间戳
+        :return: (电量, 电费)
+        """
+        session = self._get_session()
+        if session is None or session.start_time != start_time:
+            return self._calculate_charging_cost(start_time, end_time)
+        return session.peek(end_time)
 
-    
     def _calculate_charging_cost(self, start: float, end: float) -> tuple:
         """
-        计算充电费用（考虑分时电价）
+        计算充电费用（考虑分时电价，按电价分界点解析积分）
         :param start: 开始时间戳
         :param end: 结束时间戳
         :return: (总电量, 总费用)
         """
-        total_energy = 0.0
-        total_cost = 0.0
-        current = start
-        
-        # 将充电时间分成小段计算（每段最多1分钟）
-        while current < end:
-            # 确定当前时间段的结束点（最多1分钟）
-            segment_end = min(current + 60, end)  # 60秒=1分钟
-            
-            # 计算时间段长度（小时）
-            segment_duration = (segment_end - current) / 3600.0
-            
-            # 获取当前电价
-            current_rate = self._get_current_rate(current)
-            
-            # 计算当前时间段的电量（度）和费用（元）
-            segment_energy = self.power * segment_duration
-            segment_cost = segment_energy * current_rate
-            
-            total_energy += segment_energy
-            total_cost += segment_cost
-            
-            # 移动到下一个时间段
-            current = segment_end
-        
-        return total_energy, total_cost
+        return self.tariff.integrate(start, end, self.power)
     
     def set_fault(self) -> Dict:
         """设置充电桩为故障状态，并处理正在充电的车辆"""
@@ -430,8 +553,7 @@ class ChargingPile:
         bill_data = None
         if original_status == ChargingStatus.CHARGING and self.connected_vehicle:
             # 计算当前已充电的电量
-            from ..component.Server.controller import scheduler
-            current_time = scheduler.get_current_time()
+            current_time = self._get_current_time()
             if self.start_time is not None:
                 elapsed_time = (current_time - self.start_time) / 3600.0  # 转换为小时
                 charged_amount = self.power * elapsed_time
@@ -443,6 +565,7 @@ class ChargingPile:
                     self.connected_vehicle['already_charged_amount'] = charged_amount
                 
                 print(f"车辆[{self.connected_vehicle['car_id']}]在故障前已充电{charged_amount}度，总计已充电{self.connected_vehicle['already_charged_amount']}度")
+                self.charge_queue.refresh(self.connected_vehicle)
             
             result = self.fault_vehicle()
             if isinstance(result, dict) and 'bill' in result:
@@ -487,6 +610,57 @@ class ChargingPile:
         self.charge_queue.clear()
         return vehicles
 
+    def get_state(self) -> Dict[str, Any]:
+        """
+        可JSON编码的完整状态（用于状态快照和恢复），功率、队列长度等配置不包含在内
+        正在充电的车辆通常是队列中的第一辆，记录其下标以便恢复后仍是同一个对象
+        """
+        connected_index = None
+        for index, vehicle in enumerate(self.charge_queue):
+            if vehicle is self.connected_vehicle:
+                connected_index = index
+                break
+        return {
+            'status': self.status.name,
+            'charge_queue': [to_json(vehicle) for vehicle in self.charge_queue],
+            'connected_vehicle': to_json(self.connected_vehicle),
+            'connected_index': connected_index,
+            'start_time': self.start_time,
+            'current_charging_amount': self.current_charging_amount,
+            'total_energy_delivered': self.total_energy_delivered,
+            'total_earnings': self.total_earnings,
+            'charging_count': self.charging_count,
+            'total_charging_duration': self.total_charging_duration,
+            'bill_count': self.bill_count,
+            'charging_bills': list(self.charging_bills)
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        从get_state返回的状态恢复充电桩，充电会话的电费累计器按开始时间重新创建
+        :param state: 充电桩状态
+        """
+        self.status = ChargingStatus[state['status']]
+        self.charge_queue.clear()
+        for vehicle in state['charge_queue']:
+            self.charge_queue.append(VehicleRecord.coerce(vehicle))
+        if state['connected_index'] is not None:
+            self.connected_vehicle = self.charge_queue[state['connected_index']]
+        elif state['connected_vehicle'] is not None:
+            self.connected_vehicle = VehicleRecord.coerce(state['connected_vehicle'])
+        else:
+            self.connected_vehicle = None
+        self.start_time = state['start_time']
+        self.session = None
+        self.current_charging_amount = state['current_charging_amount']
+        self.total_energy_delivered = state['total_energy_delivered']
+        self.total_earnings = state['total_earnings']
+        self.charging_count = state['charging_count']
+        self.total_charging_duration = state['total_charging_duration']
+        self.bill_count = state['bill_count']
+        self.charging_bills.clear()
+        self.charging_bills.extend(state['charging_bills'])
+
     def get_status(self) -> Dict[str, Any]:
         """获取当前状态信息"""
         return {
@@ -499,7 +673,7 @@ class ChargingPile:
             "queue_length": len(self.charge_queue),
             "total_energy": round(self.total_energy_delivered, 2),
             "total_earnings": round(self.total_earnings, 2),
-            "charging_bills": self.charging_bills,
+            "bill_count": self.bill_count,
             "waiting_count": len(self.charge_queue)
         }
     
@@ -528,14 +702,41 @@ class ChargingPile:
         :param vehicle_info: 车辆信息
         :return: 总等待时间（小时）
         """
-        total_time = 0
-        # 计算队列中其他车辆的充电时间
-        for vehicle in self.charge_queue:
-            if vehicle != vehicle_info:
-                total_time += self.calculate_charging_time(vehicle['charging_amount'])
+        # 队列中其他车辆的剩余请求充电量直接取自队列维护的总量
+        other_amount = self.charge_queue.total_amount
+        if self.charge_queue.contains(vehicle_info):
+            other_amount -= ChargeQueue.remaining_amount(vehicle_info)
         # 加上自己的充电时间
-        total_time += self.calculate_charging_time(vehicle_info['charging_amount'])
-        return total_time
+        return self.calculate_charging_time(max(0.0, other_amount) + vehicle_info['charging_amount'])
+
+    def get_remaining_amount(self) -> float:
+        """
+        获取队列中所有车辆（含正在充电的车辆）尚未充入的电量
+        :return: 剩余电量（度）
+        """
+        remaining_amount = self.charge_queue.total_amount - self.get_current_charging_amount()
+        return max(0.0, remaining_amount)
+
+    def expected_finish_time(self) -> float:
+        """
+        获取充电桩队列中所有车辆预计充完的时刻
+        :return: 时间戳，队列为空时为当前时间
+        """
+        if self.power <= 0:
+            return self._get_current_time()
+        if self.status == ChargingStatus.CHARGING and self.connected_vehicle and self.start_time is not None:
+            return self.start_time + self.charge_queue.total_amount / self.power * 3600
+        return self._get_current_time() + self.charge_queue.total_amount / self.power * 3600
+
+    def update_charging_amount(self, charging_amount: float) -> None:
+        """
+        修改正在充电车辆的请求充电量并同步队列剩余电量
+        :param charging_amount: 新的请求充电量
+        """
+        if not self.connected_vehicle:
+            return
+        self.connected_vehicle['charging_amount'] = charging_amount
+        self.charge_queue.refresh(self.connected_vehicle)
 
     def get_available_slots(self) -> int:
         """
@@ -557,13 +758,14 @@ class ChargingPile:
             'available_slots': self.get_available_slots(),
             'queue_length': len(self.charge_queue),
             'queue_vehicles': list(self.charge_queue),
+            'queued_amount': self.charge_queue.total_amount,
             'connected_vehicle': self.connected_vehicle,
             'status': self.status.value
         }
 
     def get_charging_bills(self) -> List[Dict]:
-        """获取充电详单列表"""
-        return self.charging_bills
+        """获取最近的充电详单列表（完整历史通过/server/bills分页查询）"""
+        return list(self.charging_bills)
 
     def check_charging_status(self) -> Optional[Union[Dict[str, Any], ErrorResponse]]:
         """
@@ -573,10 +775,7 @@ class ChargingPile:
         if self.status != ChargingStatus.CHARGING or not self.connected_vehicle or self.start_time is None:
             return None
             
-        # 使用调度器的时间函数，自动考虑时间加速和模拟时间
-        from ..component.Server.controller import scheduler
-            
-        current_time = scheduler.get_current_time()  # 获取当前模拟时间
+        current_time = self._get_current_time()  # 获取当前模拟时间
         
         # 计算充电时长
         if isinstance(self.start_time, (int, float)):  # 确保start_time是数值类型
@@ -594,7 +793,8 @@ class ChargingPile:
         
         # 检查是否达到请求充电量
         requested_amount = self.connected_vehicle.get('charging_amount', 0)
-        if requested_amount > 0 and self.current_charging_amount >= requested_amount:
+        # 允许微小的浮点误差，保证在预计完成时刻检查时能够断开
+        if requested_amount > 0 and self.current_charging_amount >= requested_amount - 1e-6:
             print(f"车辆[{self.connected_vehicle['car_id']}]已达到请求充电量{requested_amount}度，自动断开")
             return self.disconnect_vehicle(is_auto_end=True)
             
@@ -613,8 +813,7 @@ class ChargingPile:
             return {"error": f"操作失败: 充电桩{self.pile_id}未连接车辆"}
         
         # 计算当前已充电量，使用调度器的时间函数
-        from ..component.Server.controller import scheduler
-        current_time = scheduler.get_current_time()  # 获取当前模拟时间
+        current_time = self._get_current_time()  # 获取当前模拟时间
         
         # 保证 start_time 不为 None
         if self.start_time is None:
@@ -637,7 +836,7 @@ class ChargingPile:
             pass
             
         # 更新充电请求
-        self.connected_vehicle['charging_amount'] = charging_amount
+        self.update_charging_amount(charging_amount)
         
         return {
             "status": "success",
@@ -656,8 +855,7 @@ class ChargingPile:
             return 0.0
             
         # 计算当前已充电量，使用调度器的时间函数
-        from ..component.Server.controller import scheduler
-        current_time = scheduler.get_current_time()  # 获取当前模拟时间
+        current_time = self._get_current_time()  # 获取当前模拟时间
         
         if isinstance(self.start_time, (int, float)):  # 确保start_time是数值类型
             elapsed_time = (current_time - self.start_time) / 3600.0  # 转换为小时
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import TypedDict, Optional
 import uuid
+from .Clock import Clock, default_clock
 
 class ChargingBill(TypedDict):
     """充电详单数据结构"""
@@ -24,7 +25,8 @@ def create_charging_bill(
     charging_duration: float,
     start_time: float,
     end_time: float,
-    charging_cost: float
+    charging_cost: float,
+    clock: Optional[Clock] = None
 ) -> ChargingBill:
     """
     创建充电详单
@@ -35,18 +37,20 @@ def create_charging_bill(
     :param start_time: 开始时间戳
     :param end_time: 结束时间戳
     :param charging_cost: 充电费用
+    :param clock: 时钟，为None时使用默认时钟
     :return: 充电详单
     """
     # 计算服务费用（0.8元/度）
     service_cost = round(charging_amount * 0.8, 2)
     total_cost = round(charging_cost + service_cost, 2)
 
-    # 获取调度器以使用正确的时间（实时或模拟）
-    from ..component.Server.controller import scheduler
+    # 使用注入的时钟获取正确的时间（实时、模拟或仿真）
+    if clock is None:
+        clock = default_clock
     
     return {
         'bill_id': str(uuid.uuid4()),
-        'create_time': scheduler.get_current_time_str(),  # 使用调度器的时间
+        'create_time': clock.get_current_time_str(),  # 使用调度器的时间
         'pile_id': pile_id,
         'vehicle_id': vehicle_info['car_id'],
         'username': vehicle_info['username'],
@@ -57,4 +61,36 @@ def create_charging_bill(
         'charging_cost': round(charging_cost, 2),
         'service_cost': service_cost,
         'total_cost': total_cost
-    } 
\ No newline at end of file
+    } 
+
+class BillFactory:
+    """充电详单工厂，构造时绑定时钟"""
+
+    def __init__(self, clock: Clock):
+        """
+        初始化详单工厂
+        :param clock: 生成详单时使用的时钟
+        """
+        self.clock = clock
+
+    def create(
+        self,
+        pile_id: str,
+        vehicle_info: dict,
+        charging_amount: float,
+        charging_duration: float,
+        start_time: float,
+        end_time: float,
+        charging_cost: float
+    ) -> ChargingBill:
+        """创建充电详单，参数同create_charging_bill"""
+        return create_charging_bill(
+            pile_id=pile_id,
+            vehicle_info=vehicle_info,
+            charging_amount=charging_amount,
+            charging_duration=charging_duration,
+            start_time=start_time,
+            end_time=end_time,
+            charging_cost=charging_cost,
+            clock=self.clock
+        )
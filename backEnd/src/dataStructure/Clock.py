@@ -0,0 +1,143 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+class Clock:
+    """
+    系统时钟
+    支持真实时间、时间加速和模拟时间，在构造时注入调度器、等候区、充电桩和详单工厂，
+    使数据结构不再依赖Flask模块中的全局调度器，同一进程中可以运行多个充电站
+    """
+
+    def __init__(self):
+        self.time_speedup = 1.0  # 时间加速倍数，默认为1，即正常速度
+        self.is_using_simulated_time = False  # 是否使用模拟时间
+        self.simulation_start_real_time = time.time()  # 模拟开始的真实时间戳
+        self.simulation_start_time = time.time()  # 模拟的起始时间戳
+        self._time_str_cache: Tuple[int, str] = (-1, '')  # (整秒时间戳, 格式化字符串)
+        self.pinned_time: Optional[float] = None  # 固定的时间戳（重放状态日志时使用）
+
+    def now(self) -> float:
+        """
+        获取当前时间戳，如果启用了模拟时间，则返回模拟时间戳
+        :return: 当前时间戳
+        """
+        if self.pinned_time is not None:
+            return self.pinned_time
+        if not self.is_using_simulated_time:
+            return time.time()
+        return self.simulation_start_time + (time.time() - self.simulation_start_real_time) * self.time_speedup
+
+    def get_current_time(self) -> float:
+        """获取当前时间戳（与now相同，兼容调度器原有接口）"""
+        return self.now()
+
+    def get_current_time_str(self) -> str:
+        """
+        获取当前时间的字符串表示，格式为 "YYYY-MM-DD HH:MM:SS"
+        同一秒内的多次调用复用缓存的字符串
+        :return: 当前时间字符串
+        """
+        second = int(self.now())
+        cached_second, cached_str = self._time_str_cache
+        if cached_second != second:
+            cached_str = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+            self._time_str_cache = (second, cached_str)
+        return cached_str
+
+    def set_time_speedup(self, speedup: float) -> None:
+        """
+        设置时间加速倍数
+        :param speedup: 时间加速倍数，例如2.0表示时间流逝速度为正常的2倍
+        """
+        if speedup <= 0:
+            raise ValueError("时间加速倍数必须大于0")
+
+        # 如果使用模拟时间，先计算当前的模拟时间点
+        if self.is_using_simulated_time:
+            current_simulated_time = self.now()
+
+            # 重置模拟时间的基准点，以保持当前模拟时间不变
+            self.simulation_start_real_time = time.time()
+            self.simulation_start_time = current_simulated_time
+
+        self.time_speedup = speedup
+
+    def set_simulation_time(self, timestamp: float) -> None:
+        """
+        设置模拟时间的起始点
+        :param timestamp: 模拟时间的起始时间戳
+        """
+        self.simulation_start_real_time = time.time()
+        self.simulation_start_time = timestamp
+        self.is_using_simulated_time = True
+
+    def reset_to_real_time(self) -> None:
+        """恢复使用真实系统时间，关闭模拟时间模式"""
+        self.is_using_simulated_time = False
+        self.simulation_start_real_time = time.time()
+        self.simulation_start_time = time.time()
+
+    def pin(self, timestamp: Optional[float]) -> None:
+        """
+        把时间固定在指定时刻，重放状态日志时所有时间计算使用记录的时刻
+        :param timestamp: 时间戳，为None时恢复正常计时
+        """
+        self.pinned_time = timestamp
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取时钟设置（用于状态快照），time为当前时刻"""
+        return {
+            'time_speedup': self.time_speedup,
+            'is_using_simulated_time': self.is_using_simulated_time,
+            'time': self.now()
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        恢复时钟设置，模拟时间从记录的时刻继续（停机期间模拟时间不流逝）
+        :param state: get_state返回的设置
+        """
+        if state['is_using_simulated_time']:
+            self.set_simulation_time(state['time'])
+        else:
+            self.reset_to_real_time()
+        self.time_speedup = state['time_speedup']
+
+
+class VirtualClock(Clock):
+    """
+    虚拟时钟（离散事件仿真使用）
+    时间不随真实时间流逝，只在仿真器推进到下一个事件时跳变
+    """
+
+    def __init__(self, start_time: float):
+        """
+        初始化虚拟时钟
+        :param start_time: 仿真起始时间戳
+        """
+        super().__init__()
+        self.current_time = start_time
+        self.is_using_simulated_time = True
+
+    def now(self) -> float:
+        """获取当前虚拟时间戳"""
+        return self.current_time if self.pinned_time is None else self.pinned_time
+
+    def get_current_time(self) -> float:
+        """获取当前虚拟时间戳"""
+        return self.now()
+
+    def advance_to(self, timestamp: float) -> None:
+        """
+        将虚拟时间推进到指定时刻
+        :param timestamp: 目标时间戳，不能早于当前时间
+        """
+        if timestamp < self.current_time:
+            raise ValueError("虚拟时钟不能回退")
+        self.current_time = timestamp
+
+
+# 未显式注入时钟时使用的默认时钟
+default_clock = Clock()
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class PoolTimeoutError(Exception):
+    """在超时时间内没有可用的连接"""
+
+
+class PooledConnection:
+    """
+    连接池中借出的连接
+    代理原始连接的所有方法，close()不会真正关闭连接，而是归还到连接池，
+    因此原来"获取连接 -> 使用 -> close()"的代码不需要修改
+    """
+
+    def __init__(self, pool: 'ConnectionPool', raw: Any, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name: str) -> Any:
+        if self._raw is None:
+            raise AttributeError(f"连接已归还，不能再访问{name}")
+        return getattr(self._raw, name)
+
+    def close(self) -> None:
+        """归还连接到连接池（重复调用无效）"""
+        if not self._released:
+            self._released = True
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._created_at)
+
+    def discard(self) -> None:
+        """连接已损坏，关闭而不归还"""
+        if not self._released:
+            self._released = True
+            raw, self._raw = self._raw, None
+            self._pool._discard(raw)
+
+    def __enter__(self) -> 'PooledConnection':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """
+    线程安全的有界数据库连接池
+    - 最多同时打开max_size个连接，借不到连接时等待，超时抛出PoolTimeoutError
+    - 空闲超过health_check_interval秒的连接在借出前做健康检查，失败则重新建立
+    - 存在时间超过recycle_seconds秒的连接在归还时关闭，避免被数据库服务端断开
+    - 归还时回滚未提交的事务，保证下一次使用看到最新数据
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 10, recycle_seconds: float = 3600,
+                 health_check_interval: float = 30, acquire_timeout: float = 10,
+                 health_check: Optional[Callable[[Any], None]] = None,
+                 reset: Optional[Callable[[Any], None]] = None):
+        """
+        初始化连接池
+        :param factory: 创建新连接的函数
+        :param max_size: 最大连接数
+        :param recycle_seconds: 连接最长存活时间（秒）
+        :param health_check_interval: 空闲多久后借出前需要健康检查（秒）
+        :param acquire_timeout: 默认的借连接等待超时（秒）
+        :param health_check: 健康检查函数，连接不可用时抛出异常，默认调用ping
+        :param reset: 归还时重置连接状态的函数，默认回滚事务
+        """
+        if max_size <= 0:
+            raise ValueError("连接池大小必须大于0")
+        self.factory = factory
+        self.max_size = max_size
+        self.recycle_seconds = recycle_seconds
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check if health_check is not None else (lambda conn: conn.ping(reconnect=False))
+        self.reset = reset if reset is not None else (lambda conn: conn.rollback())
+
+        self._condition = threading.Condition()
+        self._idle: Deque[Tuple[Any, float, float]] = deque()  # (连接, 创建时间, 归还时间)
+        self._size = 0  # 已打开的连接数（空闲 + 借出）
+        self._waiting = 0  # 正在等待连接的线程数
+
+        # 统计信息
+        self._stats = {
+            'total_acquired': 0,
+            'total_waits': 0,
+            'total_wait_seconds': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'discarded': 0,
+            'peak_in_use': 0
+        }
+
+    def connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        借出一个连接，用完后调用close()归还（也可以用with语句）
+        :param timeout: 等待超时（秒），为None时使用acquire_timeout
+        :return: 连接
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_start = time.monotonic()
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    raw, created_at, released_at = self._idle.pop()  # 后进先出，优先复用最近使用的连接
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(f"等待数据库连接超时（连接池大小{self.max_size}）")
+                waited = True
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._stats['total_acquired'] += 1
+            if waited:
+                self._stats['total_waits'] += 1
+                self._stats['total_wait_seconds'] += time.monotonic() - wait_start
+            in_use = self._size - len(self._idle)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], in_use)
+
+        # 建立连接和健康检查在锁外进行
+        try:
+            if raw is not None and time.time() - released_at > self.health_check_interval:
+                try:
+                    self.health_check(raw)
+                except Exception:
+                    self._count('health_check_failures')
+                    self._close_quietly(raw)
+                    raw = None
+            if raw is None:
+                raw = self.factory()
+                created_at = time.time()
+                self._count('created')
+        except Exception:
+            self._release_slot()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _release(self, raw: Any, created_at: float) -> None:
+        """归还连接"""
+        try:
+            self.reset(raw)
+        except Exception:
+            self._discard(raw)
+            return
+
+        if time.time() - created_at > self.recycle_seconds:
+            self._count('recycled')
+            self._close_quietly(raw)
+            self._release_slot()
+            return
+
+        with self._condition:
+            self._idle.append((raw, created_at, time.time()))
+            self._condition.notify()
+
+    def _discard(self, raw: Any) -> None:
+        """关闭损坏的连接并释放名额"""
+        self._count('discarded')
+        self._close_quietly(raw)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _count(self, key: str) -> None:
+        with self._condition:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _close_quietly(raw: Any) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计信息
+        :return: 包含连接数、等待情况和饱和度的字典
+        """
+        with self._condition:
+            in_use = self._size - len(self._idle)
+            stats = dict(self._stats)
+            stats.update({
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': in_use,
+                'waiting': self._waiting,
+                'saturation': round(in_use / self.max_size, 4),
+                'average_wait_ms': round(stats['total_wait_seconds'] * 1000 / stats['total_waits'], 2)
+                if stats['total_waits'] else 0.0
+            })
+            stats['total_wait_seconds'] = round(stats['total_wait_seconds'], 4)
+        return stats
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接（借出的连接归还时仍会被放回）"""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for raw, _, _ in idle:
+            self._close_quietly(raw)
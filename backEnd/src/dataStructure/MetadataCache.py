@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+# 标记数据库中不存在的键，避免反复查询
+_MISSING = object()
+
+
+class BulkTTLCache:
+    """
+    带过期时间的批量加载缓存
+    get_many()先从缓存取，未命中的键一次性交给loader批量加载（例如一条 WHERE id IN (...) 查询），
+    所以无论请求多少个键，每次最多一次数据库往返；数据库中不存在的键也会缓存，直到过期
+    """
+
+    def __init__(self, loader: Callable[[List[Hashable]], Dict[Hashable, Any]], ttl: float = 60,
+                 max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化缓存
+        :param loader: 批量加载函数，参数为未命中的键列表，返回 键->值 字典（不存在的键不返回）
+        :param ttl: 缓存有效期（秒）
+        :param max_entries: 最大缓存条数，超出时淘汰最早写入的条目
+        :param clock: 时间函数，便于测试
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # 键 -> (值, 过期时间)
+        # 失效计数：加载期间键被失效时丢弃加载结果，避免旧值在失效之后被写回；没有进行中的加载时清空
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0  # clear()的次数
+        self._loading = 0  # 进行中的加载数
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'invalidations': 0}
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        批量获取
+        :param keys: 键列表
+        :return: 键->值 字典，不存在的键不包含在结果中
+        """
+        result = {}
+        misses = []
+        now = self.clock()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._stats['hits'] += 1
+                    if entry[0] is not _MISSING:
+                        result[key] = entry[0]
+                else:
+                    self._stats['misses'] += 1
+                    misses.append(key)
+            if not misses:
+                return result
+            epoch = self._epoch
+            generations = [self._generations.get(key, 0) for key in misses]
+            self._loading += 1
+
+        # 加载在锁外进行，加载失败时异常直接抛给调用方，不缓存
+        try:
+            loaded = self.loader(misses)
+        except BaseException:
+            with self._lock:
+                self._finish_load()
+            raise
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._stats['loads'] += 1
+            for key, generation in zip(misses, generations):
+                value = loaded.get(key, _MISSING)
+                if value is not _MISSING:
+                    result[key] = value
+                if epoch != self._epoch or generation != self._generations.get(key, 0):
+                    # 加载期间键已失效，加载结果可能早于数据变化，不写入缓存
+                    continue
+                self._entries.pop(key, None)
+                self._entries[key] = (value, expires_at)
+            self._evict()
+            self._finish_load()
+        return result
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        获取单个键
+        :param key: 键
+        :param default: 不存在时的返回值
+        :return: 值
+        """
+        return self.get_many([key]).get(key, default)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        使指定的键失效，下次访问时重新加载
+        :param keys: 键
+        """
+        with self._lock:
+            for key in keys:
+                if self._loading:
+                    self._generations[key] = self._generations.get(key, 0) + 1
+                if self._entries.pop(key, None) is not None:
+                    self._stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def _finish_load(self) -> None:
+        """结束一次加载，没有进行中的加载时清空失效计数（需持有锁）"""
+        self._loading -= 1
+        if not self._loading:
+            self._generations.clear()
+
+    def _evict(self) -> None:
+        """超出容量时先淘汰过期条目，再淘汰最早写入的条目（需持有锁）"""
+        if len(self._entries) <= self.max_entries:
+            return
+        now = self.clock()
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+        :return: 命中、未命中、加载次数和当前条数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
@@ -0,0 +1,202 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# 记录中未设置的字段
+_MISSING = object()
+
+
+class Record:
+    """
+    使用__slots__保存字段的紧凑记录，兼容字典的读写方式（下标、get、in、keys/items、dict(record)）
+    记录代表一个具体对象（一辆车、一条排队记录），相等比较按对象身份，不再逐项比较字典内容；
+    to_json返回的字典视图缓存到记录下一次修改，视图由多个快照共享，只读
+    """
+    __slots__ = ('_json',)
+    _fields: Tuple[str, ...] = ()
+
+    def _extra(self) -> Optional[Dict[str, Any]]:
+        """固定字段以外的附加字段，没有时为None"""
+        return None
+
+    def _set_extra(self, key: str, value: Any) -> None:
+        raise KeyError(key)
+
+    def _del_extra(self, key: str) -> None:
+        raise KeyError(key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        extra = self._extra()
+        if extra is None:
+            raise KeyError(key)
+        return extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            self._set_extra(key, value)
+        self._json = None
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._fields:
+            if getattr(self, key) is _MISSING:
+                raise KeyError(key)
+            setattr(self, key, _MISSING)
+        else:
+            self._del_extra(key)
+        self._json = None
+
+    def __contains__(self, key: Any) -> bool:
+        if key in self._fields:
+            return getattr(self, key) is not _MISSING
+        extra = self._extra()
+        return extra is not None and key in extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def keys(self) -> List[str]:
+        keys = [name for name in self._fields if getattr(self, name) is not _MISSING]
+        extra = self._extra()
+        if extra:
+            keys.extend(extra)
+        return keys
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self) -> Dict[str, Any]:
+        """复制为普通字典"""
+        return dict(self.items())
+
+    def to_json(self) -> Dict[str, Any]:
+        """可直接JSON编码的字典视图（缓存，只读）"""
+        if self._json is None:
+            self._json = self.copy()
+        return self._json
+
+
+class VehicleRecord(Record):
+    """
+    车辆记录
+    固定字段car_id、username、charging_amount和故障后保留的already_charged_amount，
+    其他字段（例如name、plate_number）保存在附加字典中
+    """
+    __slots__ = ('car_id', 'username', 'charging_amount', 'already_charged_amount', '_more')
+    _fields = ('car_id', 'username', 'charging_amount', 'already_charged_amount')
+
+    def __init__(self, car_id: str, username: Any = _MISSING, charging_amount: Any = _MISSING,
+                 already_charged_amount: Any = _MISSING, **more: Any):
+        """
+        :param car_id: 车辆ID
+        :param username: 车主用户名
+        :param charging_amount: 请求充电量（度）
+        :param already_charged_amount: 故障前已充电量（度），没有时不设置
+        :param more: 其他车辆信息
+        """
+        self.car_id = car_id
+        self.username = username
+        self.charging_amount = charging_amount
+        self.already_charged_amount = already_charged_amount
+        self._more = more or None
+        self._json = None
+
+    @classmethod
+    def coerce(cls, vehicle: Mapping[str, Any]) -> 'VehicleRecord':
+        """
+        把车辆信息字典转换为车辆记录，已经是记录时原样返回
+        :param vehicle: 车辆信息（需包含car_id）
+        :return: 车辆记录
+        """
+        if isinstance(vehicle, cls):
+            return vehicle
+        return cls(**vehicle)
+
+    def _extra(self) -> Optional[Dict[str, Any]]:
+        return self._more
+
+    def _set_extra(self, key: str, value: Any) -> None:
+        if self._more is None:
+            self._more = {}
+        self._more[key] = value
+
+    def _del_extra(self, key: str) -> None:
+        if self._more is None:
+            raise KeyError(key)
+        del self._more[key]
+
+
+class QueueEntry(Record):
+    """等候区排队记录（排队号码、车辆记录、加入时间）"""
+    __slots__ = ('queue_number', 'vehicle_info', 'join_time')
+    _fields = ('queue_number', 'vehicle_info', 'join_time')
+
+    def __init__(self, queue_number: str, vehicle_info: Mapping[str, Any], join_time: float):
+        """
+        :param queue_number: 排队号码
+        :param vehicle_info: 车辆信息，字典会转换为车辆记录
+        :param join_time: 加入等候区的时间戳
+        """
+        self.queue_number = queue_number
+        self.vehicle_info = VehicleRecord.coerce(vehicle_info)
+        self.join_time = join_time
+        self._json = None
+
+    def to_json(self) -> Dict[str, Any]:
+        """字典视图，车辆信息为车辆记录的视图，车辆记录修改后重新生成"""
+        vehicle_view = to_json(self.vehicle_info)
+        if self._json is None or self._json['vehicle_info'] is not vehicle_view:
+            self._json = {'queue_number': self.queue_number, 'vehicle_info': vehicle_view,
+                          'join_time': self.join_time}
+        return self._json
+
+
+def to_json(value: Any) -> Any:
+    """
+    记录的字典视图；普通字典（例如直接加入队列的车辆信息）复制一份
+    :param value: 记录、字典或None
+    :return: 可直接JSON编码的字典，value为None时返回None
+    """
+    if value is None:
+        return None
+    if isinstance(value, Record):
+        return value.to_json()
+    return dict(value)
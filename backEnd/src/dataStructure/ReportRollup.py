@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+# 报表统计粒度 -> MySQL DATE_FORMAT格式（与原报表查询的时间段格式一致）
+GRANULARITY_FORMATS = {
+    'hour': "%Y-%m-%d %H",
+    'day': "%Y-%m-%d",
+    'week': "%Y-%u",  # 年-周数（周一为一周的第一天）
+    'month': "%Y-%m"
+}
+
+# 汇总的度量列 -> 详单中对应的字段
+MEASURES = [
+    ('total_duration', 'charging_duration'),
+    ('total_amount', 'charging_amount'),
+    ('total_charging_cost', 'charging_cost'),
+    ('total_service_cost', 'service_cost'),
+    ('total_cost', 'total_cost')
+]
+
+ROLLUP_TABLE = 'charging_report_rollups'
+
+CREATE_ROLLUP_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS `{ROLLUP_TABLE}` (
+      `granularity` varchar(5) NOT NULL COMMENT '统计粒度：hour/day/week/month',
+      `time_period` varchar(20) NOT NULL COMMENT '时间段',
+      `pile_id` varchar(50) NOT NULL COMMENT '充电桩编号',
+      `charging_count` int(11) NOT NULL DEFAULT 0,
+      `total_duration` decimal(16,2) NOT NULL DEFAULT 0,
+      `total_amount` decimal(16,2) NOT NULL DEFAULT 0,
+      `total_charging_cost` decimal(16,2) NOT NULL DEFAULT 0,
+      `total_service_cost` decimal(16,2) NOT NULL DEFAULT 0,
+      `total_cost` decimal(16,2) NOT NULL DEFAULT 0,
+      PRIMARY KEY (`granularity`, `time_period`, `pile_id`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_unicode_ci
+"""
+
+# 新详单累加到汇总行，不存在时插入
+ROLLUP_UPSERT_SQL = f"""
+    INSERT INTO {ROLLUP_TABLE} (
+        granularity, time_period, pile_id, charging_count,
+        {', '.join(column for column, _ in MEASURES)}
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s
+    ) ON DUPLICATE KEY UPDATE
+        charging_count = charging_count + VALUES(charging_count),
+        {', '.join(f'{column} = {column} + VALUES({column})' for column, _ in MEASURES)}
+"""
+
+
+def mysql_week(dt: datetime) -> int:
+    """
+    与MySQL DATE_FORMAT的%u一致的周数（0~53）：周一为一周的第一天，
+    包含该年至少4天的第一周为第1周，之前的日期为第0周
+    """
+    first_weekday = datetime(dt.year, 1, 1).weekday()  # 1月1日是周几，周一为0
+    week = (dt.timetuple().tm_yday - 1 + first_weekday) // 7
+    return week + 1 if first_weekday <= 3 else week
+
+
+def format_period(dt: datetime, granularity: str) -> str:
+    """
+    计算时间所在的统计时间段
+    :param dt: 时间
+    :param granularity: 统计粒度
+    :return: 与 DATE_FORMAT(dt, GRANULARITY_FORMATS[granularity]) 相同的字符串
+    """
+    if granularity == 'week':
+        return f"{dt.year:04d}-{mysql_week(dt):02d}"
+    return dt.strftime(GRANULARITY_FORMATS[granularity])
+
+
+def _parse_time(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
+
+
+def rollup_rows(bills: Iterable[Dict[str, Any]]) -> List[Tuple]:
+    """
+    把一批详单按 (粒度, 时间段, 充电桩) 汇总为ROLLUP_UPSERT_SQL的参数
+    :param bills: 详单字典列表（按开始充电时间归入时间段）
+    :return: 参数元组列表
+    """
+    totals: Dict[Tuple[str, str, str], List[float]] = {}
+    for bill in bills:
+        start_time = _parse_time(bill['start_time'])
+        for granularity in GRANULARITY_FORMATS:
+            key = (granularity, format_period(start_time, granularity), bill['pile_id'])
+            row = totals.setdefault(key, [0] + [0.0] * len(MEASURES))
+            row[0] += 1
+            for index, (_, field) in enumerate(MEASURES, start=1):
+                row[index] += float(bill[field])
+    return [key + (row[0],) + tuple(round(value, 2) for value in row[1:]) for key, row in totals.items()]
+
+
+def rebuild_statements() -> List[Tuple[str, Tuple]]:
+    """
+    从charging_bills全量重建汇总表的SQL语句（用于回填已有数据或修复汇总）
+    :return: (SQL, 参数) 列表
+    """
+    statements = [(f"DELETE FROM {ROLLUP_TABLE}", ())]
+    for granularity, date_format in GRANULARITY_FORMATS.items():
+        sql = f"""
+            INSERT INTO {ROLLUP_TABLE} (
+                granularity, time_period, pile_id, charging_count,
+                {', '.join(column for column, _ in MEASURES)}
+            )
+            SELECT %s, DATE_FORMAT(start_time, %s) AS time_period, pile_id, COUNT(*),
+                {', '.join(f'SUM({field})' for _, field in MEASURES)}
+            FROM charging_bills
+            GROUP BY time_period, pile_id
+        """
+        statements.append((sql, (granularity, date_format)))
+    return statements
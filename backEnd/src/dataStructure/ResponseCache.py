@@ -0,0 +1,128 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+try:
+    import orjson  # 可选依赖，安装后编码速度明显快于标准库
+except ImportError:
+    orjson = None
+
+
+def _default(o: Any) -> Any:
+    """车辆和排队记录等对象按其字典视图编码，快照中的只读映射按字典编码"""
+    to_json = getattr(o, 'to_json', None)
+    if to_json is not None:
+        return to_json()
+    if isinstance(o, Mapping):
+        return dict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """标准库编码：紧凑格式、键排序（与jsonify一致），中文不转义"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True, default=_default).encode('utf-8')
+
+
+def dumps_orjson(obj: Any) -> bytes:
+    """orjson编码，输出格式与dumps_json相同"""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS)
+
+
+# 当前使用的编码函数
+dumps = dumps_orjson if orjson is not None else dumps_json
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+class _Flight:
+    """某个键正在进行的一次构建，同一版本的其他请求等待其完成"""
+    __slots__ = ('etag', 'done', 'body')
+
+    def __init__(self, etag: str):
+        self.etag = etag
+        self.done = threading.Event()
+        self.body: Optional[bytes] = None  # 构建失败时为None
+
+
+class ResponseCache:
+    """
+    按状态版本缓存已编码的响应体
+    每个键（接口+参数）只保留最新版本（ETag）编码后的字节串，同一版本的所有请求共享，
+    编码只在版本变化后的第一个请求中进行一次，读接口的CPU开销不再随客户端数量增加
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        :param max_entries: 最多缓存的键数量，超出时淘汰最久未使用的键
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()  # 只保护查找和写入，构建和编码在锁外进行
+        self._entries: 'OrderedDict[Hashable, Tuple[str, bytes]]' = OrderedDict()  # 键 -> (ETag, 响应体)
+        self._flights: Dict[Hashable, _Flight] = {}  # 键 -> 正在进行的构建
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'evictions': 0}
+
+    def get(self, key: Hashable, etag: str, build: Callable[[], Any]) -> bytes:
+        """
+        获取指定版本的响应体，未缓存时调用build构建数据并编码
+        同一键同一版本的多个请求未命中时只有一个请求编码，其他请求等待后直接使用结果；
+        不同键的构建互不阻塞，也不阻塞其他键的命中
+        :param key: 缓存键
+        :param etag: 当前版本（ETag）
+        :param build: 构建响应数据的函数
+        :return: 编码后的JSON字节串
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == etag:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                flight = self._flights.get(key)
+                if flight is None or flight.etag != etag:
+                    flight = self._flights[key] = _Flight(etag)
+                    self._stats['misses'] += 1
+                    break
+                self._stats['waits'] += 1
+            flight.done.wait()
+            if flight.body is not None:
+                return flight.body
+            # 构建失败，重新尝试（由某一个等待的请求重新构建）
+
+        try:
+            body = dumps(build())
+        except BaseException:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+            raise
+
+        flight.body = body
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+                self._entries[key] = (etag, body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        flight.done.set()
+        return body
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中情况"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['building'] = len(self._flights)
+        stats['max_entries'] = self.max_entries
+        stats['backend'] = JSON_BACKEND
+        requests = stats['hits'] + stats['misses'] + stats['waits']
+        stats['hit_rate'] = round((stats['hits'] + stats['waits']) / requests, 4) if requests else 0.0
+        return stats
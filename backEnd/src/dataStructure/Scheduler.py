@@ -1,30 +1,69 @@
+import heapq
 import threading
 import time
-from typing import Dict, List, Tuple, Any, Optional, Callable
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Dict, List, Tuple, Any, Optional, Callable, Deque, Iterator
 from datetime import datetime
+from .Clock import Clock, default_clock
 from .WaitingQueue import Queue
-from .ChargerPile import ChargingPile
+from .ChargerPile import ChargingPile, ChargingStatus
+from .Snapshot import StationSnapshot
+from .StateJournal import StateJournal
 
 class Scheduler:
-    def __init__(self, waiting_queue: Queue, charging_piles: Dict[str, ChargingPile], save_bill_func: Optional[Callable] = None):
+    def __init__(self, waiting_queue: Queue, charging_piles: Dict[str, ChargingPile], save_bill_func: Optional[Callable] = None,
+                 event_driven: bool = True, clock: Optional[Clock] = None):
         """
         初始化调度器
         :param waiting_queue: 等待队列实例
         :param charging_piles: 充电桩字典
         :param save_bill_func: 保存充电详单的函数
+        :param event_driven: 是否使用事件驱动模式（False时退回按check_interval轮询）
+        :param clock: 时钟（如仿真使用的VirtualClock），为None时使用默认时钟
         """
+        self.clock = clock if clock is not None else default_clock
         self.waiting_queue = waiting_queue
         self.charging_piles = charging_piles
         self.save_bill_func = save_bill_func
         self.running = False
         self.scheduler_thread: Optional[threading.Thread] = None
-        self.check_interval = 5  # 检查间隔（秒）
-        self.time_speedup = 1.0  # 时间加速倍数，默认为1，即正常速度
+        self.check_interval = 5  # 检查间隔（秒），仅轮询模式使用
         
-        # 模拟时间相关变量
-        self.is_using_simulated_time = False  # 是否使用模拟时间
-        self.simulation_start_real_time = time.time()  # 模拟开始的真实时间戳
-        self.simulation_start_time = time.time()  # 模拟的起始时间戳
+        # 事件驱动相关变量
+        self.event_driven = event_driven
+        self._condition = threading.Condition()  # 状态变化时唤醒调度线程
+        self._state_changed = False  # 是否有未处理的状态变化
+        self._deadline_heap: List[Tuple[float, str]] = []  # 预计充电完成时刻的最小堆 (完成时刻, 充电桩ID)
+        self._deadlines: Dict[str, float] = {}  # 每个充电桩当前有效的预计完成时刻
+        
+        # 单写者命令队列：所有对等候区和充电桩的修改都由调度线程串行执行
+        self.command_timeout = 10  # 等待命令执行结果的超时时间（秒）
+        self._commands: Deque[Tuple[str, Dict[str, Any], Future]] = deque()
+        self._command_handlers: Dict[str, Callable[..., Any]] = {
+            'join_queue': self._cmd_join_queue,
+            'leave_queue': self._cmd_leave_queue,
+            'change_mode': self._cmd_change_mode,
+            'modify_waiting_request': self._cmd_modify_waiting_request,
+            'modify_charging_request': self._cmd_modify_charging_request,
+            'disconnect': self._cmd_disconnect,
+            'toggle_pile': self._cmd_toggle_pile,
+            'pile_fault': self.handle_pile_fault,
+            'pile_repair': self.handle_pile_repair,
+            'set_time_speedup': self._cmd_set_time_speedup,
+            'set_simulation_time': self._cmd_set_simulation_time,
+            'reset_to_real_time': self._cmd_reset_to_real_time,
+        }
+
+        # 状态快照：每次状态变化后由调度线程整体替换，查询接口无锁读取
+        self._snapshot_version = 0
+        self.snapshot = StationSnapshot.capture(0, self.get_current_time(), waiting_queue, charging_piles)
+        self._snapshot_listeners: List[Callable[[StationSnapshot], None]] = []
+
+        # 状态日志：命令和调度步骤的预写日志，重启后据此恢复（见attach_journal）
+        self.journal: Optional[StateJournal] = None
+        self._replaying = False  # 是否正在重放日志
 
     def start(self) -> None:
         """启动调度器"""
@@ -32,6 +71,8 @@ class Scheduler:
             return
         
         self.running = True
+        # 启动后先执行一次完整的调度检查
+        self._state_changed = True
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop)
         self.scheduler_thread.daemon = True
         self.scheduler_thread.start()
@@ -39,39 +80,266 @@ class Scheduler:
     def stop(self) -> None:
         """停止调度器"""
         self.running = False
+        self.notify()
         if self.scheduler_thread:
             self.scheduler_thread.join()
-            
-    def set_time_speedup(self, speedup: float) -> None:
+        # 调度线程已退出，剩余命令直接执行
+        if self._drain_commands():
+            self._publish_snapshot()
+        # 正常停止时写入快照，下次启动不需要重放日志
+        if self.journal is not None:
+            try:
+                self.journal.write_snapshot(self.get_state())
+            except Exception as e:
+                print(f"写入状态快照失败: {e}")
+            self.journal.close()
+
+    def notify(self) -> None:
         """
-        设置时间加速倍数
-        :param speedup: 时间加速倍数，例如2.0表示时间流逝速度为正常的2倍
+        通知调度器等候区或充电桩状态已变化（加入/取消排队、故障/修复、修改请求等），
+        事件驱动模式下会立即唤醒调度线程
         """
-        if speedup <= 0:
-            raise ValueError("时间加速倍数必须大于0")
-            
-        # 如果使用模拟时间，先计算当前的模拟时间点
-        if self.is_using_simulated_time:
-            current_simulated_time = self.get_current_time()
+        with self._condition:
+            self._state_changed = True
+            self._condition.notify()
+
+    def execute(self, command: str, **params: Any) -> Any:
+        """
+        提交修改等候区或充电桩状态的命令并等待执行结果
+        调度线程运行时命令进入队列，由调度线程串行执行（单写者）；未运行或在调度线程内调用时直接执行
+        :param command: 命令名称，见_command_handlers
+        :param params: 命令参数
+        :return: 命令执行结果，命令抛出的异常会在调用方重新抛出
+        """
+        return self.submit(command, **params).result(timeout=self.command_timeout)
+
+    def submit(self, command: str, **params: Any) -> Future:
+        """
+        提交命令但不等待，返回的Future在命令执行后完成（异步调用方可以await asyncio.wrap_future(...)）
+        :param command: 命令名称，见_command_handlers
+        :param params: 命令参数
+        :return: 命令执行结果的Future
+        """
+        if command not in self._command_handlers:
+            raise ValueError(f"未知的命令: {command}")
             
-            # 更新时间加速倍数
-            self.time_speedup = speedup
+        future: Future = Future()
+        if not self.running or threading.current_thread() is self.scheduler_thread:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._apply_command(command, params))
+            except Exception as e:
+                future.set_exception(e)
+            self._publish_snapshot()
+            self._compact_journal()
+            self.notify()
+            return future
             
-            # 重置模拟时间的基准点，以保持当前模拟时间不变
-            self.simulation_start_real_time = time.time()
-            self.simulation_start_time = current_simulated_time
+        with self._condition:
+            self._commands.append((command, params, future))
+            self._condition.notify()
+        return future
+
+    def _apply_command(self, command: str, params: Dict[str, Any]) -> Any:
+        """执行单个命令，执行前先写入状态日志"""
+        with self._journaled('command', command=command, params=params):
+            return self._command_handlers[command](**params)
+
+    def _journal_record(self, op: str, **fields: Any) -> Optional[float]:
+        """
+        追加一条状态日志（未启用日志或正在重放时不记录），写入失败不影响调度
+        :return: 记录的时刻，未记录时返回None
+        """
+        if self.journal is None or self._replaying:
+            return None
+        timestamp = self.get_current_time()
+        try:
+            self.journal.append(op, timestamp, **fields)
+        except Exception as e:
+            print(f"写入状态日志失败: {e}")
+        return timestamp
+
+    @contextmanager
+    def _journaled(self, op: str, **fields: Any) -> Iterator[None]:
+        """
+        记录一条状态日志，并在操作执行期间把时钟固定在记录的时刻
+        重放时时钟固定在同一时刻，所以真实时钟或加速时钟在记录之后继续走动也能得到相同的结果
+        （操作期间其他线程读到的时间最多滞后一次操作的耗时；修改时钟设置也必须作为命令执行，
+        否则会基于固定的旧时刻换算模拟时间）
+        """
+        timestamp = self._journal_record(op, **fields)
+        if timestamp is None or self.clock.pinned_time is not None:
+            yield
+            return
+        self.clock.pin(timestamp)
+        try:
+            yield
+        finally:
+            self.clock.pin(None)
+
+    def _compact_journal(self) -> None:
+        """日志条数达到阈值时写入状态快照并清空日志（只能在调度线程中两次操作之间调用）"""
+        if self.journal is None or self._replaying or not self.journal.needs_snapshot():
+            return
+        try:
+            self.journal.write_snapshot(self.get_state())
+        except Exception as e:
+            print(f"写入状态快照失败: {e}")
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        获取可JSON编码的完整状态：等候区、各充电桩和时钟设置
+        :return: 状态字典
+        """
+        return {
+            'waiting_queue': self.waiting_queue.get_state(),
+            'piles': {pile_id: pile.get_state() for pile_id, pile in self.charging_piles.items()},
+            'clock': self.clock.get_state()
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        从get_state返回的状态恢复等候区和充电桩（时钟设置由调用方处理）
+        :param state: 状态字典
+        """
+        self.waiting_queue.load_state(state['waiting_queue'])
+        for pile_id, pile_state in state['piles'].items():
+            pile = self.charging_piles.get(pile_id)
+            if pile is None:
+                print(f"状态快照中的充电桩{pile_id}已不在配置中，忽略")
+                continue
+            pile.load_state(pile_state)
+        for pile in self.charging_piles.values():
+            self.waiting_queue.register_charging_pile(pile.get_queue_info())
+        # 预计完成时刻由充电桩状态决定，按恢复后的状态重建
+        self._deadline_heap.clear()
+        self._deadlines.clear()
+        self._refresh_deadlines()
+
+    def attach_journal(self, journal: StateJournal) -> Dict[str, Any]:
+        """
+        从状态日志恢复等候区、排队号、充电桩队列和充电会话，之后的命令和调度步骤都写入该日志
+        在调度器启动前调用；重放期间时钟固定在每条记录的时刻，充电详单不会重复保存
+        :param journal: 状态日志
+        :return: 恢复结果（是否加载了快照、重放的日志条数和耗时）
+        """
+        started = time.perf_counter()
+        state, records = journal.open()
+        if state is not None:
+            self.load_state(state)
+            self.clock.load_state(state['clock'])
+
+        save_bill_func = self.save_bill_func
+        self.save_bill_func = None
+        self._replaying = True
+        clock_state = None
+        try:
+            for record in records:
+                self.clock.pin(record['time'])
+                try:
+                    self._replay_record(record)
+                except Exception as e:
+                    print(f"重放状态日志第{record['seq']}条失败: {e}")
+            if records:
+                # 时钟设置命令已按顺序重放，模拟时间从最后一条日志的时刻继续
+                clock_state = self.clock.get_state()
+        finally:
+            self.clock.pin(None)
+            self._replaying = False
+            self.save_bill_func = save_bill_func
+
+        if clock_state is not None:
+            self.clock.load_state(clock_state)
+        self.journal = journal
+        if records:
+            # 恢复后的状态立即写入快照，下次启动不需要再重放这些日志
+            journal.write_snapshot(self.get_state())
+        self._publish_snapshot()
+        return {
+            'snapshot_loaded': state is not None,
+            'replayed': len(records),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def _replay_record(self, record: Dict[str, Any]) -> None:
+        """重放一条日志记录"""
+        op = record['op']
+        if op == 'command':
+            self._apply_command(record['command'], record['params'])
+        elif op == 'step':
+            self.step(record['state_changed'])
+        elif op == 'poll':
+            self._check_and_schedule()
+            self._check_charging_status()
+        elif op == 'clock':
+            # 旧版本日志中直接记录的时钟设置
+            self.clock.load_state(record['clock'])
         else:
-            # 如果不使用模拟时间，直接设置加速倍数
-            self.time_speedup = speedup
+            raise ValueError(f"未知的日志记录类型: {op}")
+
+    def _drain_commands(self) -> bool:
+        """
+        批量执行队列中所有待处理的命令
+        :return: 是否执行了命令
+        """
+        with self._condition:
+            if not self._commands:
+                return False
+            batch = list(self._commands)
+            self._commands.clear()
+            
+        for command, params, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._apply_command(command, params))
+            except Exception as e:
+                future.set_exception(e)
+        return True
+            
+    @property
+    def time_speedup(self) -> float:
+        """时间加速倍数"""
+        return self.clock.time_speedup
+
+    @property
+    def is_using_simulated_time(self) -> bool:
+        """是否使用模拟时间"""
+        return self.clock.is_using_simulated_time
+
+    def set_time_speedup(self, speedup: float) -> Dict:
+        """
+        设置时间加速倍数（作为命令由调度线程执行，不会与调度步骤并发修改时钟）
+        :param speedup: 时间加速倍数，例如2.0表示时间流逝速度为正常的2倍
+        :return: 设置结果
+        """
+        return self.execute('set_time_speedup', speedup=speedup)
         
-    def set_simulation_time(self, timestamp: float) -> None:
+    def set_simulation_time(self, timestamp: float) -> Dict:
         """
-        设置模拟时间的起始点
+        设置模拟时间的起始点（作为命令由调度线程执行）
         :param timestamp: 模拟时间的起始时间戳
+        :return: 设置结果
+        """
+        return self.execute('set_simulation_time', timestamp=timestamp)
+
+    @staticmethod
+    def parse_time_str(time_str: str) -> Tuple[float, str]:
         """
-        self.is_using_simulated_time = True
-        self.simulation_start_real_time = time.time()
-        self.simulation_start_time = timestamp
+        解析模拟时间字符串
+        :param time_str: 时间字符串，格式为 "HH:MM:SS"（当天）或 "YYYY-MM-DD HH:MM:SS"
+        :return: (时间戳, 完整的时间字符串)
+        :raises ValueError: 格式错误
+        """
+        # 判断输入格式
+        if len(time_str) <= 8:  # 处理 "HH:MM:SS" 格式
+            # 获取今天的日期
+            today = datetime.now().strftime("%Y-%m-%d")
+            time_str = f"{today} {time_str}"
+
+        # 将时间字符串转换为时间戳
+        dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
+        return dt.timestamp(), time_str
         
     def set_simulation_time_from_str(self, time_str: str) -> dict:
         """
@@ -80,26 +348,8 @@ class Scheduler:
         :return: 设置结果
         """
         try:
-            # 判断输入格式
-            if len(time_str) <= 8:  # 处理 "HH:MM:SS" 格式
-                # 获取今天的日期
-                today = datetime.now().strftime("%Y-%m-%d")
-                time_str = f"{today} {time_str}"
-                
-            # 将时间字符串转换为时间戳
-            dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-            timestamp = dt.timestamp()
-            
-            self.set_simulation_time(timestamp)
-            
-            return {
-                "status": True,
-                "msg": f"模拟时间已设置为 {time_str}",
-                "data": {
-                    "timestamp": timestamp,
-                    "time_str": time_str
-                }
-            }
+            timestamp, _ = self.parse_time_str(time_str)
+            return self.set_simulation_time(timestamp)
         except Exception as e:
             return {
                 "status": False,
@@ -112,48 +362,213 @@ class Scheduler:
         获取当前时间戳，如果启用了模拟时间，则返回模拟时间戳
         :return: 当前时间戳
         """
-        if self.is_using_simulated_time:
-            elapsed_real_time = time.time() - self.simulation_start_real_time
-            elapsed_simulated_time = elapsed_real_time * self.time_speedup
-            return self.simulation_start_time + elapsed_simulated_time
-        else:
-            return time.time()
+        return self.clock.now()
             
     def get_current_time_str(self) -> str:
         """
         获取当前时间的字符串表示，格式为 "YYYY-MM-DD HH:MM:SS"
         :return: 当前时间字符串
         """
-        current_time = self.get_current_time()
-        dt = datetime.fromtimestamp(current_time)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        return self.clock.get_current_time_str()
         
     def reset_to_real_time(self) -> dict:
         """
-        恢复使用真实系统时间，关闭模拟时间模式
+        恢复使用实时系统时间，关闭模拟时间模式（作为命令由调度线程执行）
         :return: 操作结果
         """
-        self.is_using_simulated_time = False
-        self.simulation_start_real_time = time.time()
-        self.simulation_start_time = time.time()
-        
-        return {
-            "status": True,
-            "msg": "已恢复使用实时系统时间",
-            "data": {
-                "current_time": self.get_current_time_str()
-            }
-        }
+        return self.execute('reset_to_real_time')
 
     def _scheduler_loop(self) -> None:
         """调度器主循环"""
+        if self.event_driven:
+            self._event_loop()
+            return
+        
         while self.running:
             try:
-                self._check_and_schedule()
-                self._check_charging_status()
+                self._drain_commands()
+                with self._journaled('poll'):
+                    self._check_and_schedule()
+                    self._check_charging_status()
+                    self._publish_snapshot()
+                self._compact_journal()
+            except Exception as e:
+                print(f"调度器错误: {e}")
+            with self._condition:
+                if not self._commands and self.running:
+                    self._condition.wait(self.check_interval)
+
+    def _event_loop(self) -> None:
+        """
+        事件驱动主循环：
+        只在状态变化（notify）或最近的预计充电完成时刻到达时被唤醒，空闲时不消耗CPU
+        """
+        while self.running:
+            with self._condition:
+                if not self._state_changed and not self._commands:
+                    self._condition.wait(self._get_wait_timeout())
+                state_changed = self._state_changed
+                self._state_changed = False
+                
+            if not self.running:
+                break
+                
+            try:
+                # 同一次唤醒中到达的命令批量执行，之后只调度一次
+                if self._drain_commands():
+                    state_changed = True
+                self.step(state_changed)
             except Exception as e:
                 print(f"调度器错误: {e}")
-            time.sleep(self.check_interval)
+
+    def step(self, state_changed: bool = True) -> None:
+        """
+        执行一次事件处理：断开已到达请求充电量的车辆、按需调度等候区车辆并更新预计完成时刻
+        调度线程和离散事件仿真共用此方法
+        :param state_changed: 自上次处理以来等候区或充电桩状态是否发生变化
+        """
+        with self._journaled('step', state_changed=state_changed):
+            due = self._check_due_piles()
+            if state_changed:
+                self._check_and_schedule()
+            self._refresh_deadlines()
+            rolled_over = self._advance_sessions()
+            if state_changed or due or rolled_over:
+                self._publish_snapshot()
+        self._compact_journal()
+
+    def _advance_sessions(self) -> bool:
+        """
+        推进正在充电的会话累计器，使实时电费查询保持在当前电价时段内
+        :return: 是否有会话跨过了电价分界点（需要发布新快照）
+        """
+        rolled_over = False
+        for pile in self.charging_piles.values():
+            if pile.status == ChargingStatus.CHARGING:
+                segment_end = pile.session.segment_end if pile.session is not None else None
+                pile.advance_session()
+                if pile.session is not None and pile.session.segment_end != segment_end:
+                    rolled_over = True
+        return rolled_over
+
+    def _next_tariff_boundary(self) -> Optional[float]:
+        """正在充电的会话中最早到达的电价分界点"""
+        boundaries = [
+            pile.session.segment_end for pile in self.charging_piles.values()
+            if pile.status == ChargingStatus.CHARGING and pile.session is not None
+        ]
+        return min(boundaries) if boundaries else None
+
+    def _publish_snapshot(self) -> None:
+        """构建新的状态快照并替换当前快照（引用赋值是原子的，读者不会看到中间状态）"""
+        if self._replaying:
+            return  # 重放日志期间只在结束后发布一次
+        self._snapshot_version += 1
+        self.snapshot = StationSnapshot.capture(self._snapshot_version, self.get_current_time(),
+                                                self.waiting_queue, self.charging_piles, self.snapshot)
+        for listener in self._snapshot_listeners:
+            try:
+                listener(self.snapshot)
+            except Exception as e:
+                print(f"快照监听器错误: {e}")
+
+    def add_snapshot_listener(self, listener: Callable[[StationSnapshot], None]) -> None:
+        """
+        注册快照监听器，每次发布新快照后在发布线程（通常是调度线程）中按版本顺序调用
+        监听器应尽快返回，不能修改快照
+        :param listener: 接收新快照的函数
+        """
+        self._snapshot_listeners.append(listener)
+
+    def get_snapshot(self) -> StationSnapshot:
+        """
+        获取最近发布的状态快照，快照发布后不再修改，调用方不应修改其内容
+        :return: 状态快照
+        """
+        return self.snapshot
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        获取最近的预计充电完成时刻
+        :return: 时间戳，没有正在充电的车辆时返回None
+        """
+        self._pop_stale_deadlines()
+        if not self._deadline_heap:
+            return None
+        return self._deadline_heap[0][0]
+
+    def _predict_finish_time(self, pile: ChargingPile) -> Optional[float]:
+        """
+        根据开始时间、请求充电量和功率预测充电桩当前会话的完成时刻
+        :param pile: 充电桩
+        :return: 预计完成时刻（调度器时间），未在充电时返回None
+        """
+        if pile.status != ChargingStatus.CHARGING or not pile.connected_vehicle or pile.start_time is None:
+            return None
+        if pile.power <= 0:
+            return None
+        requested_amount = pile.connected_vehicle.get('charging_amount', 0)
+        if requested_amount <= 0:
+            return None
+        already_charged_amount = pile.connected_vehicle.get('already_charged_amount', 0.0)
+        remaining_amount = max(0.0, requested_amount - already_charged_amount)
+        return pile.start_time + remaining_amount / pile.power * 3600
+
+    def _refresh_deadlines(self) -> None:
+        """重新计算各充电桩的预计完成时刻，变化的写入最小堆（旧记录惰性删除）"""
+        for pile_id, pile in self.charging_piles.items():
+            deadline = self._predict_finish_time(pile)
+            if deadline is None:
+                self._deadlines.pop(pile_id, None)
+            elif self._deadlines.get(pile_id) != deadline:
+                self._deadlines[pile_id] = deadline
+                heapq.heappush(self._deadline_heap, (deadline, pile_id))
+
+    def _pop_stale_deadlines(self) -> None:
+        """弹出堆顶已失效的预计完成时刻"""
+        while self._deadline_heap:
+            deadline, pile_id = self._deadline_heap[0]
+            if self._deadlines.get(pile_id) == deadline:
+                return
+            heapq.heappop(self._deadline_heap)
+
+    def _get_wait_timeout(self) -> Optional[float]:
+        """
+        计算距离最近预计完成时刻的真实等待时长（秒）
+        :return: 等待秒数，没有正在充电的车辆时返回None（无限等待直到被通知）
+        """
+        # 电价分界点处也需要醒来推进会话累计器并发布新快照
+        candidates = [t for t in (self.next_deadline(), self._next_tariff_boundary()) if t is not None]
+        if not candidates:
+            return None
+        deadline = min(candidates)
+        remaining = deadline - self.get_current_time()
+        if self.is_using_simulated_time:
+            remaining /= self.time_speedup
+        # 多等待1毫秒，避免浮点误差导致提前醒来
+        return max(0.0, remaining) + 0.001
+
+    def _check_due_piles(self) -> bool:
+        """
+        只检查预计完成时刻已到达的充电桩
+        :return: 是否有充电桩到达预计完成时刻
+        """
+        current_time = self.get_current_time()
+        self._pop_stale_deadlines()
+        due_pile_ids = []
+        while self._deadline_heap and self._deadline_heap[0][0] <= current_time:
+            # 保留_deadlines中的记录，避免同一完成时刻被重复压入堆
+            _, pile_id = heapq.heappop(self._deadline_heap)
+            due_pile_ids.append(pile_id)
+            self._pop_stale_deadlines()
+            
+        for pile_id in due_pile_ids:
+            self._handle_charging_result(pile_id, self.charging_piles[pile_id].check_charging_status())
+        
+        # 有车辆完成充电后需要重新调度等候区车辆
+        if due_pile_ids:
+            self._check_and_schedule()
+        return bool(due_pile_ids)
 
     def _check_and_schedule(self) -> None:
         """检查并执行调度"""
@@ -182,18 +597,219 @@ class Scheduler:
         """检查所有充电桩的充电状态，如果达到请求充电量则自动断开"""
         try:
             for pile_id, pile in self.charging_piles.items():
-                result = pile.check_charging_status()
-                if result:
-                    if isinstance(result, dict) and 'error' not in result:
-                        print(f"充电桩[{pile_id}]自动断开: {result.get('message', '')}")
-                        # 处理充电详单
-                        if result.get('bill') and self.save_bill_func:
-                            self.save_bill_func(result['bill'])
-                    else:
-                        print(f"充电桩[{pile_id}]自动断开失败: {result.get('error', '未知错误')}")
+                self._handle_charging_result(pile_id, pile.check_charging_status())
         except Exception as e:
             print(f"检查充电状态时发生错误: {str(e)}")
+
+    def _handle_charging_result(self, pile_id: str, result: Optional[Dict]) -> None:
+        """
+        处理充电桩自动断开的结果
+        :param pile_id: 充电桩ID
+        :param result: check_charging_status的返回值
+        """
+        if not result:
+            return
+        if isinstance(result, dict) and 'error' not in result:
+            print(f"充电桩[{pile_id}]自动断开: {result.get('message', '')}")
+            # 处理充电详单
+            if result.get('bill') and self.save_bill_func:
+                self.save_bill_func(result['bill'])
+        else:
+            print(f"充电桩[{pile_id}]自动断开失败: {result.get('error', '未知错误')}")
+            
+    def _cmd_join_queue(self, charge_type: str, vehicle_info: Dict[str, Any]) -> Dict:
+        """
+        命令：车辆加入等候区
+        :param charge_type: 'F' 表示快充，'T' 表示慢充
+        :param vehicle_info: 车辆信息
+        :return: 处理结果
+        """
+        if self.waiting_queue.is_full():
+            return {"status": False, "msg": "等候区已满", "data": None}
+        queue_number = self.waiting_queue.add_vehicle(charge_type, vehicle_info)
+        return {"status": True, "msg": "加入队列成功", "data": {"queue_number": queue_number}}
+
+    def _cmd_leave_queue(self, queue_number: str) -> Dict:
+        """
+        命令：车辆离开等候区
+        :param queue_number: 排队号码
+        :return: 处理结果，data为被移除的车辆
+        """
+        vehicle = self.waiting_queue.remove_vehicle(queue_number)
+        if not vehicle:
+            return {"status": False, "msg": "未找到该排队号码", "data": None}
+        return {"status": True, "msg": "离开队列成功", "data": vehicle}
+
+    def _cmd_change_mode(self, queue_number: str, new_mode: str) -> Dict:
+        """
+        命令：修改等候区车辆的充电模式
+        :param queue_number: 排队号码
+        :param new_mode: 新的充电模式 ('F'或'T')
+        :return: 处理结果
+        """
+        vehicle = self.waiting_queue.change_charge_mode(queue_number, new_mode)
+        if not vehicle:
+            return {"status": False, "msg": "未找到该排队号码对应的车辆", "data": None}
+        return {
+            "status": True,
+            "msg": f"充电模式已修改为{'快充' if new_mode == 'F' else '慢充'}，新的排队号为{vehicle['queue_number']}",
+            "data": {"queue_number": vehicle['queue_number'], "charge_mode": new_mode}
+        }
+
+    def _cmd_modify_waiting_request(self, queue_number: str, charging_amount: float) -> Dict:
+        """
+        命令：修改等候区车辆的请求充电量
+        :param queue_number: 排队号码
+        :param charging_amount: 新的请求充电量
+        :return: 处理结果
+        """
+        vehicle = self.waiting_queue.find_vehicle_by_queue_number(queue_number)
+        if not vehicle:
+            return {"status": False, "msg": "未找到该排队号码对应的车辆", "data": None}
+        old_amount = vehicle['vehicle_info'].get('charging_amount', 0)
+        vehicle['vehicle_info']['charging_amount'] = charging_amount
+        return {
+            "status": True,
+            "msg": f"等候队列中的充电请求已从{old_amount}度修改为{charging_amount}度",
+            "data": {"queue_number": queue_number, "charging_amount": charging_amount}
+        }
+
+    def _cmd_modify_charging_request(self, pile_id: str, charging_amount: float) -> Dict:
+        """
+        命令：修改正在充电车辆的请求充电量
+        :param pile_id: 充电桩ID
+        :param charging_amount: 新的请求充电量，不能小于已充电量
+        :return: 处理结果
+        """
+        pile = self.charging_piles.get(pile_id)
+        if pile is None:
+            return {"status": False, "msg": "充电桩不存在", "data": None}
+        if pile.status != ChargingStatus.CHARGING or not pile.connected_vehicle:
+            return {"status": False, "msg": "该充电桩当前没有连接车辆", "data": None}
+            
+        current_charging_amount = pile.get_current_charging_amount()
+        if charging_amount < current_charging_amount:
+            return {
+                "status": False,
+                "msg": f"新的充电量({charging_amount}度)不能小于已充电量({current_charging_amount:.2f}度)",
+                "data": None
+            }
+            
+        old_amount = pile.connected_vehicle.get('charging_amount', 0)
+        pile.update_charging_amount(charging_amount)
+        return {
+            "status": True,
+            "msg": f"充电请求已从{old_amount}度修改为{charging_amount}度",
+            "data": {
+                "pile_id": pile_id,
+                "charging_amount": charging_amount,
+                "current_charging_amount": round(current_charging_amount, 2)
+            }
+        }
+
+    def _cmd_disconnect(self, pile_id: str, require_charging: bool = False) -> Dict:
+        """
+        命令：断开充电桩上的车辆并生成详单
+        详单在调度线程中提交保存（与自动断开和故障一致），重放日志前崩溃也不会丢失；
+        save_bill_func只把详单放入写入队列，数据库写入不占用调度线程
+        :param pile_id: 充电桩ID
+        :param require_charging: 是否要求充电桩正在充电（充电区取消充电时使用）
+        :return: 处理结果，data和bill均为充电详单
+        """
+        pile = self.charging_piles.get(pile_id)
+        if pile is None:
+            return {"status": False, "msg": "充电桩不存在", "data": None}
+        if require_charging and (pile.status != ChargingStatus.CHARGING or not pile.connected_vehicle):
+            return {"status": False, "msg": "该充电桩当前没有连接车辆", "data": None}
+            
+        result = pile.disconnect_vehicle()
+        if isinstance(result, dict) and 'error' in result:
+            return {"status": False, "msg": result['error'], "data": None}
+        bill = result.get('bill')
+        if bill and self.save_bill_func:
+            self.save_bill_func(bill)
+        return {"status": True, "msg": result['message'], "data": bill, "bill": bill}
+
+    def _cmd_toggle_pile(self, pile_id: str, action: str) -> Dict:
+        """
+        命令：启动/关闭充电桩，关闭时如有车辆正在充电则先断开并生成详单
+        :param pile_id: 充电桩ID
+        :param action: 'start' 或 'stop'
+        :return: 处理结果
+        """
+        pile = self.charging_piles.get(pile_id)
+        if pile is None:
+            return {"status": False, "msg": "充电桩不存在", "data": None}
+            
+        if action == 'start':
+            if pile.status != ChargingStatus.OFFLINE:
+                return {"status": False, "msg": f"充电桩{pile_id}已处于启动状态", "data": pile.get_status()}
+            pile.status = ChargingStatus.IDLE
+            return {"status": True, "msg": f"充电桩{pile_id}已启动", "data": pile.get_status()}
             
+        if action == 'stop':
+            if pile.status == ChargingStatus.OFFLINE:
+                return {"status": False, "msg": f"充电桩{pile_id}已处于关闭状态", "data": pile.get_status()}
+            bill = None
+            if pile.status == ChargingStatus.CHARGING and pile.connected_vehicle:
+                result = pile.disconnect_vehicle()
+                if isinstance(result, dict) and 'error' in result:
+                    return {"status": False, "msg": result['error'], "data": None}
+                bill = result.get('bill')
+                if bill and self.save_bill_func:
+                    self.save_bill_func(bill)
+            pile.status = ChargingStatus.OFFLINE
+            return {"status": True, "msg": f"充电桩{pile_id}已关闭", "data": pile.get_status(), "bill": bill}
+            
+        return {"status": False, "msg": "无效的操作，必须是'start'或'stop'", "data": None}
+
+    def _cmd_set_time_speedup(self, speedup: float) -> Dict:
+        """
+        命令：设置时间加速倍数
+        与其他命令一样在调度线程中执行并写入状态日志，执行期间时钟固定在日志记录的时刻，
+        重放时按同一时刻换算模拟时间
+        :param speedup: 时间加速倍数
+        :return: 处理结果
+        """
+        self.clock.set_time_speedup(speedup)
+        # 时间流速变化后需要重新计算等待时长
+        self.notify()
+        return {"status": True, "msg": f"时间加速倍数已设置为{speedup}", "data": {"speedup": speedup}}
+
+    def _cmd_set_simulation_time(self, timestamp: float) -> Dict:
+        """
+        命令：设置模拟时间的起始点
+        :param timestamp: 模拟时间的起始时间戳
+        :return: 处理结果
+        """
+        self.clock.set_simulation_time(timestamp)
+        self.notify()
+        time_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return {
+            "status": True,
+            "msg": f"模拟时间已设置为 {time_str}",
+            "data": {
+                "timestamp": timestamp,
+                "time_str": time_str
+            }
+        }
+
+    def _cmd_reset_to_real_time(self) -> Dict:
+        """
+        命令：恢复使用实时系统时间
+        :return: 处理结果
+        """
+        self.clock.reset_to_real_time()
+        self.notify()
+        return {
+            "status": True,
+            "msg": "已恢复使用实时系统时间",
+            "data": {
+                # 命令执行期间时钟固定在记录时刻，直接取系统时间
+                "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+        }
+
     def handle_pile_fault(self, pile_id: str, schedule_strategy: str = 'priority') -> Dict:
         """
         处理充电桩故障
@@ -235,6 +851,7 @@ class Scheduler:
                 
             # 清空故障充电桩的队列
             pile.remove_all_vehicles()
+            self.notify()
                 
             return {
                 "status": True,
@@ -277,6 +894,7 @@ class Scheduler:
                 
             # 处理故障恢复调度
             schedule_result = self._handle_pile_recovery(pile_id)
+            self.notify()
                 
             return {
                 "status": True,
@@ -347,7 +965,7 @@ class Scheduler:
             # 寻找队列最短的充电桩
             target_pile_id = min(
                 same_type_piles.keys(), 
-                key=lambda pid: len(same_type_piles[pid].charge_queue)
+                key=lambda pid: (len(same_type_piles[pid].charge_queue), same_type_piles[pid].expected_finish_time())
             )
             target_pile = same_type_piles[target_pile_id]
             
@@ -453,7 +1071,7 @@ class Scheduler:
             # 寻找队列最短的充电桩
             target_pile_id = min(
                 same_type_piles.keys(), 
-                key=lambda pid: len(same_type_piles[pid].charge_queue)
+                key=lambda pid: (len(same_type_piles[pid].charge_queue), same_type_piles[pid].expected_finish_time())
             )
             target_pile = same_type_piles[target_pile_id]
             
@@ -552,7 +1170,7 @@ class Scheduler:
             # 寻找队列最短的充电桩
             target_pile_id = min(
                 same_type_piles.keys(), 
-                key=lambda pid: len(same_type_piles[pid].charge_queue)
+                key=lambda pid: (len(same_type_piles[pid].charge_queue), same_type_piles[pid].expected_finish_time())
             )
             target_pile = same_type_piles[target_pile_id]
             
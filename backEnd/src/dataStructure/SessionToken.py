@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+
+class TokenError(Exception):
+    """令牌无效、过期或已注销"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    签名会话令牌
+    令牌为"载荷.签名"，载荷包含用户ID、用户名、角色、签发和过期时间，签名为HMAC-SHA256；
+    校验只做本地计算和内存查找，不访问数据库。
+    注销的令牌记录在内存中直到过期；修改密码等场景可以让某个用户之前签发的所有令牌失效
+    """
+
+    def __init__(self, secret: bytes, ttl: float = 24 * 3600, clock: Callable[[], float] = time.time):
+        """
+        初始化签名器
+        :param secret: 签名密钥
+        :param ttl: 令牌有效期（秒）
+        :param clock: 时间函数，便于测试
+        """
+        if not secret:
+            raise ValueError("签名密钥不能为空")
+        self.secret = secret
+        self.ttl = ttl
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}  # 令牌编号 -> 过期时间
+        self._not_before: Dict[str, float] = {}  # 用户名 -> 早于该时间签发的令牌无效
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret, payload.encode('ascii'), hashlib.sha256).digest())
+
+    def issue(self, user_id: Any, username: str, role: str) -> str:
+        """
+        签发令牌
+        :param user_id: 用户ID
+        :param username: 用户名
+        :param role: 角色（admin或user）
+        :return: 令牌
+        """
+        now = self.clock()
+        claims = {
+            'uid': user_id,
+            'sub': username,
+            'role': role,
+            'iat': now,
+            'exp': now + self.ttl,
+            'jti': uuid.uuid4().hex
+        }
+        payload = _b64encode(json.dumps(claims, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        校验令牌
+        :param token: 令牌
+        :return: 载荷（uid、sub、role、iat、exp、jti）
+        """
+        try:
+            payload, signature = token.split('.')
+        except (AttributeError, ValueError):
+            raise TokenError("令牌格式错误")
+        # 签发的令牌只含base64url字符，非ASCII字符无法参与签名计算
+        if not token.isascii():
+            raise TokenError("令牌格式错误")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise TokenError("令牌签名无效")
+        try:
+            claims = json.loads(_b64decode(payload).decode('utf-8'))
+        except ValueError:
+            raise TokenError("令牌格式错误")
+
+        now = self.clock()
+        if claims['exp'] <= now:
+            raise TokenError("令牌已过期")
+        with self._lock:
+            if claims['jti'] in self._revoked:
+                raise TokenError("令牌已注销")
+            if claims['iat'] < self._not_before.get(claims['sub'], float('-inf')):
+                raise TokenError("令牌已失效，请重新登录")
+        return claims
+
+    def revoke(self, claims: Dict[str, Any]) -> None:
+        """
+        注销一个令牌（例如退出登录）
+        :param claims: verify返回的载荷
+        """
+        now = self.clock()
+        with self._lock:
+            self._revoked[claims['jti']] = claims['exp']
+            # 已过期的令牌本身就无法通过校验，从注销集合中清除
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+
+    def revoke_user(self, username: str) -> None:
+        """
+        使用户此前签发的所有令牌失效（例如修改密码）
+        :param username: 用户名
+        """
+        now = self.clock()
+        with self._lock:
+            self._not_before[username] = now
+            for name in [name for name, since in self._not_before.items() if since + self.ttl <= now]:
+                del self._not_before[name]
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取注销记录数量"""
+        with self._lock:
+            return {'revoked': len(self._revoked), 'revoked_users': len(self._not_before)}
@@ -0,0 +1,199 @@
+import heapq
+from datetime import datetime
+from typing import Dict, List, Tuple, Any, Optional
+from .Clock import VirtualClock
+from .WaitingQueue import Queue
+from .ChargerPile import ChargingPile
+from .Scheduler import Scheduler
+
+
+class Simulator:
+    """
+    离散事件仿真器
+    调度器、等候区和充电桩都运行在虚拟时钟上，时钟直接跳到下一个事件（车辆到达、故障/修复或预计充电完成），
+    不需要真实等待，可用于离线评估充电桩容量变化和调度策略
+    """
+
+    def __init__(self, waiting_queue: Queue, charging_piles: Dict[str, ChargingPile], clock: VirtualClock):
+        """
+        初始化仿真器
+        :param waiting_queue: 使用虚拟时钟的等候区
+        :param charging_piles: 使用虚拟时钟的充电桩字典
+        :param clock: 虚拟时钟
+        """
+        self.clock = clock
+        self.waiting_queue = waiting_queue
+        self.charging_piles = charging_piles
+        self.bills: List[Dict[str, Any]] = []  # 仿真中生成的充电详单
+        self.scheduler = Scheduler(waiting_queue, charging_piles, self.bills.append, clock=clock)
+
+        self._events: List[Tuple[float, int, str, Dict[str, Any]]] = []  # 事件最小堆 (时刻, 序号, 类型, 参数)
+        self._event_seq = 0
+        self.arrival_times: Dict[str, List[float]] = {}  # 车辆ID -> 各次到达时刻
+        self.rejected: List[Dict[str, Any]] = []  # 因等候区已满等原因被拒绝的请求
+
+    @classmethod
+    def create(cls, pile_categories: Dict[str, str], start_time: float, max_capacity: int = 10) -> 'Simulator':
+        """
+        按充电桩配置创建仿真器
+        :param pile_categories: 充电桩ID -> 充电桩类型（F:快充, T:慢充）
+        :param start_time: 仿真起始时间戳
+        :param max_capacity: 等候区最大容量
+        :return: 仿真器实例
+        """
+        clock = VirtualClock(start_time)
+        waiting_queue = Queue(clock=clock)
+        waiting_queue.max_capacity = max_capacity
+        charging_piles = {
+            pile_id: ChargingPile(pile_id, category, clock=clock)
+            for pile_id, category in pile_categories.items()
+        }
+        return cls(waiting_queue, charging_piles, clock)
+
+    @classmethod
+    def from_config(cls, station_config: Dict[str, Any], start_time: float) -> 'Simulator':
+        """
+        按充电站配置（get_station_config的返回值）创建仿真器，用于评估不同规模的充电站
+        :param station_config: 充电站配置
+        :param start_time: 仿真起始时间戳
+        :return: 仿真器实例
+        """
+        clock = VirtualClock(start_time)
+        waiting_queue = Queue(clock=clock)
+        waiting_queue.max_capacity = station_config['waiting_area_size']
+        waiting_queue.dispatch_thresholds.update(station_config.get('dispatch_thresholds', {}))
+        charging_piles = {
+            pile['pile_id']: ChargingPile(pile['pile_id'], pile['charging_category'], clock=clock,
+                                          power=pile.get('power'), queue_length=pile.get('queue_length', 2))
+            for pile in station_config['piles']
+        }
+        return cls(waiting_queue, charging_piles, clock)
+
+    def _push_event(self, timestamp: float, event_type: str, params: Dict[str, Any]) -> None:
+        heapq.heappush(self._events, (timestamp, self._event_seq, event_type, params))
+        self._event_seq += 1
+
+    def add_arrival(self, timestamp: float, charge_type: str, vehicle_info: Dict[str, Any]) -> None:
+        """
+        添加车辆到达事件
+        :param timestamp: 到达时间戳
+        :param charge_type: 'F' 表示快充，'T' 表示慢充
+        :param vehicle_info: 车辆信息（需包含car_id、username、charging_amount）
+        """
+        self._push_event(timestamp, 'arrival', {'charge_type': charge_type, 'vehicle_info': vehicle_info})
+
+    def add_fault(self, timestamp: float, pile_id: str, schedule_strategy: str = 'priority') -> None:
+        """
+        添加充电桩故障事件
+        :param timestamp: 故障时间戳
+        :param pile_id: 充电桩ID
+        :param schedule_strategy: 故障调度策略 ('priority'或'time_order')
+        """
+        self._push_event(timestamp, 'fault', {'pile_id': pile_id, 'schedule_strategy': schedule_strategy})
+
+    def add_repair(self, timestamp: float, pile_id: str) -> None:
+        """
+        添加充电桩修复事件
+        :param timestamp: 修复时间戳
+        :param pile_id: 充电桩ID
+        """
+        self._push_event(timestamp, 'repair', {'pile_id': pile_id})
+
+    def add_arrivals_from_bills(self, bills: List[Dict[str, Any]]) -> None:
+        """
+        用历史充电详单回放真实到达流量（以启动时间作为到达时间，按充电桩类型确定充电模式）
+        :param bills: 充电详单列表（charging_bills表的行）
+        """
+        categories = {pile_id: pile.charging_category for pile_id, pile in self.charging_piles.items()}
+        for bill in bills:
+            start_time = bill['start_time']
+            if isinstance(start_time, str):
+                start_time = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
+            if isinstance(start_time, datetime):
+                start_time = start_time.timestamp()
+            self.add_arrival(start_time, categories.get(bill['pile_id'], 'T'), {
+                'car_id': str(bill['vehicle_id']),
+                'username': bill['username'],
+                'charging_amount': float(bill['charging_amount'])
+            })
+
+    def _apply_event(self, event_type: str, params: Dict[str, Any]) -> None:
+        """执行一个仿真事件"""
+        if event_type == 'arrival':
+            vehicle_info = dict(params['vehicle_info'])
+            try:
+                self.waiting_queue.add_vehicle(params['charge_type'], vehicle_info)
+                self.arrival_times.setdefault(vehicle_info['car_id'], []).append(self.clock.get_current_time())
+            except Exception as e:
+                self.rejected.append({
+                    'time': self.clock.get_current_time(),
+                    'vehicle_info': vehicle_info,
+                    'reason': str(e)
+                })
+        elif event_type == 'fault':
+            self.scheduler.handle_pile_fault(params['pile_id'], params['schedule_strategy'])
+        elif event_type == 'repair':
+            self.scheduler.handle_pile_repair(params['pile_id'])
+
+    def run(self, until: Optional[float] = None) -> Dict[str, Any]:
+        """
+        运行仿真直到没有待处理事件（或到达指定时刻）
+        :param until: 仿真结束时间戳，为None时运行到所有车辆充电完成
+        :return: 仿真统计结果
+        """
+        while True:
+            next_event_time = self._events[0][0] if self._events else None
+            next_deadline = self.scheduler.next_deadline()
+            candidates = [t for t in (next_event_time, next_deadline) if t is not None]
+            if not candidates:
+                break
+            next_time = max(min(candidates), self.clock.get_current_time())
+            if until is not None and next_time > until:
+                self.clock.advance_to(max(until, self.clock.get_current_time()))
+                break
+
+            self.clock.advance_to(next_time)
+
+            # 同一时刻的所有外部事件合并处理，然后只调度一次
+            state_changed = False
+            while self._events and self._events[0][0] <= next_time:
+                _, _, event_type, params = heapq.heappop(self._events)
+                self._apply_event(event_type, params)
+                state_changed = True
+
+            self.scheduler.step(state_changed)
+
+        return self.get_summary()
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        汇总仿真结果
+        :return: 包含服务车辆数、拒绝数、平均等待时长、总电量和总收入的字典
+        """
+        bill_starts: Dict[str, List[float]] = {}
+        for bill in self.bills:
+            start_time = datetime.strptime(bill['start_time'], '%Y-%m-%d %H:%M:%S').timestamp()
+            bill_starts.setdefault(bill['vehicle_id'], []).append(start_time)
+
+        # 每次到达对应其后最早开始的一次充电（故障断开后的续充不重复计算）
+        wait_minutes = []
+        for car_id, arrivals in self.arrival_times.items():
+            starts = sorted(bill_starts.get(car_id, []))
+            index = 0
+            for arrival_time in arrivals:
+                while index < len(starts) and starts[index] < int(arrival_time):
+                    index += 1
+                if index < len(starts):
+                    wait_minutes.append(max(0.0, starts[index] - arrival_time) / 60)
+                    index += 1
+
+        return {
+            'served_vehicles': len(wait_minutes),
+            'rejected_vehicles': len(self.rejected),
+            'bill_count': len(self.bills),
+            'average_wait_minutes': round(sum(wait_minutes) / len(wait_minutes), 2) if wait_minutes else 0.0,
+            'max_wait_minutes': round(max(wait_minutes), 2) if wait_minutes else 0.0,
+            'total_energy': round(sum(bill['charging_amount'] for bill in self.bills), 2),
+            'total_revenue': round(sum(bill['total_cost'] for bill in self.bills), 2),
+            'end_time': self.clock.get_current_time_str()
+        }
@@ -0,0 +1,188 @@
+import copy
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Mapping
+from .WaitingQueue import Queue
+from .ChargerPile import ChargingPile, ChargingStatus
+from .Records import QueueEntry, to_json
+
+# 保留的已离开等候区的排队号数量，更早的增量查询只能返回全量状态
+MAX_REMOVED_ENTRIES = 1024
+
+
+class StationSnapshot:
+    """
+    充电站状态快照（写时复制）
+    由调度线程在每次状态变化后构建并整体替换发布，发布后不再修改；
+    状态查询接口只需取得当前快照的引用，无需加锁，也不会读到调度线程修改到一半的数据
+    """
+
+    def __init__(self, version: int, created_at: float, piles: Mapping[str, Mapping[str, Any]],
+                 queue_status: Mapping[str, Any], pile_params: Mapping[str, Mapping[str, Any]],
+                 pile_versions: Optional[Mapping[str, int]] = None, queue_versions: Optional[Mapping[str, int]] = None,
+                 removed: Optional[Mapping[str, int]] = None, removed_floor: int = 0):
+        """
+        :param version: 快照版本号，每次发布递增
+        :param created_at: 快照生成时的时钟时间戳
+        :param piles: 充电桩ID -> 充电桩状态（get_status格式）
+        :param queue_status: 等候区状态（get_queue_status格式）
+        :param pile_params: 充电桩ID -> 计算实时充电量所需的参数（start_time等）
+        :param pile_versions: 充电桩ID -> 状态最后一次变化的版本号
+        :param queue_versions: 排队号 -> 等候车辆最后一次变化的版本号
+        :param removed: 已离开等候区的排队号 -> 离开时的版本号
+        :param removed_floor: 已不再保留离开记录的最大版本号
+        """
+        self.version = version
+        self.created_at = created_at
+        self.piles = piles
+        self.queue_status = queue_status
+        self.pile_params = pile_params
+        self.pile_versions = pile_versions if pile_versions is not None else {pile_id: version for pile_id in piles}
+        self.queue_versions = queue_versions if queue_versions is not None else {
+            entry['queue_number']: version
+            for entry in list(queue_status['fast_queue']) + list(queue_status['slow_queue'])
+        }
+        self.removed = removed if removed is not None else MappingProxyType({})
+        self.removed_floor = removed_floor
+
+    @classmethod
+    def capture(cls, version: int, created_at: float, waiting_queue: Queue,
+                charging_piles: Dict[str, ChargingPile],
+                previous: Optional['StationSnapshot'] = None) -> 'StationSnapshot':
+        """
+        从等候区和充电桩的当前状态构建快照（只能在调度线程中调用）
+        车辆和排队记录使用其缓存的字典视图（记录修改后生成新视图，未变化的记录不再复制）；
+        充电详单不进入快照，状态中只有详单数量
+        :param previous: 上一个快照，用于记录每个充电桩和等候车辆最后一次变化的版本号
+        :return: 新的快照
+        """
+        piles = {}
+        pile_params = {}
+        for pile_id, pile in charging_piles.items():
+            status = pile.get_status()
+            status['connected_vehicle'] = to_json(pile.connected_vehicle) if pile.connected_vehicle else None
+            status['charge_queue'] = [to_json(vehicle) for vehicle in pile.charge_queue]
+            status.update({
+                'charging_count': pile.charging_count,
+                'total_charging_duration': pile.total_charging_duration,
+                'total_energy_delivered': pile.total_energy_delivered
+            })
+            piles[pile_id] = MappingProxyType(status)
+            session = pile._get_session()
+            pile_params[pile_id] = MappingProxyType({
+                'charging': pile.status == ChargingStatus.CHARGING and pile.connected_vehicle is not None,
+                'start_time': pile.start_time,
+                'power': pile.power,
+                # 会话累计器的副本，调度线程之后推进检查点不会影响快照
+                'session': copy.copy(session) if session is not None else None
+            })
+
+        def copy_entries(entries):
+            return [entry.to_json() if isinstance(entry, QueueEntry)
+                    else dict(entry, vehicle_info=to_json(entry['vehicle_info'])) for entry in entries]
+
+        fast_queue = copy_entries(waiting_queue.fast_queue)
+        slow_queue = copy_entries(waiting_queue.slow_queue)
+        queue_status = MappingProxyType({
+            'fast_queue': fast_queue,
+            'slow_queue': slow_queue,
+            'total_vehicles': len(fast_queue) + len(slow_queue)
+        })
+        if previous is None:
+            return cls(version, created_at, MappingProxyType(piles), queue_status, MappingProxyType(pile_params))
+
+        pile_versions = {}
+        for pile_id, status in piles.items():
+            unchanged = previous.piles.get(pile_id) == status
+            pile_versions[pile_id] = previous.pile_versions[pile_id] if unchanged else version
+
+        queue_versions = {}
+        current_entries = {}
+        for entry in fast_queue + slow_queue:
+            current_entries[entry['queue_number']] = entry
+        previous_entries = {entry['queue_number']: entry
+                            for entry in previous.queue_status['fast_queue'] + previous.queue_status['slow_queue']}
+        for queue_number, entry in current_entries.items():
+            unchanged = previous_entries.get(queue_number) == entry
+            queue_versions[queue_number] = previous.queue_versions[queue_number] if unchanged else version
+
+        # 离开记录只在有车辆离开时复制，保留最近MAX_REMOVED_ENTRIES条
+        removed, removed_floor = previous.removed, previous.removed_floor
+        left = previous_entries.keys() - current_entries.keys()
+        if left or any(queue_number in removed for queue_number in current_entries):
+            records = {queue_number: at for queue_number, at in removed.items() if queue_number not in current_entries}
+            records.update((queue_number, version) for queue_number in left)
+            if len(records) > MAX_REMOVED_ENTRIES:
+                ordered = sorted(records.items(), key=lambda item: item[1])
+                dropped = ordered[:len(records) - MAX_REMOVED_ENTRIES]
+                removed_floor = max(removed_floor, dropped[-1][1])
+                records = dict(ordered[len(dropped):])
+            removed = MappingProxyType(records)
+
+        return cls(version, created_at, MappingProxyType(piles), queue_status, MappingProxyType(pile_params),
+                   MappingProxyType(pile_versions), MappingProxyType(queue_versions), removed, removed_floor)
+
+    def covers(self, since: int) -> bool:
+        """
+        能否计算从版本since到当前快照的增量
+        :param since: 客户端持有的版本号
+        :return: 版本号有效且所需的离开记录仍然保留时为True
+        """
+        return self.removed_floor <= since <= self.version
+
+    def changed_piles(self, since: int) -> List[str]:
+        """版本since之后状态发生变化的充电桩"""
+        return [pile_id for pile_id, changed_at in self.pile_versions.items() if changed_at > since]
+
+    def changed_queue_entries(self, since: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        版本since之后加入或修改的等候车辆
+        :return: {"fast_queue": [...], "slow_queue": [...]}
+        """
+        return {
+            name: [entry for entry in self.queue_status[name] if self.queue_versions[entry['queue_number']] > since]
+            for name in ('fast_queue', 'slow_queue')
+        }
+
+    def removed_queue_numbers(self, since: int) -> List[str]:
+        """版本since之后离开等候区（开始充电、取消或转到其他队列）的排队号"""
+        return [queue_number for queue_number, removed_at in self.removed.items() if removed_at > since]
+
+    def any_charging(self) -> bool:
+        """是否有正在充电的充电桩（实时充电量和费用随时间变化）"""
+        return any(self.is_charging(pile_id) for pile_id in self.pile_params)
+
+    def is_charging(self, pile_id: str) -> bool:
+        """快照时刻充电桩是否正在为车辆充电"""
+        params = self.pile_params.get(pile_id)
+        return bool(params and params['charging'] and params['start_time'] is not None)
+
+    def current_charging_amount(self, pile_id: str, now: float) -> float:
+        """
+        按快照中的开始时间和功率计算指定时刻的已充电量（与ChargingPile.get_current_charging_amount一致）
+        :param pile_id: 充电桩ID
+        :param now: 当前时间戳
+        :return: 已充电量（度）
+        """
+        if not self.is_charging(pile_id):
+            return 0.0
+        params = self.pile_params[pile_id]
+        return params['power'] * (now - params['start_time']) / 3600.0
+
+    def current_charging_cost(self, pile_id: str, now: float) -> float:
+        """
+        按快照中的会话累计器计算指定时刻的充电电费（当前电价时段内为O(1)）
+        :param pile_id: 充电桩ID
+        :param now: 当前时间戳
+        :return: 充电电费（元）
+        """
+        if not self.is_charging(pile_id):
+            return 0.0
+        session = self.pile_params[pile_id]['session']
+        if session is None:
+            return 0.0
+        return session.peek(now)[1]
+
+    def get_start_time(self, pile_id: str) -> Optional[float]:
+        """获取快照中充电桩本次充电的开始时间"""
+        params = self.pile_params.get(pile_id)
+        return params['start_time'] if params else None
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .Snapshot import StationSnapshot
+
+# 会话中随时间变化的字段，只随其他变化一起推送，客户端按功率自行外推
+SESSION_PROGRESS_FIELDS = ('charged', 'cost')
+
+# 连接建立时告诉浏览器断线后的重连间隔（毫秒）
+RETRY_FRAME = b'retry: 3000\n\n'
+# 心跳注释帧，保持连接并及时发现已断开的客户端
+KEEPALIVE_FRAME = b': keepalive\n\n'
+
+
+def compact_state(snapshot: StationSnapshot) -> Dict[str, Any]:
+    """
+    从快照提取推送给客户端的精简状态
+    :param snapshot: 状态快照
+    :return: {"piles": 充电桩状态, "queue": 排队号 -> 等候车辆, "sessions": 充电桩ID -> 充电会话}
+    """
+    piles = {}
+    sessions = {}
+    for pile_id, status in snapshot.piles.items():
+        connected = status['connected_vehicle']
+        piles[pile_id] = {
+            'status': status['status'],
+            'vehicle': connected['car_id'] if connected else None,
+            'queue': [vehicle['car_id'] for vehicle in status['charge_queue']],
+            'charging_count': status['charging_count'],
+            'total_duration': status['total_charging_duration'],
+            'total_energy': status['total_energy'],
+            'total_earnings': status['total_earnings']
+        }
+        if connected and snapshot.is_charging(pile_id):
+            params = snapshot.pile_params[pile_id]
+            session = params['session']
+            sessions[pile_id] = {
+                'car_id': connected['car_id'],
+                'charging_amount': connected.get('charging_amount'),
+                'start_time': params['start_time'],
+                'power': params['power'],
+                'rate': session.segment_rate if session is not None else None,
+                'segment_end': session.segment_end if session is not None else None,
+                'charged': round(snapshot.current_charging_amount(pile_id, snapshot.created_at), 2),
+                'cost': round(snapshot.current_charging_cost(pile_id, snapshot.created_at), 2)
+            }
+
+    queue = {}
+    for mode, entries in (('F', snapshot.queue_status['fast_queue']), ('T', snapshot.queue_status['slow_queue'])):
+        for entry in entries:
+            vehicle_info = entry['vehicle_info']
+            queue[entry['queue_number']] = {
+                'mode': mode,
+                'username': vehicle_info.get('username'),
+                'car_id': vehicle_info.get('car_id'),
+                'charging_amount': vehicle_info.get('charging_amount'),
+                'battery_capacity': vehicle_info.get('battery_capacity'),
+                'join_time': entry.get('join_time')
+            }
+    return {'piles': piles, 'queue': queue, 'sessions': sessions}
+
+
+def _session_key(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: value for name, value in session.items() if name not in SESSION_PROGRESS_FIELDS}
+
+
+def diff_states(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    计算两个精简状态之间的增量事件
+    :param old: 上一个状态（compact_state）
+    :param new: 新状态
+    :return: 事件列表，依次为离开/加入/修改等候区、调度到充电桩、充电桩状态变化和充电会话变化
+    """
+    events = []
+    old_queue, new_queue = old['queue'], new['queue']
+    for queue_number in old_queue.keys() - new_queue.keys():
+        events.append({'type': 'queue_leave', 'queue_number': queue_number, 'car_id': old_queue[queue_number]['car_id']})
+    for queue_number, entry in new_queue.items():
+        if queue_number not in old_queue:
+            events.append({'type': 'queue_join', 'queue_number': queue_number, **entry})
+        elif old_queue[queue_number] != entry:
+            events.append({'type': 'queue_update', 'queue_number': queue_number, **entry})
+
+    # 调度决策：车辆出现在充电桩队列中，附带它在等候区的排队号
+    queue_numbers = {entry['car_id']: queue_number for queue_number, entry in old_queue.items()}
+    for pile_id, pile in new['piles'].items():
+        before = set(old['piles'].get(pile_id, {}).get('queue', []))
+        for car_id in pile['queue']:
+            if car_id not in before:
+                events.append({'type': 'dispatch', 'pile_id': pile_id, 'car_id': car_id,
+                               'queue_number': queue_numbers.get(car_id)})
+
+    for pile_id, pile in new['piles'].items():
+        old_pile = old['piles'].get(pile_id, {})
+        changes = {name: value for name, value in pile.items() if old_pile.get(name) != value}
+        if changes:
+            events.append({'type': 'pile', 'pile_id': pile_id, 'changes': changes})
+
+    old_sessions, new_sessions = old['sessions'], new['sessions']
+    for pile_id in old_sessions.keys() - new_sessions.keys():
+        events.append({'type': 'session', 'pile_id': pile_id, 'active': False})
+    for pile_id, session in new_sessions.items():
+        previous = old_sessions.get(pile_id)
+        if previous is None or _session_key(previous) != _session_key(session):
+            events.append({'type': 'session', 'pile_id': pile_id, 'active': True, **session})
+    return events
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    """
+    编码一条Server-Sent Events消息
+    :param event: 事件名称
+    :param data: 数据（编码为一行JSON）
+    :param event_id: 事件编号，浏览器重连时通过Last-Event-ID带回
+    :return: 消息字节串
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class EventFeed:
+    """
+    所有订阅者共享的事件环形缓冲区
+    每条消息只编码一次，订阅者只记录自己读到的编号，发布和读取都不随订阅者数量增加复制数据；
+    落后超过缓冲区容量的订阅者需要重新获取全量状态
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: 缓冲的消息条数
+        """
+        self.capacity = capacity
+        self._frames: Deque[Tuple[int, bytes]] = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._last_id = 0
+        self._floor = 0  # 已被挤出缓冲区的最大编号
+        self._waiters: Dict[asyncio.Future, asyncio.AbstractEventLoop] = {}  # 异步订阅者
+        self.published = 0
+        self.subscribers = 0
+
+    @property
+    def last_id(self) -> int:
+        """最新消息的编号"""
+        return self._last_id
+
+    def publish(self, frame_id: int, data: bytes) -> None:
+        """
+        发布一条消息并唤醒所有等待的订阅者
+        :param frame_id: 消息编号，必须递增
+        :param data: 已编码的消息
+        """
+        with self._condition:
+            if len(self._frames) == self.capacity:
+                self._floor = self._frames[0][0]
+            self._frames.append((frame_id, data))
+            self._last_id = frame_id
+            self.published += 1
+            self._condition.notify_all()
+            waiters, self._waiters = self._waiters, {}
+        for future, loop in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+    def read(self, after: int) -> Optional[List[Tuple[int, bytes]]]:
+        """
+        读取编号大于after的消息
+        :param after: 订阅者已读到的编号
+        :return: (编号, 消息) 列表；所需的消息已被挤出缓冲区时返回None
+        """
+        with self._condition:
+            if after < self._floor:
+                return None
+            frames = []
+            for frame in reversed(self._frames):
+                if frame[0] <= after:
+                    break
+                frames.append(frame)
+        frames.reverse()
+        return frames
+
+    def wait(self, after: int, timeout: float) -> None:
+        """阻塞等待编号大于after的消息，最多timeout秒"""
+        with self._condition:
+            if self._last_id <= after:
+                self._condition.wait(timeout)
+
+    async def wait_async(self, after: int, timeout: float) -> None:
+        """在事件循环中等待编号大于after的消息，最多timeout秒，不占用线程"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._condition:
+            if self._last_id > after:
+                return
+            self._waiters[future] = loop
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                self._waiters.pop(future, None)
+
+    def subscribe(self) -> None:
+        with self._condition:
+            self.subscribers += 1
+
+    def unsubscribe(self) -> None:
+        with self._condition:
+            self.subscribers -= 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓冲区状态"""
+        with self._condition:
+            return {
+                'subscribers': self.subscribers,
+                'published': self.published,
+                'buffered': len(self._frames),
+                'capacity': self.capacity,
+                'last_id': self._last_id
+            }
+
+
+class StationFeed:
+    """
+    充电站状态推送
+    调度器每发布一个快照，计算与上一个快照的增量事件并编码为一条SSE消息（编号为快照版本）写入共享缓冲区；
+    订阅者连接时先收到全量状态（snapshot事件），之后只收到增量（delta事件）
+    """
+
+    def __init__(self, scheduler, capacity: int = 1024, keepalive: float = 15):
+        """
+        在调度器启动前创建，保证不遗漏快照
+        :param scheduler: 调度器
+        :param capacity: 缓冲的增量消息条数
+        :param keepalive: 没有新消息时发送心跳的间隔（秒）
+        """
+        self.scheduler = scheduler
+        self.feed = EventFeed(capacity)
+        self.keepalive = keepalive
+        self._state = compact_state(scheduler.get_snapshot())
+        scheduler.add_snapshot_listener(self._on_snapshot)
+
+    def _on_snapshot(self, snapshot: StationSnapshot) -> None:
+        """快照监听器，在调度线程中执行"""
+        state = compact_state(snapshot)
+        events = diff_states(self._state, state)
+        self._state = state
+        if events:
+            data = {'version': snapshot.version, 'time': snapshot.created_at, 'events': events}
+            self.feed.publish(snapshot.version, format_event('delta', data, snapshot.version))
+
+    def snapshot_frame(self) -> Tuple[int, bytes]:
+        """
+        当前全量状态消息
+        :return: (快照版本, 消息)
+        """
+        snapshot = self.scheduler.get_snapshot()
+        data = {'version': snapshot.version, 'time': snapshot.created_at, 'state': compact_state(snapshot)}
+        return snapshot.version, format_event('snapshot', data, snapshot.version)
+
+    def _next(self, cursor: Optional[int]) -> Tuple[int, bytes]:
+        """
+        订阅者读到cursor之后需要发送的数据
+        :param cursor: 已发送的最后一个编号，为None时从全量状态开始
+        :return: (新的编号, 数据)
+        """
+        if cursor is not None and cursor <= max(self.feed.last_id, self.scheduler.get_snapshot().version):
+            frames = self.feed.read(cursor)
+            if frames is not None:
+                if not frames:
+                    return cursor, b''
+                return frames[-1][0], b''.join(data for _, data in frames)
+        # 首次连接、落后太多或编号来自重启之前，重新发送全量状态
+        return self.snapshot_frame()
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[bytes]:
+        """
+        同步订阅（WSGI方式），每个订阅者占用一个线程
+        :param last_event_id: 浏览器重连时带回的编号
+        """
+        self.feed.subscribe()
+        try:
+            cursor, data = self._next(last_event_id)
+            yield RETRY_FRAME + data
+            while True:
+                self.feed.wait(cursor, self.keepalive)
+                cursor, data = self._next(cursor)
+                yield data or KEEPALIVE_FRAME
+        finally:
+            self.feed.unsubscribe()
+
+    async def astream(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        异步订阅（ASGI方式），订阅者只占用一个等待中的Future
+        :param last_event_id: 浏览器重连时带回的编号
+        """
+        self.feed.subscribe()
+        try:
+            cursor, data = self._next(last_event_id)
+            yield RETRY_FRAME + data
+            while True:
+                await self.feed.wait_async(cursor, self.keepalive)
+                cursor, data = self._next(cursor)
+                yield data or KEEPALIVE_FRAME
+        finally:
+            self.feed.unsubscribe()
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取推送状态"""
+        return self.feed.get_stats()
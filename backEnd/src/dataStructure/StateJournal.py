@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_FILE = 'snapshot.json'
+LOG_FILE = 'commands.log'
+
+
+def _default(o: Any) -> Any:
+    """命令参数中的车辆和排队记录按其字典视图编码"""
+    to_json = getattr(o, 'to_json', None)
+    if to_json is not None:
+        return to_json()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StateJournal:
+    """
+    充电站状态的预写日志（WAL）和快照
+    - 调度线程执行命令前把命令（时刻、名称、参数）追加到日志文件，每次调度步骤也记录时刻；
+      按记录的时刻重放同样的操作序列即可得到同样的等候区、排队号、充电桩队列和充电会话
+    - 日志条数达到snapshot_interval时写入完整状态快照（先写临时文件再原子替换），然后清空日志
+    - 启动时加载最近的快照并重放其后的日志，进程崩溃时留下的不完整的最后一行被截掉
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 1000, fsync: bool = False):
+        """
+        :param directory: 快照和日志文件所在目录
+        :param snapshot_interval: 两次快照之间最多的日志条数
+        :param fsync: 每条日志是否等待写入磁盘（关闭时只保证进程退出不丢失，操作系统崩溃可能丢失最后几条）
+        """
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0  # 最后一条日志的序号
+        self._logged = 0  # 最近一次快照之后的日志条数
+        self._stats = {'appended': 0, 'snapshots': 0, 'failures': 0}
+
+    def open(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        加载快照和之后的日志，并打开日志文件准备追加
+        :return: (快照中的状态，没有快照时为None; 需要重放的日志记录列表)
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            state = None
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                self._seq = snapshot['seq']
+                state = snapshot['state']
+
+            records = []
+            self._file = open(self.log_path, 'a+b')
+            self._file.seek(0)
+            valid_size = 0
+            for line in self._file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("不完整的记录")
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # 进程崩溃时可能留下不完整的最后一行，之后的内容不可信
+                    print(f"忽略状态日志中损坏的记录: {line[:80]!r}")
+                    break
+                valid_size += len(line)
+                # 写入快照后、清空日志前退出时，日志中会留下快照已包含的记录
+                if record['seq'] > self._seq:
+                    records.append(record)
+                    self._seq = record['seq']
+            self._file.seek(valid_size)
+            self._file.truncate()
+            self._file.flush()
+            self._logged = len(records)
+            return state, records
+
+    def append(self, op: str, timestamp: float, **fields: Any) -> int:
+        """
+        追加一条日志
+        :param op: 操作类型（command、step等）
+        :param timestamp: 执行操作时的时钟时间戳
+        :param fields: 操作参数
+        :return: 日志序号
+        """
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("状态日志未打开")
+            self._seq += 1
+            record = {'seq': self._seq, 'op': op, 'time': timestamp, **fields}
+            line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=_default) + '\n'
+            try:
+                self._file.write(line.encode('utf-8'))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except Exception:
+                self._stats['failures'] += 1
+                raise
+            self._logged += 1
+            self._stats['appended'] += 1
+            return self._seq
+
+    def needs_snapshot(self) -> bool:
+        """日志条数是否达到需要写入快照的数量"""
+        return self._logged >= self.snapshot_interval
+
+    def write_snapshot(self, state: Dict[str, Any]) -> None:
+        """
+        写入包含目前所有日志效果的完整状态，然后清空日志（由调度线程在两次操作之间调用）
+        :param state: 当前状态（可JSON编码）
+        """
+        with self._lock:
+            temp_path = self.snapshot_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'seq': self._seq, 'time': time.time(), 'state': state}, f,
+                          ensure_ascii=False, separators=(',', ':'), default=_default)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+            if self._file is not None:
+                self._file.seek(0)
+                self._file.truncate()
+                self._file.flush()
+            self._logged = 0
+            self._stats['snapshots'] += 1
+
+    def close(self) -> None:
+        """关闭日志文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取日志状态"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'seq': self._seq,
+                'pending_records': self._logged,
+                'snapshot_interval': self.snapshot_interval,
+                'fsync': self.fsync
+            })
+            return stats
@@ -0,0 +1,183 @@
+import bisect
+from datetime import datetime, timedelta, time as dt_time
+from typing import List, Tuple
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+class TariffSchedule:
+    """
+    分时电价表
+    预先计算一天内的电价分界点和从零点起的累计"电价×时长"，
+    按功率恒定积分时逐段解析计算，复杂度与跨越的电价分界点数量成正比，分界点处精确
+    """
+
+    def __init__(self, periods: List[Tuple[dt_time, dt_time, float]], default_rate: float = 0.4):
+        """
+        初始化电价表
+        :param periods: 电价时段列表，每个元素为(开始时间, 结束时间, 电价)，结束时间早于开始时间表示跨零点
+        :param default_rate: 未被任何时段覆盖的时间使用的电价
+        """
+        # 把时段展开为一天内 [开始秒, 结束秒) 的区间
+        intervals = []
+        for start, end, rate in periods:
+            start_second = start.hour * 3600 + start.minute * 60 + start.second
+            end_second = end.hour * 3600 + end.minute * 60 + end.second
+            if end_second <= start_second:
+                intervals.append((start_second, SECONDS_PER_DAY, rate))
+                intervals.append((0, end_second, rate))
+            else:
+                intervals.append((start_second, end_second, rate))
+
+        # 所有分界点，相邻分界点之间电价不变
+        points = sorted({0, SECONDS_PER_DAY} | {s for s, _, _ in intervals} | {e for _, e, _ in intervals})
+        self.boundaries: List[int] = points[:-1]  # 各段开始秒
+        self.rates: List[float] = []
+        for segment_start in self.boundaries:
+            rate = default_rate
+            for start_second, end_second, period_rate in intervals:
+                if start_second <= segment_start < end_second:
+                    rate = period_rate
+                    break
+            self.rates.append(rate)
+
+        # 合并电价相同的相邻段
+        merged_boundaries, merged_rates = [], []
+        for boundary, rate in zip(self.boundaries, self.rates):
+            if merged_rates and merged_rates[-1] == rate:
+                continue
+            merged_boundaries.append(boundary)
+            merged_rates.append(rate)
+        self.boundaries, self.rates = merged_boundaries, merged_rates
+
+        # 从零点到各段开始的累计 电价×秒
+        self._cumulative = [0.0]
+        for index, rate in enumerate(self.rates):
+            segment_end = self.boundaries[index + 1] if index + 1 < len(self.boundaries) else SECONDS_PER_DAY
+            self._cumulative.append(self._cumulative[-1] + rate * (segment_end - self.boundaries[index]))
+
+    def _rate_seconds_until(self, second_of_day: float) -> float:
+        """从零点到一天内指定秒数的累计 电价×秒"""
+        index = bisect.bisect_right(self.boundaries, second_of_day) - 1
+        return self._cumulative[index] + self.rates[index] * (second_of_day - self.boundaries[index])
+
+    def rate_at(self, timestamp: float) -> float:
+        """
+        获取指定时刻的电价
+        :param timestamp: 时间戳
+        :return: 电价(元/度)
+        """
+        dt = datetime.fromtimestamp(timestamp)
+        second_of_day = dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6
+        return self.rates[bisect.bisect_right(self.boundaries, second_of_day) - 1]
+
+    def integrate(self, start: float, end: float, power: float) -> Tuple[float, float]:
+        """
+        计算恒定功率充电在一段时间内的电量和电费
+        :param start: 开始时间戳
+        :param end: 结束时间戳
+        :param power: 充电功率（度/小时）
+        :return: (总电量, 总费用)
+        """
+        if end <= start:
+            return 0.0, 0.0
+
+        # 按本地日期逐日累加，每天只做两次二分查找
+        rate_seconds = 0.0
+        day = datetime.fromtimestamp(start).replace(hour=0, minute=0, second=0, microsecond=0)
+        current = start
+        while current < end:
+            day_start = day.timestamp()
+            next_day = day + timedelta(days=1)
+            day_end = min(next_day.timestamp(), end)
+            rate_seconds += (self._rate_seconds_until(min(day_end - day_start, SECONDS_PER_DAY))
+                             - self._rate_seconds_until(min(current - day_start, SECONDS_PER_DAY)))
+            current = day_end
+            day = next_day
+
+        total_energy = power * (end - start) / 3600.0
+        total_cost = power * rate_seconds / 3600.0
+        return total_energy, total_cost
+
+    def next_boundary(self, timestamp: float) -> float:
+        """
+        获取指定时刻之后的第一个电价分界点
+        :param timestamp: 时间戳
+        :return: 下一个分界点的时间戳（严格大于timestamp）
+        """
+        day = datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+        second_of_day = timestamp - day.timestamp()
+        index = bisect.bisect_right(self.boundaries, second_of_day)
+        if index < len(self.boundaries):
+            return day.timestamp() + self.boundaries[index]
+        return (day + timedelta(days=1)).timestamp()
+
+
+class SessionMeter:
+    """
+    充电会话计量器
+    记录上一个检查点之前累计的电量和电费，以及检查点所在电价时段的电价和结束时刻；
+    advance只从检查点向前推进并在电价分界点滚动，peek在当前时段内O(1)计算实时电量和电费且不修改状态
+    """
+    __slots__ = ('tariff', 'power', 'start_time', 'checkpoint_time', 'energy', 'cost', 'segment_rate', 'segment_end')
+
+    def __init__(self, tariff: TariffSchedule, power: float, start_time: float):
+        """
+        初始化计量器
+        :param tariff: 分时电价表
+        :param power: 充电功率（度/小时）
+        :param start_time: 会话开始时间戳
+        """
+        self.tariff = tariff
+        self.power = power
+        self.start_time = start_time
+        self.checkpoint_time = start_time  # 检查点时刻
+        self.energy = 0.0  # 检查点之前的累计电量（度）
+        self.cost = 0.0  # 检查点之前的累计电费（元）
+        self._enter_segment(start_time)
+
+    def _enter_segment(self, timestamp: float) -> None:
+        """记录timestamp所在电价时段的电价和结束时刻"""
+        self.segment_rate = self.tariff.rate_at(timestamp)
+        self.segment_end = self.tariff.next_boundary(timestamp)
+
+    def advance(self, now: float) -> None:
+        """
+        将检查点推进到指定时刻，跨越电价分界点时逐段累计
+        :param now: 当前时间戳
+        """
+        while self.checkpoint_time < now:
+            segment_end = min(now, self.segment_end)
+            energy = self.power * (segment_end - self.checkpoint_time) / 3600.0
+            self.energy += energy
+            self.cost += energy * self.segment_rate
+            self.checkpoint_time = segment_end
+            if segment_end >= self.segment_end:
+                self._enter_segment(segment_end)
+
+    def peek(self, now: float) -> Tuple[float, float]:
+        """
+        计算会话开始到指定时刻的电量和电费（不修改检查点）
+        :param now: 时间戳
+        :return: (电量, 电费)
+        """
+        if now < self.checkpoint_time:
+            # 早于检查点（例如自动结束时按预计完成时刻结算），从会话开始重新积分
+            return self.tariff.integrate(self.start_time, now, self.power)
+        if now <= self.segment_end:
+            energy = self.power * (now - self.checkpoint_time) / 3600.0
+            return self.energy + energy, self.cost + energy * self.segment_rate
+        energy, cost = self.tariff.integrate(self.checkpoint_time, now, self.power)
+        return self.energy + energy, self.cost + cost
+
+
+# 默认分时电价：谷时(0.4元/度) 23:00~次日7:00；平时(0.7元/度) 7:00~10:00, 15:00~18:00, 21:00~23:00；
+# 峰时(1.0元/度) 10:00~15:00, 18:00~21:00。所有充电桩共享
+DEFAULT_TARIFF = TariffSchedule([
+    (dt_time(23, 0), dt_time(7, 0), 0.4),
+    (dt_time(7, 0), dt_time(10, 0), 0.7),
+    (dt_time(15, 0), dt_time(18, 0), 0.7),
+    (dt_time(21, 0), dt_time(23, 0), 0.7),
+    (dt_time(10, 0), dt_time(15, 0), 1.0),
+    (dt_time(18, 0), dt_time(21, 0), 1.0),
+])
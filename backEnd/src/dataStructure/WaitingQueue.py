@@ -1,22 +1,178 @@
-from typing import List, Dict, Any, Tuple, Optional, Union
+from typing import List, Dict, Any, Tuple, Optional, Union, Iterator
 import itertools
 import time
+import numpy as np
+from .Clock import Clock, default_clock
+from .Assignment import solve_assignment
+from .Records import QueueEntry, to_json
+
+
+class IndexedQueue:
+    """
+    带索引的等候队列
+    按加入顺序保存排队记录（QueueEntry，兼容{'queue_number', 'vehicle_info', 'join_time'}字典），
+    同时维护 排队号码 -> 记录 和 车辆ID -> 排队号码 两个索引，按号码/车辆查找和移除都是O(1)；
+    兼容原来列表的len、遍历、下标读取/赋值和切片
+    """
 
-class Queue:
     def __init__(self):
-        self.fast_queue = []  # 快充队列
-        self.slow_queue = []  # 慢充队列
+        self._entries: Dict[str, Dict[str, Any]] = {}  # 排队号码 -> 记录（字典保持插入顺序）
+        self._car_index: Dict[str, str] = {}  # 车辆ID -> 排队号码
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._entries.values()))
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, entry: Dict[str, Any]) -> bool:
+        return self._entries.get(entry.get('queue_number')) is entry
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            if index.step is None and (index.start or 0) >= 0 and (index.stop is None or index.stop >= 0):
+                return list(itertools.islice(self._entries.values(), index.start, index.stop))
+            return list(self._entries.values())[index]
+        if index < 0:
+            index += len(self._entries)
+        if not 0 <= index < len(self._entries):
+            raise IndexError("队列下标越界")
+        return next(itertools.islice(self._entries.values(), index, None))
+
+    def __setitem__(self, index: int, entry: Dict[str, Any]) -> None:
+        old_entry = self[index]
+        if entry['queue_number'] == old_entry['queue_number']:
+            # 同一排队号码原地替换，保持顺序
+            self._unindex_car(old_entry)
+            self._entries[entry['queue_number']] = entry
+            self._car_index[entry['vehicle_info']['car_id']] = entry['queue_number']
+            return
+        entries = list(self._entries.values())
+        entries[index] = entry
+        self.clear()
+        for item in entries:
+            self.append(item)
+
+    def __repr__(self) -> str:
+        return repr(list(self._entries.values()))
+
+    def _unindex_car(self, entry: Dict[str, Any]) -> None:
+        car_id = entry['vehicle_info']['car_id']
+        if self._car_index.get(car_id) == entry['queue_number']:
+            del self._car_index[car_id]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """在队尾加入排队记录"""
+        self._entries[entry['queue_number']] = entry
+        self._car_index[entry['vehicle_info']['car_id']] = entry['queue_number']
+
+    def remove(self, entry: Dict[str, Any]) -> None:
+        """移除排队记录，不存在时抛出ValueError（与list.remove一致）"""
+        if self.pop_by_queue_number(entry['queue_number']) is None:
+            raise ValueError("排队记录不在队列中")
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:
+        """按下标移除并返回排队记录"""
+        entry = self[index]
+        self.remove(entry)
+        return entry
+
+    def pop_by_queue_number(self, queue_number: str) -> Optional[Dict[str, Any]]:
+        """
+        按排队号码移除排队记录
+        :param queue_number: 排队号码
+        :return: 被移除的记录，不存在时返回None
+        """
+        entry = self._entries.pop(queue_number, None)
+        if entry is not None:
+            self._unindex_car(entry)
+        return entry
+
+    def get(self, queue_number: str) -> Optional[Dict[str, Any]]:
+        """按排队号码查找排队记录"""
+        return self._entries.get(queue_number)
+
+    def find_by_car_id(self, car_id: str) -> Optional[Dict[str, Any]]:
+        """按车辆ID查找排队记录"""
+        queue_number = self._car_index.get(car_id)
+        return self._entries.get(queue_number) if queue_number is not None else None
+
+    def clear(self) -> None:
+        """清空队列"""
+        self._entries.clear()
+        self._car_index.clear()
+
+
+class Queue:
+    def __init__(self, clock: Optional[Clock] = None):
+        """
+        初始化等候区
+        :param clock: 时钟，为None时使用默认时钟
+        """
+        self.clock = clock if clock is not None else default_clock
+        self.fast_queue = IndexedQueue()  # 快充队列
+        self.slow_queue = IndexedQueue()  # 慢充队列
         self.fast_counter = 1  # 快充序号计数器
         self.slow_counter = 1  # 慢充序号计数器
         self.max_capacity = 10  # 最大容量
+        # 叫号阈值：同类型充电桩空位数达到阈值时才叫号，为None时取已注册的该类型充电桩数量
+        self.dispatch_thresholds: Dict[str, Optional[int]] = {'F': None, 'T': None}
+        self._pile_counts: Dict[str, int] = {}  # 充电桩类型 -> 已注册的充电桩数量
         self.charging_piles = {}  # 充电桩信息字典
+        self._pile_car_ids: Dict[str, List[str]] = {}  # 充电桩ID -> 该桩队列中的车辆ID
+        self._charging_car_counts: Dict[str, int] = {}  # 车辆ID -> 所在充电桩队列数
+
+    def _get_current_time(self) -> float:
+        """获取当前时间戳（自动考虑时间加速、模拟时间和仿真虚拟时间）"""
+        return self.clock.now()
 
     def register_charging_pile(self, pile_info: Dict[str, Any]):
         """
         注册充电桩信息
         :param pile_info: 充电桩信息
         """
+        if pile_info['pile_id'] not in self.charging_piles:
+            category = pile_info['charging_category']
+            self._pile_counts[category] = self._pile_counts.get(category, 0) + 1
         self.charging_piles[pile_info['pile_id']] = pile_info
+        self._index_pile_vehicles(pile_info)
+
+    def get_dispatch_threshold(self, charge_type: str) -> int:
+        """
+        获取叫号阈值
+        :param charge_type: 'F' 表示快充，'T' 表示慢充
+        :return: 同类型充电桩空位数达到该值时才从等候区叫号
+        """
+        threshold = self.dispatch_thresholds.get(charge_type)
+        if threshold is None:
+            threshold = self._pile_counts.get(charge_type, 0)
+        return threshold
+
+    def _index_pile_vehicles(self, pile_info: Dict[str, Any]) -> None:
+        """更新 车辆ID -> 充电桩 的索引（只处理该充电桩的队列，队列长度有上限）"""
+        pile_id = pile_info['pile_id']
+        for car_id in self._pile_car_ids.pop(pile_id, []):
+            self._charging_car_counts[car_id] -= 1
+            if self._charging_car_counts[car_id] == 0:
+                del self._charging_car_counts[car_id]
+
+        car_ids = []
+        if pile_info.get('connected_vehicle'):
+            car_ids.append(pile_info['connected_vehicle']['car_id'])
+        queue_vehicles = pile_info.get('queue_vehicles', [])
+        if isinstance(queue_vehicles, list):
+            for vehicle in queue_vehicles:
+                # 故障调度时队列中可能是等候区的排队记录
+                car_id = vehicle.get('car_id') or vehicle.get('vehicle_info', {}).get('car_id')
+                if car_id is not None:
+                    car_ids.append(car_id)
+        car_ids = list(dict.fromkeys(car_ids))
+        for car_id in car_ids:
+            self._charging_car_counts[car_id] = self._charging_car_counts.get(car_id, 0) + 1
+        self._pile_car_ids[pile_id] = car_ids
 
     def calculate_total_charging_time(self, vehicles: List[Dict], piles: List[Dict]) -> float:
         """
@@ -41,18 +197,12 @@ class Queue:
         if not vehicles or not available_piles:
             return []
 
-        # 生成所有可能的分配方案
-        pile_permutations = list(itertools.permutations(available_piles, len(vehicles)))
-        min_total_time = float('inf')
-        optimal_allocation = []
+        # 代价矩阵：车辆i在充电桩j上的充电时间
+        amounts = np.array([vehicle['vehicle_info']['charging_amount'] for vehicle in vehicles], dtype=float)
+        powers = np.array([pile['power'] for pile in available_piles], dtype=float)
+        assignment = solve_assignment(amounts[:, None] / powers[None, :])
 
-        for pile_perm in pile_permutations:
-            total_time = self.calculate_total_charging_time(vehicles, list(pile_perm))
-            if total_time < min_total_time:
-                min_total_time = total_time
-                optimal_allocation = list(zip(vehicles, pile_perm))
-
-        return optimal_allocation
+        return [(vehicles[row], available_piles[col]) for row, col in assignment]
 
     def schedule_vehicles(self) -> Dict[str, List[Tuple[Dict, Dict]]]:
         """
@@ -70,12 +220,12 @@ class Queue:
         slow_empty_slots = sum(pile['available_slots'] for pile in slow_piles)
 
         # 如果快充电桩空位的数量大于等于整个系统快充电桩数目，则在等候队列中获取小于等于该数目的快充请求的车辆
-        if fast_empty_slots >= 2:
+        if fast_empty_slots >= self.get_dispatch_threshold('F'):
             fast_vehicles = self.fast_queue[:fast_empty_slots]
         else:
             fast_vehicles = []
         # 如果慢充电桩空位的数量大于等于系统慢充电桩数目，则在等候队列中获取小于等于该数目的慢充请求的车辆
-        if slow_empty_slots >= 3:
+        if slow_empty_slots >= self.get_dispatch_threshold('T'):
             slow_vehicles = self.slow_queue[:slow_empty_slots]
         else:
             slow_vehicles = []
@@ -97,64 +247,46 @@ class Queue:
 
     def _allocate_vehicles(self, vehicles: List[Dict], piles: List[Dict]) -> List[Tuple[Dict, Dict]]:
         """
-        根据最短总时间原则分配车辆到充电桩
+        根据最短总时间原则分配车辆到充电桩（最小代价指派）
+        每个充电桩按空位数展开为多列，第k列表示该充电桩本批次中倒数第k个进入队列的位置：
+        车辆排在倒数第k位时，它的充电时间会计入自己和排在它后面的k-1辆车的完成时长，
+        因此代价为 充电桩已有队列的充电时间 + k × 车辆在该桩上的充电时间，各车辆完成时长之和即为总代价
         :param vehicles: 待分配车辆列表
         :param piles: 可用充电桩列表
-        :return: 分配方案，列表中的每个元素是(车辆, 充电桩)的元组
+        :return: 分配方案，列表中的每个元素是(车辆, 充电桩)的元组，同一充电桩上的车辆按进入队列的顺序排列
         """
         if not vehicles or not piles:
             return []
 
-        # 计算每个车辆在每个充电桩上的充电时间
-        charging_times = {}
-        for vehicle in vehicles:
-            charging_times[vehicle['queue_number']] = {}
-            for pile in piles:
-                # 计算当前充电桩的总充电时间（包括队列中其他车辆的充电时间）
-                total_time = 0
-                # 加上队列中其他车辆的充电时间
-                for queued_vehicle in pile.get('queue_vehicles', []):
-                    total_time += queued_vehicle['charging_amount'] / pile['power']
-                # 加上当前车辆的充电时间
-                total_time += vehicle['vehicle_info']['charging_amount'] / pile['power']
-                charging_times[vehicle['queue_number']][pile['pile_id']] = total_time
-
-        # 使用匈牙利算法找到最优分配方案
-        allocation = self._hungarian_algorithm(charging_times, piles)
-        
-        # 转换为(车辆, 充电桩)元组列表
-        result = []
-        for vehicle in vehicles:
-            if vehicle['queue_number'] in allocation:
-                pile_id = allocation[vehicle['queue_number']]
-                pile = next(p for p in piles if p['pile_id'] == pile_id)
-                result.append((vehicle, pile))
-        
-        return result
+        # 展开列：(充电桩下标, 倒数位置k)
+        column_piles = []
+        column_positions = []
+        for pile_index, pile in enumerate(piles):
+            for position in range(1, pile['available_slots'] + 1):
+                column_piles.append(pile_index)
+                column_positions.append(position)
+        if not column_piles:
+            return []
+        column_piles = np.array(column_piles)
+        column_positions = np.array(column_positions, dtype=float)
 
-    def _hungarian_algorithm(self, costs: Dict[str, Dict[str, float]], piles: List[Dict]) -> Dict[str, str]:
-        """
-        使用匈牙利算法求解最优分配方案
-        :param costs: 成本矩阵，格式为 {车辆ID: {充电桩ID: 充电时间}}
-        :param piles: 充电桩列表
-        :return: 最优分配方案，格式为 {车辆ID: 充电桩ID}
-        """
-        # 简化的匈牙利算法实现
-        allocation = {}
-        used_piles = set()
-        
-        # 对每个车辆，选择充电时间最短的可用充电桩
-        for vehicle_id, pile_costs in costs.items():
-            # 按充电时间排序
-            sorted_piles = sorted(pile_costs.items(), key=lambda x: x[1])
-            # 找到第一个未使用的充电桩
-            for pile_id, _ in sorted_piles:
-                if pile_id not in used_piles:
-                    allocation[vehicle_id] = pile_id
-                    used_piles.add(pile_id)
-                    break
-        
-        return allocation
+        # 各充电桩已有队列的充电时间（小时），优先使用充电桩维护的剩余电量总和
+        powers = np.array([pile['power'] for pile in piles], dtype=float)
+        backlogs = np.array([
+            pile['queued_amount'] if 'queued_amount' in pile
+            else sum(queued_vehicle['charging_amount'] for queued_vehicle in pile.get('queue_vehicles', []))
+            for pile in piles
+        ], dtype=float) / powers
+        amounts = np.array([vehicle['vehicle_info']['charging_amount'] for vehicle in vehicles], dtype=float)
+
+        # 代价矩阵 (车辆数 × 列数)
+        cost_matrix = (backlogs[column_piles][None, :]
+                       + column_positions[None, :] * amounts[:, None] / powers[column_piles][None, :])
+        assignment = solve_assignment(cost_matrix)
+
+        # 同一充电桩上倒数位置大的车辆先进入队列，位置相同时保持等候区顺序
+        assignment.sort(key=lambda item: (-column_positions[item[1]], item[0]))
+        return [(vehicles[row], piles[column_piles[col]]) for row, col in assignment]
 
     def is_full(self):
         """检查等候区是否已满"""
@@ -166,17 +298,8 @@ class Queue:
         :param car_id: 车辆ID
         :return: 是否在队列中
         """
-        # 检查快充队列
-        for vehicle in self.fast_queue:
-            if vehicle['vehicle_info']['car_id'] == car_id:
-                return True
-        
-        # 检查慢充队列
-        for vehicle in self.slow_queue:
-            if vehicle['vehicle_info']['car_id'] == car_id:
-                return True
-        
-        return False
+        return (self.fast_queue.find_by_car_id(car_id) is not None
+                or self.slow_queue.find_by_car_id(car_id) is not None)
 
     def is_vehicle_charging(self, car_id: str) -> bool:
         """
@@ -184,22 +307,14 @@ class Queue:
         :param car_id: 车辆ID
         :return: 是否正在充电
         """
-        for pile in self.charging_piles.values():
-            if pile['connected_vehicle'] and pile['connected_vehicle']['car_id'] == car_id:
-                return True
-            # 检查充电队列中的车辆
-            queue_vehicles = pile.get('queue_vehicles', [])
-            if isinstance(queue_vehicles, list):
-                for vehicle in queue_vehicles:
-                    if vehicle['car_id'] == car_id:
-                        return True
-        return False
+        # 注册充电桩信息时维护的索引，包含正在充电和在充电桩队列中的车辆
+        return car_id in self._charging_car_counts
 
     def add_vehicle(self, charge_type: str, vehicle_info: Dict) -> str:
         """
         添加车辆到等待队列
         :param charge_type: 'F' 表示快充，'T' 表示慢充
-        :param vehicle_info: 车辆信息字典
+        :param vehicle_info: 车辆信息字典（转换为车辆记录保存）
         :return: 分配的排队号码
         """
         if self.is_full():
@@ -215,31 +330,43 @@ class Queue:
 
         if charge_type == 'F':
             queue_number = f"F{self.fast_counter}"
-            # 使用调度器的时间函数，自动考虑时间加速和模拟时间
-            from ..component.Server.controller import scheduler
-            
-            self.fast_queue.append({
-                'queue_number': queue_number,
-                'vehicle_info': vehicle_info,
-                'join_time': scheduler.get_current_time()  # 添加加入时间，使用调度器时间
-            })
+            # 添加加入时间，使用调度器时间
+            self.fast_queue.append(QueueEntry(queue_number, vehicle_info, self._get_current_time()))
             self.fast_counter += 1
             return queue_number
         elif charge_type == 'T':
             queue_number = f"T{self.slow_counter}"
-            # 导入调度器用于获取正确的时间
-            from ..component.Server.controller import scheduler
-            
-            self.slow_queue.append({
-                'queue_number': queue_number,
-                'vehicle_info': vehicle_info,
-                'join_time': scheduler.get_current_time()  # 添加加入时间，使用调度器时间
-            })
+            # 添加加入时间，使用调度器时间
+            self.slow_queue.append(QueueEntry(queue_number, vehicle_info, self._get_current_time()))
             self.slow_counter += 1
             return queue_number
         else:
             raise ValueError("无效的充电类型")
 
+    def get_state(self) -> Dict[str, Any]:
+        """
+        可JSON编码的等候区状态（用于状态快照和恢复）：排队记录和排队号计数器
+        容量和叫号阈值属于配置，不包含在内
+        """
+        return {
+            'fast_queue': [to_json(entry) for entry in self.fast_queue],
+            'slow_queue': [to_json(entry) for entry in self.slow_queue],
+            'fast_counter': self.fast_counter,
+            'slow_counter': self.slow_counter
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        从get_state返回的状态恢复等候区
+        :param state: 等候区状态
+        """
+        for queue, entries in ((self.fast_queue, state['fast_queue']), (self.slow_queue, state['slow_queue'])):
+            queue.clear()
+            for entry in entries:
+                queue.append(QueueEntry(entry['queue_number'], entry['vehicle_info'], entry['join_time']))
+        self.fast_counter = state['fast_counter']
+        self.slow_counter = state['slow_counter']
+
     def remove_vehicle(self, queue_number: str) -> Optional[Dict[str, Any]]:
         """
         从队列中移除车辆
@@ -247,13 +374,9 @@ class Queue:
         :return: 被移除的车辆信息
         """
         if queue_number.startswith('F'):
-            for i, vehicle in enumerate(self.fast_queue):
-                if vehicle['queue_number'] == queue_number:
-                    return self.fast_queue.pop(i)
+            return self.fast_queue.pop_by_queue_number(queue_number)
         elif queue_number.startswith('T'):
-            for i, vehicle in enumerate(self.slow_queue):
-                if vehicle['queue_number'] == queue_number:
-                    return self.slow_queue.pop(i)
+            return self.slow_queue.pop_by_queue_number(queue_number)
         return None
 
     def get_queue_status(self) -> Dict:
@@ -262,8 +385,8 @@ class Queue:
         :return: 包含快充和慢充队列信息的字典
         """
         return {
-            'fast_queue': self.fast_queue,
-            'slow_queue': self.slow_queue,
+            'fast_queue': list(self.fast_queue),
+            'slow_queue': list(self.slow_queue),
             'total_vehicles': len(self.fast_queue) + len(self.slow_queue)
         }
         
@@ -275,14 +398,10 @@ class Queue:
         """
         # 检查快充队列
         if queue_number.startswith('F'):
-            for vehicle in self.fast_queue:
-                if vehicle['queue_number'] == queue_number:
-                    return vehicle
+            return self.fast_queue.get(queue_number)
         # 检查慢充队列
         elif queue_number.startswith('T'):
-            for vehicle in self.slow_queue:
-                if vehicle['queue_number'] == queue_number:
-                    return vehicle
+            return self.slow_queue.get(queue_number)
         return None
         
     def change_charge_mode(self, queue_number: str, new_mode: str) -> Optional[Dict[str, Any]]:
@@ -311,19 +430,11 @@ class Queue:
         if new_mode == 'F':
             new_queue_number = f"F{self.fast_counter:03d}"
             self.fast_counter += 1
-            self.fast_queue.append({
-                'queue_number': new_queue_number,
-                'vehicle_info': vehicle['vehicle_info'],
-                'join_time': vehicle['join_time']
-            })
+            self.fast_queue.append(QueueEntry(new_queue_number, vehicle['vehicle_info'], vehicle['join_time']))
         else:
             new_queue_number = f"T{self.slow_counter:03d}"
             self.slow_counter += 1
-            self.slow_queue.append({
-                'queue_number': new_queue_number,
-                'vehicle_info': vehicle['vehicle_info'],
-                'join_time': vehicle['join_time']
-            })
+            self.slow_queue.append(QueueEntry(new_queue_number, vehicle['vehicle_info'], vehicle['join_time']))
             
         # 返回更新后的车辆信息
         return self.find_vehicle_by_queue_number(new_queue_number)
@@ -395,6 +506,10 @@ class Queue:
                     target_pile['queue_vehicles'] = []
                 target_pile['queue_vehicles'].append(vehicle)
                 
+        # 充电桩队列已变化，更新车辆索引
+        for pile in same_type_piles:
+            self._index_pile_vehicles(pile)
+                
         return {
             "status": True,
             "msg": f"已完成{len(rescheduled_vehicles)}辆车的优先级调度",
@@ -489,6 +604,10 @@ class Queue:
                     target_pile['queue_vehicles'] = []
                 target_pile['queue_vehicles'].append(vehicle)
                 
+        # 充电桩队列已变化，更新车辆索引
+        for pile in same_type_piles:
+            self._index_pile_vehicles(pile)
+                
         return {
             "status": True,
             "msg": f"已完成{len(rescheduled_vehicles)}辆车的时间顺序调度",
@@ -580,6 +699,10 @@ class Queue:
                     target_pile['queue_vehicles'] = []
                 target_pile['queue_vehicles'].append(vehicle)
                 
+        # 充电桩队列已变化，更新车辆索引
+        for pile in same_type_piles:
+            self._index_pile_vehicles(pile)
+                
         return {
             "status": True,
             "msg": f"充电桩{recovered_pile_id}恢复后，已完成{len(rescheduled_vehicles)}辆车的重新调度",
@@ -25,6 +25,14 @@ export const useLoginServer = defineStore("loginServer", () => {
         },
     });
 
+    // 携带登录令牌
+    server.interceptors.request.use((config) => {
+        if (userStore.token) {
+            config.headers.Authorization = `Bearer ${userStore.token}`;
+        }
+        return config;
+    });
+
     /**
      * 登录函数
      * @param {User} user - 用户对象
@@ -57,6 +65,10 @@ export const useLoginServer = defineStore("loginServer", () => {
             oldPassword,
             newPassword
         });
+        // 修改密码后旧令牌失效，使用新令牌
+        if (res.data.status && res.data.token) {
+            userStore.token = res.data.token;
+        }
         return /** @type {LoginResponse} */ (res.data);
     };
 
@@ -86,8 +98,19 @@ export const useLoginServer = defineStore("loginServer", () => {
         return res.data;
     };
 
+    /**
+     * 退出登录，注销当前令牌
+     * @returns {Promise<LoginResponse>}
+     */
+    const logout = async () => {
+        const res = await server.post("logout");
+        userStore.setUser('', '', '');
+        return /** @type {LoginResponse} */ (res.data);
+    };
+
     return {
         login,
+        logout,
         register,
         changePassword,
         getUserCars,
@@ -19,6 +19,14 @@ export const useChargingServer = defineStore("chargingServer", () => {
         },
     });
 
+    // 携带登录令牌
+    serverApi.interceptors.request.use((config) => {
+        if (userStore.token) {
+            config.headers.Authorization = `Bearer ${userStore.token}`;
+        }
+        return config;
+    });
+
     /**
      * 获取队列状态
      * @returns {Promise<{status: boolean, msg: string, data: Object}>}
@@ -109,12 +117,15 @@ export const useChargingServer = defineStore("chargingServer", () => {
     };
 
     /**
-     * 获取充电详单列表
+     * 获取充电详单列表（按生成时间倒序分页）
      * @param {string} username - 可选，按用户名筛选
-     * @returns {Promise<{status: boolean, msg: string, data: Array}>}
+     * @param {string} cursor - 可选，上一页返回的next_cursor
+     * @returns {Promise<{status: boolean, msg: string, data: Array, next_cursor: string|null}>}
      */
-    const getChargingBills = async (username) => {
-        const params = username ? { username } : {};
+    const getChargingBills = async (username, cursor) => {
+        const params = {};
+        if (username) params.username = username;
+        if (cursor) params.cursor = cursor;
         const res = await serverApi.get("bills", { params });
         return res.data;
     };
@@ -151,9 +162,27 @@ export const useChargingServer = defineStore("chargingServer", () => {
         return res.data;
     };
 
+    /**
+     * 订阅充电站状态推送（Server-Sent Events），代替轮询状态接口
+     * 连接后先收到snapshot（全量状态），之后每次状态变化收到delta（增量事件列表），断线后浏览器自动重连
+     * @param {Object} handlers - { onSnapshot(data), onDelta(data) }
+     * @returns {EventSource} 调用close()取消订阅
+     */
+    const subscribeStationEvents = ({ onSnapshot, onDelta }) => {
+        // 推送内容与公开的状态接口相同，不携带令牌（URL中的令牌会出现在访问日志中）
+        const source = new EventSource(`${serverApi.defaults.baseURL}events`);
+        if (onSnapshot) {
+            source.addEventListener("snapshot", (e) => onSnapshot(JSON.parse(e.data)));
+        }
+        if (onDelta) {
+            source.addEventListener("delta", (e) => onDelta(JSON.parse(e.data)));
+        }
+        return source;
+    };
+
     /**
      * 获取充电报表数据（管理员）
-     * @param {string} type - 报表类型：'day', 'week', 'month'
+     * @param {string} type - 报表类型：'hour', 'day', 'week', 'month'
      * @param {string} startDate - 可选，开始日期
      * @returns {Promise<{status: boolean, msg: string, data: Array}>}
      */
@@ -257,6 +286,7 @@ export const useChargingServer = defineStore("chargingServer", () => {
         toggleChargingPile,
         getAdminPileStatus,
         getWaitingVehicles,
+        subscribeStationEvents,
         getChargingReports,
         setPileFault,
         repairPile,
@@ -4,12 +4,14 @@ export const mainStore = defineStore('main', {
   state: () => ({
     username: '',
     role: '',
+    token: '',
   }),
   getters: {},
   actions: {
-    setUser(username, role) {
+    setUser(username, role, token = '') {
       this.username = username;
       this.role = role;
+      this.token = token;
     },
     isLogin() {
       if (this.username === '') return false;
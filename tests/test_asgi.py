@@ -0,0 +1,175 @@
+import sys
+import os
+import unittest
+import asyncio
+import json
+import time
+import threading
+from concurrent.futures import Future
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, Response, jsonify, request, stream_with_context, g
+from backEnd.src.component.asgi import AsgiApp
+from backEnd.src.component.aio import run_command
+
+
+async def call(app, method, path, body=b'', query=b'', headers=None):
+    """模拟ASGI服务器发送一个请求，返回 (状态码, 响应头, 响应体)"""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': headers or [], 'http_version': '1.1', 'scheme': 'http',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1234), 'root_path': ''
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    status = sent[0]['status']
+    response_headers = dict(sent[0]['headers'])
+    return status, response_headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+class FakeScheduler:
+    """在另一个线程中完成命令的调度器"""
+    command_timeout = 1
+
+    def submit(self, command, **params):
+        future = Future()
+        threading.Timer(0.05, future.set_result, args=({'status': True, 'command': command, **params},)).start()
+        return future
+
+
+class TestAsgiApp(unittest.TestCase):
+    """测试ASGI适配器"""
+
+    def setUp(self):
+        flask_app = Flask(__name__)
+        self.closed = []
+
+        @flask_app.before_request
+        def before():
+            g.user = request.headers.get('X-User')
+
+        @flask_app.after_request
+        def after(response):
+            response.headers['X-Handled'] = '1'
+            return response
+
+        @flask_app.route('/sleep')
+        async def sleep():
+            await asyncio.sleep(0.2)
+            return jsonify({"status": True})
+
+        @flask_app.route('/echo', methods=['POST'])
+        async def echo():
+            return jsonify({"data": request.get_json(), "user": g.user, "q": request.args.get('q')})
+
+        @flask_app.route('/sync')
+        def sync_view():
+            return "sync"
+
+        @flask_app.route('/command')
+        async def command():
+            return jsonify(await run_command(FakeScheduler(), 'leave_queue', queue_number='F1'))
+
+        @flask_app.route('/stream')
+        async def stream():
+            def generate():
+                for i in range(3):
+                    yield f"{i}:{request.args.get('q')};"
+            response = Response(stream_with_context(generate()))
+            response.call_on_close(lambda: self.closed.append(True))
+            return response
+
+        @flask_app.route('/events')
+        async def events():
+            async def generate():
+                try:
+                    while True:
+                        yield 'data: tick\n\n'
+                        await asyncio.sleep(0.01)
+                finally:
+                    self.closed.append('events')
+            return Response(generate(), mimetype='text/event-stream')
+
+        @flask_app.route('/error')
+        async def error():
+            raise RuntimeError("boom")
+
+        self.app = AsgiApp(flask_app)
+
+    def test_concurrent_async_views(self):
+        """并发的异步视图在同一个事件循环中交替执行"""
+        async def run():
+            return await asyncio.gather(*[call(self.app, 'GET', '/sleep') for _ in range(20)])
+
+        start = time.time()
+        results = asyncio.run(run())
+        elapsed = time.time() - start
+        self.assertTrue(all(status == 200 for status, _, _ in results), "所有请求应成功")
+        self.assertLess(elapsed, 1.0, "20个各等待0.2秒的请求应并发完成")
+
+    def test_request_hooks_and_body(self):
+        """请求体、查询参数、请求头以及before/after_request钩子"""
+        status, headers, body = asyncio.run(call(
+            self.app, 'POST', '/echo', body=json.dumps({"a": 1}).encode(), query=b'q=%E5%BF%AB',
+            headers=[(b'content-type', b'application/json'), (b'x-user', b'alice')]))
+        self.assertEqual(status, 200, "请求应成功")
+        self.assertEqual(json.loads(body), {"data": {"a": 1}, "user": "alice", "q": "快"}, "应正确解析请求")
+        self.assertEqual(headers[b'x-handled'], b'1', "应执行after_request")
+
+    def test_sync_view_and_not_found(self):
+        """同步视图和不存在的路由"""
+        self.assertEqual(asyncio.run(call(self.app, 'GET', '/sync'))[2], b'sync', "同步视图应正常返回")
+        self.assertEqual(asyncio.run(call(self.app, 'GET', '/missing'))[0], 404, "不存在的路由应返回404")
+        self.assertEqual(asyncio.run(call(self.app, 'GET', '/error'))[0], 500, "未处理的异常应返回500")
+
+    def test_scheduler_command(self):
+        """调度器命令通过Future等待"""
+        status, _, body = asyncio.run(call(self.app, 'GET', '/command'))
+        self.assertEqual(json.loads(body), {"status": True, "command": "leave_queue", "queue_number": "F1"},
+                         "应返回命令执行结果")
+
+    def test_streaming_response(self):
+        """流式响应逐块发送，结束后执行清理"""
+        status, _, body = asyncio.run(call(self.app, 'GET', '/stream', query=b'q=x'))
+        self.assertEqual(body, b'0:x;1:x;2:x;', "应在请求上下文中生成所有块")
+        self.assertEqual(self.closed, [True], "响应结束后应执行call_on_close")
+
+    def test_async_stream_stops_on_disconnect(self):
+        """异步生成器响应体在事件循环中迭代，客户端断开后停止并关闭生成器"""
+        scope = {'type': 'http', 'method': 'GET', 'path': '/events', 'query_string': b'', 'headers': []}
+        sent = []
+
+        async def run():
+            requested = asyncio.Event()
+
+            async def receive():
+                if not requested.is_set():
+                    requested.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.sleep(0.1)
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+
+            await asyncio.wait_for(self.app(scope, receive, send), 1)
+
+        asyncio.run(run())
+        self.assertEqual(sent[0]['status'], 200, "应发送响应头")
+        self.assertGreater(len(sent), 3, "断开前应持续发送")
+        self.assertTrue(all(message['body'] == b'data: tick\n\n' for message in sent[1:]), "应逐块发送")
+        self.assertEqual(self.closed, ['events'], "断开后应关闭生成器")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import unittest
+import itertools
+import time
+
+import numpy as np
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.Assignment import solve_assignment
+from backEnd.src.dataStructure.WaitingQueue import Queue
+
+
+class TestAssignment(unittest.TestCase):
+    """测试最小代价指派求解的测试类"""
+
+    def _brute_force(self, cost):
+        """穷举求最小总代价"""
+        n, m = cost.shape
+        if n <= m:
+            return min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+        return min(sum(cost[p[j], j] for j in range(m)) for p in itertools.permutations(range(n), m))
+
+    def test_matches_brute_force(self):
+        """测试求解结果与穷举结果一致（包括行数多于列数的情况）"""
+        rng = np.random.default_rng(1)
+        for _ in range(100):
+            n, m = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+            cost = rng.random((n, m)) * 10
+            assignment = solve_assignment(cost)
+            self.assertEqual(len(assignment), min(n, m), "分配数量应为行数和列数的较小值")
+            self.assertEqual(len({col for _, col in assignment}), len(assignment), "每列最多分配一行")
+            total = sum(cost[row, col] for row, col in assignment)
+            self.assertAlmostEqual(total, self._brute_force(cost), places=9, msg="总代价应为最优")
+
+    def test_large_matrix(self):
+        """测试大规模代价矩阵可以快速求解"""
+        cost = np.random.default_rng(2).random((100, 200))
+        begin = time.time()
+        assignment = solve_assignment(cost)
+        self.assertEqual(len(assignment), 100, "每辆车都应被分配")
+        self.assertLess(time.time() - begin, 2.0, "100×200的指派问题应在2秒内完成")
+
+    def test_multiple_slots_per_pile(self):
+        """测试一个充电桩有多个空位时按队列位置计算代价"""
+        queue = Queue()
+        piles = [
+            {"pile_id": "A", "charging_category": "F", "power": 30, "available_slots": 2, "queue_vehicles": []},
+            {"pile_id": "B", "charging_category": "F", "power": 30, "available_slots": 2,
+             "queue_vehicles": [{"car_id": "car0", "charging_amount": 90}]}
+        ]
+        vehicles = [
+            {"queue_number": "F1", "vehicle_info": {"car_id": "car1", "charging_amount": 60}},
+            {"queue_number": "F2", "vehicle_info": {"car_id": "car2", "charging_amount": 30}}
+        ]
+
+        allocation = queue._allocate_vehicles(vehicles, piles)
+
+        # B已有3小时的排队时长，两辆车都排在空闲的A上（先充30度）总完成时长最短
+        self.assertEqual([pile["pile_id"] for _, pile in allocation], ["A", "A"], "两辆车都应分配到充电桩A")
+        self.assertEqual([vehicle["queue_number"] for vehicle, _ in allocation], ["F2", "F1"], "充电量小的车辆应先进入队列")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.BillArchive import (BillArchive, energy_by_tariff_period, open_archives,
+                                                   revenue_by_user, utilization_by_pile, write_month)
+from backEnd.src.dataStructure.Tariff import DEFAULT_TARIFF
+
+
+def make_bills(month_start, count, seed):
+    """生成一个月的随机详单"""
+    rng = random.Random(seed)
+    bills = []
+    for number in range(count):
+        start = month_start + timedelta(minutes=rng.randrange(0, 28 * 24 * 60))
+        duration = rng.choice([0, 30, 60, 240, 900])
+        amount = duration / 60 * 30
+        bills.append({
+            'bill_id': f"{seed}-{number:05d}",
+            'create_time': (start + timedelta(minutes=duration)).strftime("%Y-%m-%d %H:%M:%S"),
+            'pile_id': rng.choice('ABCDE'),
+            'vehicle_id': str(rng.randrange(1, 20)),
+            'username': f"user{rng.randrange(1, 8)}",
+            'charging_amount': amount,
+            'charging_duration': duration,
+            'start_time': start.strftime("%Y-%m-%d %H:%M:%S"),
+            'end_time': (start + timedelta(minutes=duration)).strftime("%Y-%m-%d %H:%M:%S"),
+            'charging_cost': round(amount * 0.7, 2),
+            'service_cost': round(amount * 0.8, 2),
+            'total_cost': round(amount * 1.5, 2)
+        })
+    return bills
+
+
+class TestBillArchive(unittest.TestCase):
+    """测试列式详单归档的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作：写入两个月的归档"""
+        self.directory = tempfile.mkdtemp()
+        self.june = make_bills(datetime(2025, 6, 1), 500, 1)
+        self.july = make_bills(datetime(2025, 7, 1), 300, 2)
+        write_month(self.directory, '2025-06', self.june)
+        write_month(self.directory, '2025-07', self.july)
+        self.archives = open_archives(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_columns_memory_mapped(self):
+        """测试列以内存映射方式打开，字符串列可还原"""
+        archive = self.archives[0]
+        self.assertEqual([a.month for a in self.archives], ['2025-06', '2025-07'], "应按月份打开归档")
+        self.assertEqual(len(archive), 500, "6月应有500条详单")
+        self.assertIsInstance(archive.column('total_cost'), np.memmap, "数值列应为内存映射")
+        self.assertEqual(archive.column('pile_id').dtype, np.int32, "字符串列应字典编码")
+        bill_ids = {bill['bill_id']: bill for bill in self.june}
+        first = archive.column('bill_id')[0].decode('ascii')
+        self.assertEqual(archive.decode('username')[0], bill_ids[first]['username'], "字典编码应能还原")
+
+    def test_group_aggregations(self):
+        """测试按充电桩和用户的汇总与逐条累加一致"""
+        bills = self.june + self.july
+        revenue = revenue_by_user(self.archives)
+        for username in {bill['username'] for bill in bills}:
+            expected = sum(bill['total_cost'] for bill in bills if bill['username'] == username)
+            self.assertAlmostEqual(revenue[username]['total_cost'], expected, places=6, msg="用户收入汇总错误")
+
+        piles = utilization_by_pile(self.archives)
+        minutes = (30 + 31) * 24 * 60
+        for pile_id in 'ABCDE':
+            pile_bills = [bill for bill in bills if bill['pile_id'] == pile_id]
+            self.assertEqual(piles[pile_id]['charging_count'], len(pile_bills), "充电次数汇总错误")
+            self.assertAlmostEqual(piles[pile_id]['utilization'],
+                                   sum(bill['charging_duration'] for bill in pile_bills) / minutes,
+                                   places=9, msg="利用率应为充电时长占两个月时长的比例")
+
+    def test_energy_by_tariff_period(self):
+        """测试按电价时段拆分的电量与逐条积分一致"""
+        energy = energy_by_tariff_period(self.archives)
+        self.assertEqual(sorted(energy), [0.4, 0.7, 1.0], "应按谷、平、峰三个电价拆分")
+        total = sum(bill['charging_amount'] for bill in self.june + self.july)
+        self.assertAlmostEqual(sum(energy.values()), total, places=6, msg="拆分后的电量之和应等于总电量")
+
+        expected_cost = 0.0
+        for bill in self.june + self.july:
+            start = datetime.strptime(bill['start_time'], "%Y-%m-%d %H:%M:%S").timestamp()
+            end = datetime.strptime(bill['end_time'], "%Y-%m-%d %H:%M:%S").timestamp()
+            if end > start:
+                expected_cost += DEFAULT_TARIFF.integrate(start, end, bill['charging_amount'] * 3600 / (end - start))[1]
+            else:
+                expected_cost += bill['charging_amount'] * DEFAULT_TARIFF.rate_at(start)
+        cost = sum(rate * amount for rate, amount in energy.items())
+        self.assertAlmostEqual(cost, expected_cost, places=6, msg="按时段电量计算的电费应与逐条积分一致")
+
+    def test_empty_month(self):
+        """测试没有详单的月份"""
+        path = write_month(self.directory, '2025-08', [])
+        archive = BillArchive(path)
+        self.assertEqual(len(archive), 0, "8月没有详单")
+        self.assertEqual(revenue_by_user(archive), {}, "空归档的汇总应为空")
+        self.assertEqual(sum(energy_by_tariff_period(archive).values()), 0, "空归档的电量应为0")
+
+
+if __name__ == "__main__":
+    unittest.main()
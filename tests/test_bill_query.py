@@ -0,0 +1,88 @@
+import sys
+import os
+import sqlite3
+import unittest
+from decimal import Decimal
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.BillQuery import (BILL_COLUMNS, MAX_PAGE_SIZE, build_bill_query, decode_cursor,
+                                                 encode_cursor, parse_fields, parse_limit, row_to_bill)
+
+
+class TestBillQuery(unittest.TestCase):
+    """测试详单游标分页查询的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作：用SQLite模拟charging_bills表"""
+        self.db = sqlite3.connect(':memory:')
+        self.db.execute(f"CREATE TABLE charging_bills ({', '.join(BILL_COLUMNS)})")
+        rows = []
+        for number in range(23):
+            # 每3条详单生成时间相同，检验同一时间的详单不会重复或遗漏
+            create_time = f"2025-06-15 08:{number // 3:02d}:00"
+            rows.append((f"bill-{number:03d}", create_time, 'A' if number % 2 else 'B', str(number),
+                         'user1' if number % 3 else 'user2', 10, 20, create_time, create_time, 1, 2, 3))
+        self.db.executemany(f"INSERT INTO charging_bills VALUES ({', '.join(['?'] * len(BILL_COLUMNS))})", rows)
+
+    def tearDown(self):
+        self.db.close()
+
+    def _fetch_all_pages(self, filters, fields, limit):
+        """按游标逐页读取所有详单"""
+        bills, cursor, pages = [], None, 0
+        while True:
+            sql, params, columns = build_bill_query(filters, fields, cursor, limit + 1)
+            rows = self.db.execute(sql.replace('%s', '?'), params).fetchall()
+            pages += 1
+            page = rows[:limit]
+            bills.extend(row_to_bill(columns, row, fields) for row in page)
+            if len(rows) <= limit:
+                return bills, pages
+            last = dict(zip(columns, page[-1]))
+            cursor = encode_cursor(last['create_time'], last['bill_id'])
+
+    def test_pages_cover_all_bills_in_order(self):
+        """测试逐页读取不重复、不遗漏，且按 (create_time, bill_id) 倒序"""
+        bills, pages = self._fetch_all_pages({}, ['bill_id', 'create_time'], 5)
+        expected = [row[0] for row in self.db.execute(
+            "SELECT bill_id FROM charging_bills ORDER BY create_time DESC, bill_id DESC")]
+        self.assertEqual([bill['bill_id'] for bill in bills], expected, "分页结果应与整体排序一致")
+        self.assertEqual(pages, 5, "23条详单每页5条应分5页")
+
+    def test_filters_and_projection(self):
+        """测试筛选条件和列投影"""
+        bills, _ = self._fetch_all_pages({'username': 'user2', 'pile_id': 'B'}, ['total_cost'], 2)
+        expected = self.db.execute(
+            "SELECT COUNT(*) FROM charging_bills WHERE username = 'user2' AND pile_id = 'B'").fetchone()[0]
+        self.assertEqual(len(bills), expected, "应只返回符合筛选条件的详单")
+        self.assertTrue(all(list(bill) == ['total_cost'] for bill in bills), "应只返回请求的列")
+
+    def test_cursor_round_trip(self):
+        """测试游标编码和解码"""
+        cursor = encode_cursor("2025-06-15 08:00:00", "bill-001")
+        self.assertEqual(decode_cursor(cursor), ("2025-06-15 08:00:00", "bill-001"), "游标应能还原分页键")
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_parse_arguments(self):
+        """测试参数校验"""
+        self.assertEqual(parse_fields(None), BILL_COLUMNS, "未指定fields时应返回所有列")
+        self.assertEqual(parse_fields("pile_id, total_cost,pile_id"), ['pile_id', 'total_cost'], "应去重并保持顺序")
+        with self.assertRaises(ValueError):
+            parse_fields("password")
+        self.assertEqual(parse_limit(None), 50, "默认每页50条")
+        self.assertEqual(parse_limit("100000"), MAX_PAGE_SIZE, "每页条数应有上限")
+        with self.assertRaises(ValueError):
+            parse_limit("abc")
+
+    def test_decimal_converted(self):
+        """测试Decimal转换为float"""
+        bill = row_to_bill(['total_cost', 'bill_id'], [Decimal('9.10'), 'bill-1'], ['total_cost'])
+        self.assertEqual(bill, {'total_cost': 9.1}, "Decimal应转换为float，且不返回未请求的分页键")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.BillWriter import BillWriter
+
+
+class FakeBillTable:
+    """模拟charging_bills表，按bill_id去重（相当于INSERT IGNORE），可模拟数据库故障"""
+
+    def __init__(self):
+        self.rows = {}
+        self.batches = []
+        self.available = True
+        self.lock = threading.Lock()
+
+    def write_batch(self, bills):
+        with self.lock:
+            if not self.available:
+                raise ConnectionError("数据库不可用")
+            self.batches.append(len(bills))
+            for bill in bills:
+                self.rows.setdefault(bill['bill_id'], bill)
+
+
+def make_bill(number):
+    return {'bill_id': f"bill-{number}", 'pile_id': 'A', 'total_cost': number}
+
+
+class TestBillWriter(unittest.TestCase):
+    """测试充电详单异步批量写入的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.directory = tempfile.mkdtemp()
+        self.spool_path = os.path.join(self.directory, 'spool', 'bills.jsonl')
+        self.table = FakeBillTable()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _writer(self, **kwargs):
+        options = {'batch_size': 10, 'flush_interval': 0.05, 'retry_interval': 0.05}
+        options.update(kwargs)
+        writer = BillWriter(self.table.write_batch, self.spool_path, **options)
+        writer.start()
+        return writer
+
+    def test_batched_write(self):
+        """测试详单按批写入并在写完后清空缓冲文件"""
+        writer = self._writer()
+        for number in range(25):
+            writer.submit(make_bill(number))
+        self.assertTrue(writer.flush(timeout=2), "应在超时前写完")
+        writer.stop()
+
+        self.assertEqual(len(self.table.rows), 25, "应写入25条详单")
+        self.assertLessEqual(max(self.table.batches), 10, "每批不应超过batch_size")
+        self.assertLess(len(self.table.batches), 25, "应批量写入而不是逐条写入")
+        self.assertEqual(os.path.getsize(self.spool_path), 0, "写完后缓冲文件应为空")
+
+    def test_database_outage(self):
+        """测试数据库故障期间详单保留，恢复后重试写入"""
+        self.table.available = False
+        writer = self._writer()
+        for number in range(5):
+            writer.submit(make_bill(number))
+        self.assertFalse(writer.flush(timeout=0.2), "数据库故障时不应写完")
+        self.assertGreater(writer.get_stats()['failures'], 0, "应记录写入失败")
+        self.assertEqual(writer.get_stats()['pending'], 5, "详单应保留在队列中")
+
+        self.table.available = True
+        self.assertTrue(writer.flush(timeout=2), "数据库恢复后应写完")
+        writer.stop()
+        self.assertEqual(len(self.table.rows), 5, "恢复后应写入全部详单")
+
+    def test_replay_spool_on_start(self):
+        """测试停止时未写入的详单在下次启动时重放"""
+        self.table.available = False
+        writer = self._writer()
+        for number in range(3):
+            writer.submit(make_bill(number))
+        writer.stop(timeout=0.2)
+        self.assertEqual(self.table.rows, {}, "数据库故障时不应写入")
+
+        self.table.available = True
+        writer = self._writer()
+        self.assertEqual(writer.get_stats()['replayed'], 3, "启动时应重放3条详单")
+        writer.submit(make_bill(3))
+        self.assertTrue(writer.flush(timeout=2), "应写完重放的和新的详单")
+        writer.stop()
+        self.assertEqual(sorted(self.table.rows), ['bill-0', 'bill-1', 'bill-2', 'bill-3'], "详单不应丢失")
+
+    def test_overflow_spills_to_file(self):
+        """测试内存队列满时详单只保存在缓冲文件中，之后从文件补写"""
+        self.table.available = False
+        writer = self._writer(max_queue=4, batch_size=3)
+        for number in range(11):
+            writer.submit(make_bill(number))
+        stats = writer.get_stats()
+        self.assertEqual(stats['pending'], 4, "内存队列不应超过上限")
+        self.assertEqual(stats['spilled'], 7, "超出的7条应只保存在缓冲文件中")
+
+        self.table.available = True
+        self.assertTrue(writer.flush(timeout=2), "恢复后应写完全部详单")
+        writer.stop()
+        self.assertEqual(len(self.table.rows), 11, "溢出的详单不应丢失")
+        self.assertEqual(os.path.getsize(self.spool_path), 0, "写完后缓冲文件应为空")
+
+    def test_corrupted_last_line(self):
+        """测试忽略崩溃时留下的不完整行"""
+        os.makedirs(os.path.dirname(self.spool_path))
+        with open(self.spool_path, 'w', encoding='utf-8') as f:
+            f.write('{"bill_id": "bill-0", "pile_id": "A", "total_cost": 0}\n{"bill_id": "bill-1", "pi')
+        writer = self._writer()
+        self.assertTrue(writer.flush(timeout=2), "应写完完整的详单")
+        writer.stop()
+        self.assertEqual(list(self.table.rows), ['bill-0'], "只应写入完整的详单")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -227,6 +227,40 @@ class TestChargingPile(unittest.TestCase):
         available_slots = self.fast_pile.get_available_slots()
         self.assertEqual(available_slots, 1, "可用槽位应为1")
 
+    def test_queue_backlog_accounting(self):
+        """测试充电桩队列剩余电量总和的增量维护"""
+        self.fast_pile.join_queue(self.vehicle1)  # 30度，开始充电
+        self.fast_pile.join_queue(self.vehicle2)  # 60度，排队
+        self.assertEqual(self.fast_pile.charge_queue.total_amount, 90, "队列剩余电量应为90度")
+        self.assertAlmostEqual(self.fast_pile.expected_finish_time(), self.fast_pile.start_time + 3 * 3600, places=3,
+                               msg="队列预计充完时刻应为开始时间后3小时")
+        self.assertAlmostEqual(self.fast_pile.calculate_total_time(self.vehicle2), 3, places=6, msg="车辆2总时长应为3小时")
+
+        # 修改正在充电车辆的请求量
+        self.fast_pile.update_charging_amount(45)
+        self.assertEqual(self.fast_pile.charge_queue.total_amount, 105, "修改请求量后剩余电量应同步更新")
+
+        # 断开后下一辆车开始充电
+        self.fast_pile.disconnect_vehicle()
+        self.assertEqual(self.fast_pile.charge_queue.total_amount, 60, "断开后应扣除该车辆的电量")
+        self.assertEqual(self.fast_pile.get_queue_info()["queued_amount"], 60, "队列信息应包含剩余电量")
+
+        self.fast_pile.charge_queue.clear()
+        self.assertEqual(self.fast_pile.charge_queue.total_amount, 0, "清空队列后剩余电量应为0")
+
+    def test_recent_bills_bounded(self):
+        """测试内存中只保留最近的充电详单，状态中只包含详单数量"""
+        pile = ChargingPile("A", "F", recent_bills=3)
+        bill_ids = []
+        for index in range(5):
+            pile.join_queue(dict(self.vehicle1, car_id=f"car{index}"))
+            bill_ids.append(pile.disconnect_vehicle()["bill"]["bill_id"])
+
+        self.assertEqual([bill["bill_id"] for bill in pile.get_charging_bills()], bill_ids[-3:], "应只保留最近3条详单")
+        status = pile.get_status()
+        self.assertEqual(status["bill_count"], 5, "状态中应包含详单总数")
+        self.assertNotIn("charging_bills", status, "状态中不应包含详单列表")
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
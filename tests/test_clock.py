@@ -0,0 +1,71 @@
+import sys
+import os
+import unittest
+import time
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.Clock import Clock, VirtualClock
+from backEnd.src.dataStructure.ChargerPile import ChargingPile
+from backEnd.src.dataStructure.WaitingQueue import Queue
+
+
+class TestClock(unittest.TestCase):
+    """测试可注入时钟的测试类"""
+
+    def test_real_time(self):
+        """测试默认使用真实时间"""
+        clock = Clock()
+        self.assertFalse(clock.is_using_simulated_time, "默认不应使用模拟时间")
+        self.assertAlmostEqual(clock.now(), time.time(), delta=1, msg="默认时间应为真实时间")
+
+    def test_simulated_time_with_speedup(self):
+        """测试模拟时间和时间加速"""
+        clock = Clock()
+        start = datetime(2025, 6, 1, 8, 0, 0).timestamp()
+        clock.set_simulation_time(start)
+        clock.set_time_speedup(3600)
+        time.sleep(0.01)
+        self.assertGreater(clock.now(), start + 30, "加速后模拟时间应快速前进")
+        self.assertLess(clock.now(), start + 3600, "模拟时间前进量应与加速倍数一致")
+
+        clock.reset_to_real_time()
+        self.assertAlmostEqual(clock.now(), time.time(), delta=1, msg="恢复后应使用真实时间")
+
+    def test_time_str_cached_per_second(self):
+        """测试同一秒内复用格式化的时间字符串"""
+        clock = VirtualClock(datetime(2025, 6, 1, 8, 0, 0).timestamp())
+        first = clock.get_current_time_str()
+        clock.advance_to(clock.now() + 0.5)
+        self.assertIs(clock.get_current_time_str(), first, "同一秒内应返回缓存的字符串")
+        clock.advance_to(clock.now() + 1)
+        self.assertEqual(clock.get_current_time_str(), "2025-06-01 08:00:01", "跨秒后应重新格式化")
+
+    def test_independent_stations(self):
+        """测试同一进程中的两个充电站使用各自的时钟"""
+        clock1 = VirtualClock(datetime(2025, 6, 1, 8, 0, 0).timestamp())
+        clock2 = VirtualClock(datetime(2025, 6, 2, 20, 0, 0).timestamp())
+        pile1 = ChargingPile("A", "F", clock=clock1)
+        pile2 = ChargingPile("A", "F", clock=clock2)
+        queue1 = Queue(clock=clock1)
+
+        vehicle1 = {"car_id": "car1", "username": "用户1", "charging_amount": 30}
+        vehicle2 = {"car_id": "car2", "username": "用户2", "charging_amount": 30}
+        pile1.join_queue(vehicle1)
+        pile2.join_queue(vehicle2)
+        queue1.add_vehicle("F", {"car_id": "car3", "username": "用户3", "charging_amount": 10})
+
+        self.assertEqual(pile1.start_time, clock1.now(), "充电桩1应使用时钟1")
+        self.assertEqual(pile2.start_time, clock2.now(), "充电桩2应使用时钟2")
+        self.assertEqual(queue1.fast_queue[0]["join_time"], clock1.now(), "等候区应使用注入的时钟")
+
+        clock1.advance_to(clock1.now() + 1800)
+        bill = pile1.disconnect_vehicle()["bill"]
+        self.assertEqual(bill["create_time"], "2025-06-01 08:30:00", "详单生成时间应来自注入的时钟")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.ConnectionPool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """模拟数据库连接，记录ping、回滚和关闭"""
+
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("连接已断开")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return "cursor-%d" % self.number
+
+
+class TestConnectionPool(unittest.TestCase):
+    """测试数据库连接池的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.created = []
+        self.pool = ConnectionPool(self._factory, max_size=2, acquire_timeout=0.2)
+
+    def _factory(self):
+        connection = FakeConnection(len(self.created))
+        self.created.append(connection)
+        return connection
+
+    def test_reuse_connection(self):
+        """测试close()归还连接后被复用"""
+        conn = self.pool.connection()
+        self.assertEqual(conn.cursor(), "cursor-0", "应代理原始连接的方法")
+        conn.close()
+        conn.close()  # 重复归还无效
+
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.number, 0, "应复用已归还的连接")
+        self.assertEqual(len(self.created), 1, "只应建立一个连接")
+        self.assertFalse(self.created[0].closed, "归还的连接不应被关闭")
+        self.assertEqual(self.created[0].rollbacks, 2, "每次归还都应回滚未提交的事务")
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['total_acquired'], 2, "应借出2次")
+        self.assertEqual(stats['idle'], 1, "应有1个空闲连接")
+        self.assertEqual(stats['in_use'], 0, "不应有借出的连接")
+
+    def test_bounded_and_timeout(self):
+        """测试连接数有上限，超时抛出异常并计入统计"""
+        first = self.pool.connection()
+        second = self.pool.connection()
+        self.assertEqual(self.pool.get_stats()['saturation'], 1.0, "连接全部借出时饱和度应为1")
+
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.connection(timeout=0.05)
+        self.assertEqual(self.pool.get_stats()['timeouts'], 1, "应记录1次超时")
+
+        # 另一个线程归还连接后，等待的线程可以拿到
+        releaser = threading.Timer(0.05, first.close)
+        releaser.start()
+        third = self.pool.connection(timeout=1)
+        releaser.join()
+        self.assertEqual(third.number, 0, "应拿到归还的连接")
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['total_waits'], 1, "应记录1次等待")
+        self.assertEqual(stats['peak_in_use'], 2, "同时借出的连接数不应超过上限")
+        self.assertEqual(len(self.created), 2, "不应建立超过上限的连接")
+        second.close()
+        third.close()
+
+    def test_health_check_replaces_dead_connection(self):
+        """测试空闲连接健康检查失败时重新建立"""
+        self.pool.health_check_interval = 0
+        conn = self.pool.connection()
+        conn.close()
+        self.created[0].alive = False
+        time.sleep(0.01)
+
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.number, 1, "健康检查失败后应建立新连接")
+        self.assertTrue(self.created[0].closed, "失效的连接应被关闭")
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['health_check_failures'], 1, "应记录1次健康检查失败")
+        self.assertEqual(stats['size'], 1, "连接数应保持为1")
+
+    def test_recycle_old_connection(self):
+        """测试超过存活时间的连接在归还时被关闭"""
+        self.pool.recycle_seconds = 0
+        conn = self.pool.connection()
+        time.sleep(0.01)
+        conn.close()
+        self.assertTrue(self.created[0].closed, "超过存活时间的连接应被关闭")
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['recycled'], 1, "应记录1次回收")
+        self.assertEqual(stats['size'], 0, "回收后连接数应为0")
+
+    def test_factory_failure_releases_slot(self):
+        """测试建立连接失败时释放名额"""
+        def failing_factory():
+            raise ConnectionError("无法连接数据库")
+        pool = ConnectionPool(failing_factory, max_size=1, acquire_timeout=0.05)
+        for _ in range(3):
+            with self.assertRaises(ConnectionError):
+                pool.connection()
+        self.assertEqual(pool.get_stats()['size'], 0, "建立失败不应占用名额")
+
+    def test_concurrent_borrow(self):
+        """测试多线程并发借还连接"""
+        pool = ConnectionPool(self._factory, max_size=3, acquire_timeout=5)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(50):
+                    with pool.connection() as conn:
+                        conn.cursor()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [], "并发借还不应出错")
+        stats = pool.get_stats()
+        self.assertEqual(stats['total_acquired'], 400, "应借出400次")
+        self.assertLessEqual(len(self.created), 3, "建立的连接数不应超过上限")
+        self.assertEqual(stats['in_use'], 0, "结束后所有连接都应归还")
+
+
+if __name__ == "__main__":
+    unittest.main()
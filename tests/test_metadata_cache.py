@@ -0,0 +1,95 @@
+import sys
+import os
+import unittest
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.MetadataCache import BulkTTLCache
+
+
+class TestBulkTTLCache(unittest.TestCase):
+    """测试批量加载缓存的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.now = 0.0
+        self.capacities = {str(car_id): 60 + car_id for car_id in range(1, 101)}
+        self.queries = []
+        self.cache = BulkTTLCache(self._load, ttl=60, max_entries=1000, clock=lambda: self.now)
+
+    def _load(self, keys):
+        """模拟一条 WHERE id IN (...) 查询"""
+        self.queries.append(list(keys))
+        return {key: self.capacities[key] for key in keys if key in self.capacities}
+
+    def test_single_round_trip(self):
+        """测试无论多少个键，未命中的键只查询一次"""
+        keys = [str(car_id) for car_id in range(1, 51)]
+        result = self.cache.get_many(keys + keys[:10])
+        self.assertEqual(len(result), 50, "应返回50辆车")
+        self.assertEqual(len(self.queries), 1, "50个未命中的键应只查询一次")
+        self.assertEqual(len(self.queries[0]), 50, "重复的键不应重复查询")
+
+        result = self.cache.get_many(str(car_id) for car_id in range(40, 61))
+        self.assertEqual(len(result), 21, "应返回21辆车")
+        self.assertEqual(self.queries[1], [str(car_id) for car_id in range(51, 61)], "只应查询未命中的键")
+        self.assertEqual(self.cache.get_stats()['loads'], 2, "应加载2次")
+
+    def test_missing_keys_cached(self):
+        """测试数据库中不存在的键也被缓存"""
+        self.assertIsNone(self.cache.get('999'), "不存在的车辆应返回None")
+        self.assertIsNone(self.cache.get('999'), "不存在的车辆应返回None")
+        self.assertEqual(len(self.queries), 1, "不存在的键在有效期内不应重复查询")
+
+    def test_ttl_expiry(self):
+        """测试过期后重新加载"""
+        self.assertEqual(self.cache.get('1'), 61, "应返回电池容量")
+        self.capacities['1'] = 80
+        self.now = 59
+        self.assertEqual(self.cache.get('1'), 61, "有效期内应返回缓存值")
+        self.now = 61
+        self.assertEqual(self.cache.get('1'), 80, "过期后应重新加载")
+        self.assertEqual(len(self.queries), 2, "过期后应查询一次")
+
+    def test_invalidate(self):
+        """测试失效后立即重新加载"""
+        self.assertIsNone(self.cache.get('101'), "车辆尚未添加")
+        self.capacities['101'] = 90
+        self.cache.invalidate('101')
+        self.assertEqual(self.cache.get('101'), 90, "失效后应加载到新添加的车辆")
+
+    def test_invalidate_during_load(self):
+        """测试加载期间键被失效时，加载到的旧值不写回缓存"""
+        def stale_loader(keys):
+            # 查询完成后、写回缓存前，另一个请求添加了车辆并使缓存失效
+            result = self._load(keys)
+            self.capacities['101'] = 90
+            self.cache.invalidate('101')
+            return result
+        self.cache.loader = stale_loader
+        self.assertIsNone(self.cache.get('101'), "加载时车辆尚未添加")
+        self.cache.loader = self._load
+        self.assertEqual(self.cache.get('101'), 90, "失效前的加载结果不应被缓存")
+        self.assertEqual(self.cache._generations, {}, "没有进行中的加载时应清空失效计数")
+
+    def test_loader_failure_not_cached(self):
+        """测试加载失败时不缓存"""
+        def failing_loader(keys):
+            raise ConnectionError("数据库不可用")
+        cache = BulkTTLCache(failing_loader, ttl=60)
+        with self.assertRaises(ConnectionError):
+            cache.get_many(['1'])
+        self.assertEqual(cache.get_stats()['size'], 0, "加载失败不应缓存")
+
+    def test_bounded_size(self):
+        """测试缓存条数不超过上限"""
+        cache = BulkTTLCache(self._load, ttl=60, max_entries=10, clock=lambda: self.now)
+        cache.get_many(str(car_id) for car_id in range(1, 31))
+        self.assertEqual(cache.get_stats()['size'], 10, "缓存条数不应超过上限")
+        self.assertEqual(cache.get_many(['30']), {'30': 90}, "应保留最近加载的条目")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import unittest
+import json
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backEnd.src.dataStructure.Records import VehicleRecord, QueueEntry
+from backEnd.src.dataStructure.ChargerPile import ChargingPile
+from backEnd.src.dataStructure.WaitingQueue import Queue
+
+
+class TestRecords(unittest.TestCase):
+    """测试车辆和排队记录"""
+
+    def setUp(self):
+        self.vehicle_info = {"car_id": "car1", "username": "用户1", "charging_amount": 30, "plate_number": "京A12345"}
+
+    def test_mapping_compatible(self):
+        """记录兼容字典的读写方式"""
+        vehicle = VehicleRecord.coerce(self.vehicle_info)
+        self.assertEqual(dict(vehicle), self.vehicle_info, "应能转换为等价的字典")
+        self.assertEqual(vehicle.get("plate_number"), "京A12345", "应保留附加字段")
+        self.assertNotIn("already_charged_amount", vehicle, "未设置的字段不应出现")
+        self.assertEqual(vehicle.get("already_charged_amount", 0.0), 0.0, "未设置的字段应返回默认值")
+
+        vehicle["already_charged_amount"] = 12.5
+        self.assertEqual(vehicle["already_charged_amount"], 12.5, "应能设置故障前已充电量")
+        del vehicle["already_charged_amount"]
+        self.assertNotIn("already_charged_amount", vehicle, "删除后字段不应出现")
+        with self.assertRaises(KeyError):
+            vehicle["already_charged_amount"]
+        self.assertIs(VehicleRecord.coerce(vehicle), vehicle, "已经是记录时应原样返回")
+
+    def test_identity_equality_and_cached_view(self):
+        """记录按身份比较，字典视图缓存到下一次修改"""
+        entry = QueueEntry("F1", self.vehicle_info, 100.0)
+        other = QueueEntry("F1", self.vehicle_info, 100.0)
+        self.assertEqual(entry, entry, "同一记录应相等")
+        self.assertNotEqual(entry, other, "内容相同的不同记录不应相等")
+
+        view = entry.to_json()
+        self.assertIs(entry.to_json(), view, "未修改时应返回缓存的视图")
+        self.assertEqual(json.loads(json.dumps(view))["vehicle_info"]["car_id"], "car1", "视图应可直接JSON编码")
+
+        entry["vehicle_info"]["charging_amount"] = 50
+        new_view = entry.to_json()
+        self.assertIsNot(new_view, view, "车辆记录修改后应生成新视图")
+        self.assertEqual(view["vehicle_info"]["charging_amount"], 30, "旧视图不应被修改")
+        self.assertEqual(new_view["vehicle_info"]["charging_amount"], 50, "新视图应包含修改后的值")
+
+    def test_queue_and_pile_use_records(self):
+        """等候区保存排队记录，充电桩队列按车辆ID判断是否在队列中"""
+        waiting_queue = Queue()
+        queue_number = waiting_queue.add_vehicle("F", self.vehicle_info)
+        entry = waiting_queue.find_vehicle_by_queue_number(queue_number)
+        self.assertIsInstance(entry, QueueEntry, "等候区应保存排队记录")
+        self.assertIsInstance(entry["vehicle_info"], VehicleRecord, "车辆信息应转换为车辆记录")
+
+        pile = ChargingPile("A", "F")
+        vehicle = entry["vehicle_info"]
+        pile.join_queue(vehicle)
+        self.assertIn("car1", pile.charge_queue, "应能按车辆ID判断是否在队列中")
+        self.assertIn(vehicle, pile.charge_queue, "应能按车辆记录判断是否在队列中")
+        self.assertIn("error", pile.join_queue(VehicleRecord.coerce(self.vehicle_info)), "同一车辆不能重复加入队列")
+
+        pile.disconnect_vehicle()
+        self.assertNotIn("car1", pile.charge_queue, "充电完成后车辆应离开队列")
+
+
+if __name__ == '__main__':
+    unittest.main()
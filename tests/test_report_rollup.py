@@ -0,0 +1,56 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.ReportRollup import format_period, mysql_week, rollup_rows
+
+
+class TestReportRollup(unittest.TestCase):
+    """测试报表汇总的测试类"""
+
+    def test_mysql_week(self):
+        """测试周数与MySQL DATE_FORMAT的%u一致"""
+        self.assertEqual(format_period(datetime(2025, 1, 1), 'week'), "2025-01", "2025年1月1日是周三，属于第1周")
+        self.assertEqual(format_period(datetime(2021, 1, 1), 'week'), "2021-00", "2021年1月1日是周五，属于第0周")
+        self.assertEqual(format_period(datetime(2021, 1, 4), 'week'), "2021-01", "2021年1月4日是第1周的周一")
+        self.assertEqual(format_period(datetime(2024, 12, 30), 'week'), "2024-53", "年末跨年的周不归入下一年")
+
+        # ISO周与%u的区别只在年初和年末
+        day = datetime(2019, 1, 1)
+        while day.year < 2027:
+            iso_year, iso_week, _ = day.isocalendar()
+            if iso_year == day.year:
+                self.assertEqual(mysql_week(day), iso_week, f"{day.date()}的周数应与ISO周一致")
+            day += timedelta(days=1)
+
+    def test_other_periods(self):
+        """测试小时、日、月时间段格式"""
+        dt = datetime(2025, 6, 15, 7, 20, 14)
+        self.assertEqual(format_period(dt, 'hour'), "2025-06-15 07", "小时时间段格式错误")
+        self.assertEqual(format_period(dt, 'day'), "2025-06-15", "日时间段格式错误")
+        self.assertEqual(format_period(dt, 'month'), "2025-06", "月时间段格式错误")
+
+    def test_rollup_rows(self):
+        """测试一批详单按粒度、时间段和充电桩汇总"""
+        bills = [
+            {'pile_id': 'A', 'start_time': '2025-06-15 06:10:14', 'charging_duration': 60, 'charging_amount': 30,
+             'charging_cost': 13.5, 'service_cost': 24, 'total_cost': 37.5},
+            {'pile_id': 'A', 'start_time': '2025-06-15 07:30:00', 'charging_duration': 30, 'charging_amount': 15,
+             'charging_cost': 10.5, 'service_cost': 12, 'total_cost': 22.5},
+            {'pile_id': 'E', 'start_time': '2025-06-15 06:20:14', 'charging_duration': 60, 'charging_amount': 7,
+             'charging_cost': 3.5, 'service_cost': 5.6, 'total_cost': 9.1},
+        ]
+        rows = {row[:3]: row[3:] for row in rollup_rows(bills)}
+        self.assertEqual(rows[('day', '2025-06-15', 'A')], (2, 90, 45, 24, 36, 60), "同一天同一充电桩应合并")
+        self.assertEqual(rows[('hour', '2025-06-15 06', 'A')][0], 1, "不同小时应分开统计")
+        self.assertEqual(rows[('month', '2025-06', 'E')], (1, 60, 7, 3.5, 5.6, 9.1), "月汇总错误")
+        self.assertEqual(len(rows), 5 + 4, "A在两个小时各一行、其他粒度各一行，E每个粒度一行")
+
+
+if __name__ == "__main__":
+    unittest.main()
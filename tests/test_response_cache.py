@@ -0,0 +1,110 @@
+import sys
+import os
+import unittest
+import json
+import threading
+from types import MappingProxyType
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backEnd.src.dataStructure import ResponseCache as response_cache_module
+from backEnd.src.dataStructure.ResponseCache import ResponseCache, dumps_json
+from backEnd.src.dataStructure.Records import QueueEntry
+
+
+class TestResponseCache(unittest.TestCase):
+    """测试按版本缓存的响应体"""
+
+    def test_encode_once_per_version(self):
+        """同一版本只构建和编码一次，版本变化后重新构建"""
+        cache = ResponseCache()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {"version": len(builds), "msg": "获取成功"}
+
+        first = cache.get(('pile', None), 'v1', build)
+        self.assertIs(cache.get(('pile', None), 'v1', build), first, "同一版本应返回缓存的字节串")
+        self.assertEqual(len(builds), 1, "同一版本只应构建一次")
+        self.assertEqual(json.loads(first), {"version": 1, "msg": "获取成功"}, "应编码为JSON")
+
+        cache.get(('pile', None), 'v2', build)
+        cache.get(('pile', 3), 'v2', build)
+        self.assertEqual(len(builds), 3, "版本或参数变化后应重新构建")
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 3, 2), "每个键只保留最新版本")
+
+    def test_single_flight_per_key(self):
+        """同一键的并发请求只构建一次，构建期间其他键的请求不被阻塞"""
+        cache = ResponseCache()
+        cache.get(('queue', None), 'v1', lambda: {"queue": 1})
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+
+        def slow_build():
+            builds.append(1)
+            started.set()
+            release.wait(5)
+            return {"pile": 1}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get(('pile', None), 'v1', slow_build)))
+                   for _ in range(3)]
+        threads[0].start()
+        self.assertTrue(started.wait(5), "第一个请求应开始构建")
+        for thread in threads[1:]:
+            thread.start()
+
+        # 其他键的命中和构建不等待正在进行的构建
+        self.assertEqual(json.loads(cache.get(('queue', None), 'v1', lambda: {})), {"queue": 1}, "其他键应直接命中")
+        self.assertEqual(json.loads(cache.get(('admin_pile', None), 'v1', lambda: {"admin": 1})), {"admin": 1},
+                         "其他键应能同时构建")
+        self.assertEqual(len(results), 0, "构建完成前同一键的请求应等待")
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(builds), 1, "同一键同一版本只应构建一次")
+        self.assertEqual(len(results), 3, "所有请求都应得到结果")
+        self.assertTrue(all(body is results[0] for body in results), "等待的请求应共享同一个响应体")
+
+    def test_build_failure_not_cached(self):
+        """构建失败时异常抛给调用方，之后的请求重新构建"""
+        cache = ResponseCache()
+
+        def failing_build():
+            raise RuntimeError("构建失败")
+        with self.assertRaises(RuntimeError):
+            cache.get('a', 'v1', failing_build)
+        self.assertEqual(json.loads(cache.get('a', 'v1', lambda: {"ok": True})), {"ok": True}, "应重新构建")
+        self.assertEqual(cache.get_stats()['building'], 0, "不应留下进行中的构建")
+
+    def test_eviction(self):
+        """超出容量时淘汰最久未使用的键"""
+        cache = ResponseCache(max_entries=2)
+        for key in ('a', 'b', 'a', 'c'):
+            cache.get(key, 'v1', lambda: {"key": key})
+        self.assertEqual(cache.get_stats()['evictions'], 1, "应淘汰一个键")
+        builds = []
+        cache.get('a', 'v1', lambda: builds.append(1) or {})
+        self.assertEqual(builds, [], "最近使用的键应保留")
+
+    def test_backends_agree(self):
+        """可选的orjson与标准库编码结果一致，记录和只读映射按字典编码"""
+        data = {
+            "b": [QueueEntry("F1", {"car_id": "car1", "username": "用户1", "charging_amount": 30}, 1.5)],
+            "a": MappingProxyType({"total": 0.1}),
+            "c": None
+        }
+        expected = {"a": {"total": 0.1}, "b": [{"queue_number": "F1", "join_time": 1.5,
+                    "vehicle_info": {"car_id": "car1", "username": "用户1", "charging_amount": 30}}], "c": None}
+        self.assertEqual(json.loads(dumps_json(data)), expected, "标准库编码结果应正确")
+        if response_cache_module.orjson is not None:
+            self.assertEqual(response_cache_module.dumps_orjson(data), dumps_json(data), "两种编码结果应相同")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import sys
 import os
 import unittest
 import time
+import threading
 from typing import Dict, List
 
 # 添加项目根目录到系统路径
@@ -334,6 +335,125 @@ class TestScheduler(unittest.TestCase):
         self.assertIsNotNone(slow_pile_with_vehicle, "应有1个慢充电桩有车辆")
         self.assertEqual(slow_pile_with_vehicle.charge_queue[0]["car_id"], self.fast_vehicle1["car_id"], "慢充电桩中的车辆ID应匹配")
 
+    def test_predict_finish_time(self):
+        """测试预计充电完成时刻的计算"""
+        # 空闲充电桩没有预计完成时刻
+        self.assertIsNone(self.scheduler._predict_finish_time(self.fast_pile_a), "空闲充电桩不应有预计完成时刻")
+        
+        self.fast_pile_a.join_queue(self.fast_vehicle1)  # 30度，快充需要1小时
+        start_time = self.fast_pile_a.start_time
+        self.assertAlmostEqual(self.scheduler._predict_finish_time(self.fast_pile_a), start_time + 3600, places=3,
+                               msg="预计完成时刻应为开始时间后1小时")
+        
+        # 已充电量应从剩余充电量中扣除
+        self.fast_vehicle1["already_charged_amount"] = 15
+        self.assertAlmostEqual(self.scheduler._predict_finish_time(self.fast_pile_a), start_time + 1800, places=3,
+                               msg="扣除已充电量后预计完成时刻应为开始时间后半小时")
+
+    def test_event_driven_auto_disconnect(self):
+        """测试事件驱动模式在预计完成时刻自动断开，而不是等待轮询间隔"""
+        saved_bills = []
+        self.scheduler.save_bill_func = saved_bills.append
+        self.scheduler.check_interval = 60  # 即使轮询间隔很长也应按时断开
+        self.scheduler.start()
+        try:
+            vehicle = {"car_id": "car9", "user_id": "user9", "username": "用户9", "battery_capacity": 100, "charging_amount": 0.005}
+            self.fast_pile_a.join_queue(vehicle)  # 快充0.005度约需0.6秒
+            self.scheduler.notify()
+            
+            deadline = time.time() + 3
+            while self.fast_pile_a.status == ChargingStatus.CHARGING and time.time() < deadline:
+                time.sleep(0.05)
+                
+            self.assertEqual(self.fast_pile_a.status, ChargingStatus.IDLE, "到达请求充电量后应自动断开")
+            self.assertEqual(len(saved_bills), 1, "应保存1条充电详单")
+        finally:
+            self.scheduler.stop()
+
+    def test_execute_commands_concurrently(self):
+        """测试多个请求线程并发提交命令时由调度线程串行执行"""
+        self.waiting_queue.max_capacity = 10
+        self.scheduler.start()
+        try:
+            results = []
+            errors = []
+
+            def submit(i):
+                try:
+                    vehicle = {"car_id": f"car{i}", "username": f"用户{i}", "charging_amount": 30}
+                    results.append(self.scheduler.execute('join_queue', charge_type="F", vehicle_info=vehicle))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=submit, args=(i,)) for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [], "并发提交命令不应出错")
+            queue_numbers = [r["data"]["queue_number"] for r in results if r["status"]]
+            self.assertEqual(len(queue_numbers), len(set(queue_numbers)), "排队号码不应重复")
+
+            # 所有车辆最多出现在一个位置（等候区或某个充电桩队列）
+            car_ids = [entry["vehicle_info"]["car_id"] for entry in self.waiting_queue.fast_queue]
+            for pile in self.charging_piles.values():
+                car_ids.extend(vehicle["car_id"] for vehicle in pile.charge_queue)
+            self.assertEqual(len(car_ids), len(set(car_ids)), "同一辆车不应被重复分配")
+            self.assertEqual(len(car_ids), len(queue_numbers), "加入成功的车辆都应在等候区或充电桩队列中")
+        finally:
+            self.scheduler.stop()
+
+    def test_execute_disconnect_command(self):
+        """测试断开命令返回详单并在调度器未运行时直接执行"""
+        self.fast_pile_a.join_queue(self.fast_vehicle1)
+        result = self.scheduler.execute('disconnect', pile_id="A")
+        self.assertTrue(result["status"], "断开命令应执行成功")
+        self.assertEqual(result["bill"]["vehicle_id"], "car1", "应返回充电详单")
+        self.assertEqual(self.fast_pile_a.status, ChargingStatus.IDLE, "断开后充电桩应空闲")
+
+        result = self.scheduler.execute('disconnect', pile_id="X")
+        self.assertFalse(result["status"], "不存在的充电桩应返回失败")
+
+        with self.assertRaises(ValueError):
+            self.scheduler.execute('unknown_command')
+
+    def test_snapshot_published_after_state_change(self):
+        """测试状态变化后发布新快照，旧快照内容保持不变"""
+        old_snapshot = self.scheduler.get_snapshot()
+        self.assertEqual(old_snapshot.queue_status["total_vehicles"], 0, "初始快照中等候区应为空")
+
+        self.scheduler.execute('join_queue', charge_type="F", vehicle_info=self.fast_vehicle1)
+        self.scheduler.step()
+        new_snapshot = self.scheduler.get_snapshot()
+
+        self.assertGreater(new_snapshot.version, old_snapshot.version, "快照版本号应递增")
+        self.assertEqual(old_snapshot.queue_status["total_vehicles"], 0, "旧快照不应被修改")
+        self.assertEqual(old_snapshot.piles["A"]["status"], "空闲", "旧快照中的充电桩状态不应被修改")
+        self.assertTrue(new_snapshot.is_charging("A"), "新快照中车辆应已分配到快充桩A")
+
+        # 修改充电桩上的车辆信息不影响已发布的快照
+        self.fast_pile_a.connected_vehicle["charging_amount"] = 50
+        self.assertEqual(new_snapshot.piles["A"]["connected_vehicle"]["charging_amount"], 30, "快照应复制车辆信息")
+
+    def test_snapshot_change_versions(self):
+        """测试快照记录每个充电桩和等候车辆最后一次变化的版本号"""
+        base = self.scheduler.get_snapshot().version
+        result = self.scheduler.execute('join_queue', charge_type="T", vehicle_info=self.slow_vehicle1)
+        queue_number = result["data"]["queue_number"]
+        joined = self.scheduler.get_snapshot()
+        self.assertEqual(joined.changed_piles(base), [], "加入排队不应改变充电桩状态")
+        self.assertEqual([e["queue_number"] for e in joined.changed_queue_entries(base)["slow_queue"]], [queue_number],
+                         "应返回新加入的车辆")
+        self.assertEqual(joined.changed_queue_entries(joined.version)["slow_queue"], [], "最新版本之后不应有变化")
+
+        self.scheduler.step()
+        dispatched = self.scheduler.get_snapshot()
+        self.assertEqual(dispatched.changed_piles(joined.version), ["C"], "只有分配到车辆的充电桩发生变化")
+        self.assertEqual(dispatched.removed_queue_numbers(joined.version), [queue_number], "应记录离开等候区的排队号")
+        self.assertTrue(dispatched.covers(base), "保留的记录应能计算增量")
+        self.assertFalse(dispatched.covers(dispatched.version + 1), "未来的版本号无法计算增量")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
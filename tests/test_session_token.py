@@ -0,0 +1,76 @@
+import sys
+import os
+import unittest
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.SessionToken import TokenSigner, TokenError
+
+
+class TestSessionToken(unittest.TestCase):
+    """测试签名会话令牌的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.now = 1000.0
+        self.signer = TokenSigner(b"test-secret", ttl=3600, clock=lambda: self.now)
+
+    def test_issue_and_verify(self):
+        """测试签发的令牌可以校验并携带用户信息"""
+        token = self.signer.issue(3, "用户1", "user")
+        claims = self.signer.verify(token)
+        self.assertEqual((claims['uid'], claims['sub'], claims['role']), (3, "用户1", "user"), "令牌应携带用户ID、用户名和角色")
+
+    def test_tampered_token(self):
+        """测试篡改载荷或使用其他密钥签名的令牌无效"""
+        token = self.signer.issue(3, "user1", "user")
+        forged = self.signer.issue(1, "admin", "admin").split('.')[0] + '.' + token.split('.')[1]
+        with self.assertRaises(TokenError):
+            self.signer.verify(forged)
+        with self.assertRaises(TokenError):
+            TokenSigner(b"other-secret").verify(token)
+        with self.assertRaises(TokenError):
+            self.signer.verify("not-a-token")
+        # 非ASCII字符的令牌应按格式错误处理，而不是抛出编码异常
+        for malformed in ("é.abc", "abc.签名", "用户.令牌"):
+            with self.assertRaises(TokenError):
+                self.signer.verify(malformed)
+
+    def test_expiry(self):
+        """测试令牌过期"""
+        token = self.signer.issue(3, "user1", "user")
+        self.now += 3599
+        self.signer.verify(token)
+        self.now += 1
+        with self.assertRaises(TokenError):
+            self.signer.verify(token)
+
+    def test_revoke(self):
+        """测试注销单个令牌，过期后从注销集合中清除"""
+        first = self.signer.issue(3, "user1", "user")
+        second = self.signer.issue(3, "user1", "user")
+        self.signer.revoke(self.signer.verify(first))
+        with self.assertRaises(TokenError):
+            self.signer.verify(first)
+        self.signer.verify(second)
+
+        self.now += 3600
+        self.signer.revoke(self.signer.verify(self.signer.issue(4, "user2", "user")))
+        self.assertEqual(self.signer.get_stats()['revoked'], 1, "过期的注销记录应被清除")
+
+    def test_revoke_user(self):
+        """测试修改密码后之前签发的令牌全部失效"""
+        old_token = self.signer.issue(3, "user1", "user")
+        other_user = self.signer.issue(4, "user2", "user")
+        self.now += 10
+        self.signer.revoke_user("user1")
+        with self.assertRaises(TokenError):
+            self.signer.verify(old_token)
+        self.signer.verify(other_user)
+        self.signer.verify(self.signer.issue(3, "user1", "user"))
+
+
+if __name__ == "__main__":
+    unittest.main()
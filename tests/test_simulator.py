@@ -0,0 +1,100 @@
+import sys
+import os
+import unittest
+import time
+import json
+import tempfile
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.Simulator import Simulator
+from backEnd.src.dataStructure.ChargerPile import ChargingStatus
+from backEnd.config.station_config import get_station_config
+
+
+class TestSimulator(unittest.TestCase):
+    """测试离散事件仿真器的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.start_time = datetime(2025, 6, 1, 0, 0, 0).timestamp()
+        self.simulator = Simulator.create(
+            {"A": "F", "B": "F", "C": "T", "D": "T", "E": "T"},
+            self.start_time
+        )
+
+    def test_single_session_uses_virtual_time(self):
+        """测试单次充电按虚拟时间完成"""
+        self.simulator.add_arrival(self.start_time + 60, "F", {"car_id": "car1", "username": "用户1", "charging_amount": 30})
+
+        summary = self.simulator.run()
+
+        self.assertEqual(summary["bill_count"], 1, "应生成1条充电详单")
+        bill = self.simulator.bills[0]
+        self.assertEqual(bill["charging_amount"], 30, "充电量应为30度")
+        self.assertEqual(bill["charging_duration"], 60, "快充30度应耗时60分钟")
+        self.assertEqual(bill["end_time"], "2025-06-01 01:01:00", "结束时间应为虚拟时间")
+        self.assertEqual(self.simulator.charging_piles[bill["pile_id"]].status, ChargingStatus.IDLE, "充电桩应恢复空闲")
+
+    def test_full_day_replays_quickly(self):
+        """测试一整天的到达和离开可以在1秒内回放完成"""
+        for i in range(200):
+            arrival = self.start_time + i * 420  # 每7分钟到达一辆车
+            charge_type = "F" if i % 2 == 0 else "T"
+            amount = 15 if charge_type == "F" else 7
+            self.simulator.add_arrival(arrival, charge_type, {"car_id": f"car{i}", "username": f"用户{i}", "charging_amount": amount})
+
+        begin = time.time()
+        summary = self.simulator.run()
+        elapsed = time.time() - begin
+
+        self.assertLess(elapsed, 1.0, "一天的仿真应在1秒内完成")
+        self.assertEqual(summary["served_vehicles"] + summary["rejected_vehicles"], 200, "每辆车都应被服务或拒绝")
+        self.assertGreater(summary["total_revenue"], 0, "总收入应大于0")
+
+    def test_fault_event_reschedules(self):
+        """测试仿真中的故障事件"""
+        self.simulator.add_arrival(self.start_time, "F", {"car_id": "car1", "username": "用户1", "charging_amount": 30})
+        self.simulator.add_fault(self.start_time + 1800, "A")
+        self.simulator.add_repair(self.start_time + 3600, "A")
+
+        summary = self.simulator.run()
+
+        self.assertGreaterEqual(summary["bill_count"], 1, "故障断开应生成充电详单")
+
+    def test_large_station_from_config(self):
+        """测试从配置文件创建200个充电桩的充电站并运行仿真"""
+        config_file = {
+            "waiting_area_size": 300,
+            "queue_length": 3,
+            "pile_groups": [
+                {"charging_category": "F", "count": 50, "prefix": "F", "power": 60},
+                {"charging_category": "T", "count": 150, "prefix": "T"}
+            ]
+        }
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+            json.dump(config_file, f)
+        try:
+            config = get_station_config(f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(len(config["piles"]), 200, "应展开200个充电桩")
+        simulator = Simulator.from_config(config, self.start_time)
+        self.assertEqual(simulator.charging_piles["F1"].power, 60, "应使用配置的功率")
+        self.assertEqual(simulator.charging_piles["T1"].power, 7, "未配置功率时应使用默认功率")
+        self.assertEqual(simulator.charging_piles["T1"].charge_queue.maxlen, 3, "应使用配置的队列长度")
+        self.assertEqual(simulator.waiting_queue.max_capacity, 300, "应使用配置的等候区大小")
+
+        for i in range(400):
+            charge_type = "F" if i % 2 == 0 else "T"
+            simulator.add_arrival(self.start_time + i * 30, charge_type, {"car_id": f"car{i}", "username": f"用户{i}", "charging_amount": 20})
+        summary = simulator.run()
+        self.assertEqual(summary["served_vehicles"], 400, "所有车辆都应被服务")
+
+
+if __name__ == "__main__":
+    unittest.main()
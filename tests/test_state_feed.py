@@ -0,0 +1,116 @@
+import sys
+import os
+import unittest
+import asyncio
+import json
+import threading
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backEnd.src.dataStructure.Scheduler import Scheduler
+from backEnd.src.dataStructure.ChargerPile import ChargingPile
+from backEnd.src.dataStructure.WaitingQueue import Queue
+from backEnd.src.dataStructure.StateFeed import EventFeed, StationFeed, KEEPALIVE_FRAME
+
+
+def parse_frames(data):
+    """解析SSE消息，返回 (事件名称, 编号, 数据) 列表"""
+    frames = []
+    for block in data.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith(':'))
+        if 'event' in fields:
+            frames.append((fields['event'], int(fields['id']), json.loads(fields['data'])))
+    return frames
+
+
+class TestStationFeed(unittest.TestCase):
+    """测试状态推送"""
+
+    def setUp(self):
+        self.waiting_queue = Queue()
+        self.charging_piles = {"A": ChargingPile("A", "F"), "C": ChargingPile("C", "T")}
+        for pile in self.charging_piles.values():
+            self.waiting_queue.register_charging_pile(pile.get_queue_info())
+        self.scheduler = Scheduler(self.waiting_queue, self.charging_piles)
+        self.station_feed = StationFeed(self.scheduler, capacity=4, keepalive=0.05)
+        self.vehicle = {"car_id": "car1", "username": "用户1", "charging_amount": 30, "battery_capacity": 60.0}
+
+    def test_deltas(self):
+        """加入排队、调度和开始充电产生对应的增量事件"""
+        result = self.scheduler.execute('join_queue', charge_type='F', vehicle_info=self.vehicle)
+        frames = self.station_feed.feed.read(0)
+        self.assertEqual(len(frames), 1, "加入排队应发布一条消息")
+        event, frame_id, data = parse_frames(frames[0][1])[0]
+        self.assertEqual((event, frame_id), ('delta', self.scheduler.get_snapshot().version), "编号应为快照版本")
+        self.assertEqual([e['type'] for e in data['events']], ['queue_join'], "应只包含加入排队事件")
+        self.assertEqual(data['events'][0]['queue_number'], result['data']['queue_number'], "应包含排队号")
+        self.assertEqual(data['events'][0]['battery_capacity'], 60.0, "应包含电池容量，客户端不需要再查询")
+
+        self.scheduler.step()
+        events = parse_frames(self.station_feed.feed.read(frame_id)[0][1])[0][2]['events']
+        types = [e['type'] for e in events]
+        self.assertEqual(types[:2], ['queue_leave', 'dispatch'], "调度应产生离开等候区和调度事件")
+        self.assertEqual(events[1]['pile_id'], 'A', "应调度到快充桩")
+        self.assertIn('pile', types, "应包含充电桩状态变化")
+        session = [e for e in events if e['type'] == 'session'][0]
+        self.assertTrue(session['active'] and session['car_id'] == 'car1', "应包含开始充电的会话")
+
+        # 没有状态变化的快照不发布消息
+        published = self.station_feed.feed.published
+        self.scheduler.step(state_changed=False)
+        self.scheduler._publish_snapshot()
+        self.assertEqual(self.station_feed.feed.published, published, "状态未变化时不应发布消息")
+
+    def test_stream_resume_and_reset(self):
+        """首次连接收到全量状态，重连从断开处继续，落后太多时重新收到全量状态"""
+        stream = self.station_feed.stream()
+        event, version, data = parse_frames(next(stream))[0]
+        self.assertEqual(event, 'snapshot', "首次连接应收到全量状态")
+        self.assertEqual(set(data['state']['piles']), {'A', 'C'}, "全量状态应包含所有充电桩")
+        self.assertIn('total_duration', data['state']['piles']['A'], "应包含累计充电时长")
+        self.assertEqual(next(stream), KEEPALIVE_FRAME, "没有变化时应发送心跳")
+
+        self.scheduler.execute('join_queue', charge_type='F', vehicle_info=self.vehicle)
+        self.assertEqual(parse_frames(next(stream))[0][0], 'delta', "状态变化后应收到增量")
+        self.assertEqual(self.station_feed.get_stats()['subscribers'], 1, "应记录订阅者")
+        stream.close()
+        self.assertEqual(self.station_feed.get_stats()['subscribers'], 0, "断开后应移除订阅者")
+
+        resumed = parse_frames(next(self.station_feed.stream(version)))
+        self.assertEqual([frame[0] for frame in resumed], ['delta'], "重连应只补发断开后的增量")
+
+        for i in range(2, 8):
+            self.scheduler.execute('join_queue', charge_type='T', vehicle_info={"car_id": f"car{i}", "charging_amount": 10})
+        stale = parse_frames(next(self.station_feed.stream(version)))
+        self.assertEqual(stale[0][0], 'snapshot', "落后超过缓冲区容量时应重新发送全量状态")
+
+    def test_async_wait(self):
+        """异步订阅者在其他线程发布消息时被唤醒"""
+        async def run():
+            stream = self.station_feed.astream()
+            await stream.__anext__()
+            threading.Timer(0.01, self.scheduler.execute, kwargs={
+                'command': 'join_queue', 'charge_type': 'F', 'vehicle_info': self.vehicle}).start()
+            frames = []
+            while not frames:
+                frames = parse_frames(await stream.__anext__())
+            await stream.aclose()
+            return frames
+
+        frames = asyncio.run(run())
+        self.assertEqual(frames[0][2]['events'][0]['type'], 'queue_join', "应收到加入排队事件")
+
+    def test_event_feed_buffer(self):
+        """环形缓冲区只保留最近的消息"""
+        feed = EventFeed(capacity=2)
+        for frame_id in (3, 5, 8):
+            feed.publish(frame_id, str(frame_id).encode())
+        self.assertIsNone(feed.read(2), "需要的消息被挤出缓冲区时应返回None")
+        self.assertEqual(feed.read(3), [(5, b'5'), (8, b'8')], "应返回之后的所有消息")
+        self.assertEqual(feed.read(5), [(8, b'8')], "应返回之后的消息")
+        self.assertEqual(feed.read(8), [], "已读到最新时应返回空列表")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import sys
+import os
+import unittest
+import tempfile
+import shutil
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backEnd.src.dataStructure.Scheduler import Scheduler
+from backEnd.src.dataStructure.ChargerPile import ChargingPile, ChargingStatus
+from backEnd.src.dataStructure.WaitingQueue import Queue
+from backEnd.src.dataStructure.Clock import Clock, VirtualClock
+from backEnd.src.dataStructure.StateJournal import StateJournal
+
+START_TIME = 1700000000.0
+
+
+def build_station(start_time=START_TIME, saved_bills=None, clock=None):
+    """创建一个充电站，默认使用虚拟时钟"""
+    clock = clock if clock is not None else VirtualClock(start_time)
+    waiting_queue = Queue(clock=clock)
+    charging_piles = {pile_id: ChargingPile(pile_id, category, clock=clock)
+                      for pile_id, category in (("A", "F"), ("B", "F"), ("C", "T"))}
+    for pile in charging_piles.values():
+        waiting_queue.register_charging_pile(pile.get_queue_info())
+    save_bill = saved_bills.append if saved_bills is not None else None
+    return clock, Scheduler(waiting_queue, charging_piles, save_bill, clock=clock)
+
+
+def station_state(scheduler):
+    """比较用的状态（详单编号每次生成都不同，只比较数量）"""
+    state = scheduler.get_state()
+    del state['clock']
+    for pile_state in state['piles'].values():
+        pile_state['charging_bills'] = len(pile_state['charging_bills'])
+    return state
+
+
+class TestStateJournal(unittest.TestCase):
+    """测试状态日志和快照恢复"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_station(self, snapshot_interval):
+        """执行一系列命令和调度步骤，返回原充电站的状态和恢复后的调度器"""
+        saved_bills = []
+        clock, scheduler = build_station(saved_bills=saved_bills)
+        recovery = scheduler.attach_journal(StateJournal(self.directory, snapshot_interval=snapshot_interval))
+        self.assertEqual(recovery['replayed'], 0, "第一次启动没有需要重放的日志")
+
+        for index in range(5):
+            scheduler.execute('join_queue', charge_type='F', vehicle_info={
+                "car_id": f"car{index}", "username": f"用户{index}", "charging_amount": 10 + index})
+        scheduler.execute('join_queue', charge_type='T', vehicle_info={
+            "car_id": "slow1", "username": "用户9", "charging_amount": 7})
+        scheduler.step()
+        clock.advance_to(START_TIME + 600)
+        scheduler.execute('modify_waiting_request', queue_number='F5', charging_amount=25)
+        scheduler.step()
+        clock.advance_to(START_TIME + 1500)
+        scheduler.step(state_changed=False)  # 快充桩A上的第一辆车充满后自动断开
+        clock.advance_to(START_TIME + 1800)
+        scheduler.execute('pile_fault', pile_id='B', schedule_strategy='priority')
+        scheduler.step()
+        clock.advance_to(START_TIME + 1900)
+        scheduler.execute('leave_queue', queue_number='F5')
+        scheduler.step()
+        self.assertTrue(saved_bills, "原充电站应保存了充电详单")
+
+        expected = station_state(scheduler)
+        scheduler.journal.close()
+
+        # 重启：新进程中的时钟和对象都是新的
+        _, restarted = build_station(start_time=START_TIME + 5000)
+        restored_bills = []
+        restarted.save_bill_func = restored_bills.append
+        recovery = restarted.attach_journal(StateJournal(self.directory, snapshot_interval=snapshot_interval))
+        return expected, restarted, recovery, restored_bills
+
+    def test_replay_log(self):
+        """只有日志时重放所有命令和调度步骤，得到相同的状态"""
+        expected, restarted, recovery, restored_bills = self.run_station(snapshot_interval=1000)
+        self.assertFalse(recovery['snapshot_loaded'], "没有快照")
+        self.assertGreater(recovery['replayed'], 0, "应重放日志")
+        self.assertEqual(station_state(restarted), expected, "重放后的状态应与重启前相同")
+        self.assertEqual(restored_bills, [], "重放时不应重复保存充电详单")
+        self.assertEqual(restarted.waiting_queue.fast_counter, expected['waiting_queue']['fast_counter'],
+                         "排队号计数器应恢复")
+        self.assertEqual(restarted.charging_piles['B'].status, ChargingStatus.FAULT, "故障状态应恢复")
+
+        # 恢复后立即写入快照，再次重启不需要重放
+        restarted.journal.close()
+        _, again = build_station()
+        recovery = again.attach_journal(StateJournal(self.directory))
+        self.assertTrue(recovery['snapshot_loaded'] and recovery['replayed'] == 0, "应只加载快照")
+        self.assertEqual(station_state(again), expected, "从快照恢复的状态应相同")
+
+    def test_snapshot_and_tail(self):
+        """定期写入快照，重启时加载快照并重放之后的日志"""
+        expected, restarted, recovery, _ = self.run_station(snapshot_interval=4)
+        self.assertTrue(recovery['snapshot_loaded'], "应加载快照")
+        self.assertLess(recovery['replayed'], 4, "只需重放快照之后的日志")
+        self.assertEqual(station_state(restarted), expected, "恢复后的状态应与重启前相同")
+
+        snapshot = restarted.get_snapshot()
+        self.assertEqual(snapshot.queue_status['total_vehicles'], len(expected['waiting_queue']['fast_queue'])
+                         + len(expected['waiting_queue']['slow_queue']), "恢复后应发布新的状态快照")
+
+    def test_replay_with_moving_clock(self):
+        """加速时钟在记录日志之后继续走动，重放结果仍与原充电站相同"""
+        clock = Clock()
+        _, scheduler = build_station(saved_bills=[], clock=clock)
+        scheduler.attach_journal(StateJournal(self.directory))
+        # 真实时间每过1微秒模拟时间前进约1秒，同一次操作中多次读取时钟会得到不同的时刻
+        scheduler.set_simulation_time(START_TIME)
+        scheduler.set_time_speedup(1000000)
+
+        for index in range(4):
+            scheduler.execute('join_queue', charge_type='F', vehicle_info={
+                "car_id": f"car{index}", "username": f"用户{index}", "charging_amount": 5 + index})
+        scheduler.execute('join_queue', charge_type='T', vehicle_info={
+            "car_id": "slow1", "username": "用户9", "charging_amount": 7})
+        for _ in range(20):
+            scheduler.step()
+        scheduler.execute('disconnect', pile_id='C')
+        scheduler.step()
+
+        expected = station_state(scheduler)
+        self.assertGreater(sum(pile['charging_bills'] for pile in expected['piles'].values()), 0,
+                           "时钟走动期间应有车辆充满并生成详单")
+        scheduler.journal.close()
+
+        _, restarted = build_station()
+        restarted.attach_journal(StateJournal(self.directory))
+        self.assertEqual(station_state(restarted), expected, "重放后的状态应与原充电站相同")
+
+    def test_clock_commands_replayed(self):
+        """时钟设置作为命令写入日志，重启后模拟时间和加速倍数从最后一条日志的时刻继续"""
+        clock = Clock()
+        _, scheduler = build_station(clock=clock)
+        scheduler.attach_journal(StateJournal(self.directory))
+        result = scheduler.set_simulation_time_from_str("2023-11-15 08:00:00")
+        self.assertTrue(result['status'], "应设置模拟时间")
+        self.assertEqual(scheduler.set_time_speedup(60)['data']['speedup'], 60, "应设置加速倍数")
+        scheduler.execute('join_queue', charge_type='T', vehicle_info={"car_id": "car1", "charging_amount": 5})
+        scheduler.step()
+        last_time = scheduler.get_current_time()
+        scheduler.journal.close()
+
+        _, restarted = build_station(clock=Clock())
+        restarted.attach_journal(StateJournal(self.directory))
+        self.assertTrue(restarted.is_using_simulated_time, "应恢复模拟时间模式")
+        self.assertEqual(restarted.time_speedup, 60, "应恢复加速倍数")
+        self.assertGreaterEqual(restarted.get_current_time(), last_time - 1, "模拟时间应从重启前的时刻继续")
+        self.assertLess(restarted.get_current_time(), last_time + 60, "模拟时间不应跳变")
+
+        self.assertTrue(restarted.reset_to_real_time()['status'], "应恢复实时系统时间")
+        self.assertFalse(restarted.is_using_simulated_time, "应关闭模拟时间模式")
+
+    def test_disconnect_bill_saved_by_command(self):
+        """手动断开和关闭充电桩的详单在命令中提交保存，命令写入日志后崩溃也不会丢失"""
+        saved_bills = []
+        clock, scheduler = build_station(saved_bills=saved_bills)
+        scheduler.attach_journal(StateJournal(self.directory))
+        for car_id, charge_type in (("car1", "F"), ("slow1", "T")):
+            scheduler.execute('join_queue', charge_type=charge_type, vehicle_info={
+                "car_id": car_id, "username": "用户1", "charging_amount": 20})
+        scheduler.step()
+        clock.advance_to(START_TIME + 300)
+
+        result = scheduler.execute('disconnect', pile_id='A')
+        self.assertEqual([bill['bill_id'] for bill in saved_bills], [result['bill']['bill_id']],
+                         "命令返回前详单应已提交保存")
+        scheduler.execute('toggle_pile', pile_id='C', action='stop')
+        self.assertEqual(len(saved_bills), 2, "关闭充电桩时断开车辆的详单应已提交保存")
+        # 模拟调用方处理命令结果之前进程崩溃：不关闭日志也不写快照
+        scheduler.journal._file.close()
+
+        _, restarted = build_station()
+        restored_bills = []
+        restarted.save_bill_func = restored_bills.append
+        restarted.attach_journal(StateJournal(self.directory))
+        self.assertEqual(restored_bills, [], "重放断开命令时不应重复保存详单")
+        self.assertEqual(restarted.charging_piles['C'].status, ChargingStatus.OFFLINE, "关闭状态应恢复")
+
+    def test_torn_tail(self):
+        """进程崩溃时写了一半的最后一条日志被忽略并截掉"""
+        _, scheduler = build_station()
+        scheduler.attach_journal(StateJournal(self.directory))
+        scheduler.execute('join_queue', charge_type='T', vehicle_info={"car_id": "car1", "charging_amount": 5})
+        scheduler.journal.close()
+        with open(os.path.join(self.directory, 'commands.log'), 'ab') as f:
+            f.write(b'{"seq":2,"op":"comm')
+
+        _, restarted = build_station()
+        journal = StateJournal(self.directory)
+        recovery = restarted.attach_journal(journal)
+        self.assertEqual(recovery['replayed'], 1, "应只重放完整的日志")
+        self.assertTrue(restarted.waiting_queue.is_vehicle_in_queue("car1"), "完整的命令应生效")
+        restarted.execute('join_queue', charge_type='T', vehicle_info={"car_id": "car2", "charging_amount": 5})
+        self.assertEqual(journal.get_stats()['seq'], 2, "截掉损坏的记录后继续追加")
+
+
+if __name__ == '__main__':
+    unittest.main()
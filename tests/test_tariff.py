@@ -0,0 +1,90 @@
+import sys
+import os
+import unittest
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 导入后端模块
+from backEnd.src.dataStructure.Tariff import DEFAULT_TARIFF, SessionMeter
+from backEnd.src.dataStructure.Clock import VirtualClock
+from backEnd.src.dataStructure.ChargerPile import ChargingPile
+
+
+class TestTariff(unittest.TestCase):
+    """测试分时电价积分的测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.day = datetime(2025, 6, 1)
+
+    def _timestamp(self, hour, minute=0):
+        return self.day.replace(hour=hour, minute=minute).timestamp()
+
+    def test_rate_at(self):
+        """测试各时段电价"""
+        self.assertEqual(DEFAULT_TARIFF.rate_at(self._timestamp(6, 59)), 0.4, "6:59应为谷时电价")
+        self.assertEqual(DEFAULT_TARIFF.rate_at(self._timestamp(7)), 0.7, "7:00应为平时电价")
+        self.assertEqual(DEFAULT_TARIFF.rate_at(self._timestamp(12)), 1.0, "12:00应为峰时电价")
+        self.assertEqual(DEFAULT_TARIFF.rate_at(self._timestamp(23, 30)), 0.4, "23:30应为谷时电价")
+
+    def test_exact_at_boundaries(self):
+        """测试跨电价分界点时精确计算（不受分段粒度影响）"""
+        # 6:59:30 ~ 7:00:30，谷时和平时各30秒
+        start = self._timestamp(6, 59) + 30
+        energy, cost = DEFAULT_TARIFF.integrate(start, start + 60, 60)
+        self.assertAlmostEqual(energy, 1.0, places=9, msg="1分钟60kW应充1度")
+        self.assertAlmostEqual(cost, 0.5 * 0.4 + 0.5 * 0.7, places=9, msg="分界点两侧应分别计价")
+
+    def test_multi_day_session(self):
+        """测试跨多天的充电"""
+        energy, cost = DEFAULT_TARIFF.integrate(self._timestamp(0), self._timestamp(0) + 2 * 24 * 3600, 1)
+        # 一天：谷时8小时*0.4 + 平时8小时*0.7 + 峰时8小时*1.0 = 16.8元
+        self.assertAlmostEqual(energy, 48, places=6, msg="两天1kW应充48度")
+        self.assertAlmostEqual(cost, 2 * 16.8, places=6, msg="两天的电费应为33.6元")
+
+    def test_shared_by_piles(self):
+        """测试充电桩默认共享同一份电价表，并与电价表的计算一致"""
+        pile_a = ChargingPile("A", "F")
+        pile_c = ChargingPile("C", "T")
+        self.assertIs(pile_a.tariff, pile_c.tariff, "充电桩应共享默认电价表")
+
+        energy, cost = pile_c._calculate_charging_cost(self._timestamp(5), self._timestamp(15))
+        self.assertAlmostEqual(energy, 70, places=6, msg="慢充10小时应充70度")
+        self.assertAlmostEqual(cost, 7 * (2 * 0.4 + 3 * 0.7 + 5 * 1.0), places=6, msg="跨谷、平、峰时段的电费应精确计算")
+
+    def test_session_meter_matches_integration(self):
+        """测试会话累计器分段推进后与整体积分结果一致"""
+        start = self._timestamp(6, 30)
+        meter = SessionMeter(DEFAULT_TARIFF, 7, start)
+        for minutes in (10, 45, 200, 420, 421):
+            now = start + minutes * 60
+            meter.advance(now)
+            energy, cost = meter.peek(now + 30)
+            expected_energy, expected_cost = DEFAULT_TARIFF.integrate(start, now + 30, 7)
+            self.assertAlmostEqual(energy, expected_energy, places=9, msg="累计电量应与积分一致")
+            self.assertAlmostEqual(cost, expected_cost, places=9, msg="累计电费应与积分一致")
+
+        # 早于检查点的时刻从会话开始重新积分
+        self.assertAlmostEqual(meter.peek(start + 600)[1], DEFAULT_TARIFF.integrate(start, start + 600, 7)[1], places=9,
+                               msg="早于检查点时应按整体积分计算")
+
+    def test_disconnect_reuses_session_totals(self):
+        """测试断开时详单电费与会话累计值一致"""
+        clock = VirtualClock(self._timestamp(9, 30))
+        pile = ChargingPile("A", "F", clock=clock)
+        pile.join_queue({"car_id": "car1", "username": "用户1", "charging_amount": 60})
+        clock.advance_to(self._timestamp(10, 15))
+        pile.advance_session()
+        self.assertEqual(pile.session.segment_rate, 1.0, "推进后应进入峰时时段")
+
+        clock.advance_to(self._timestamp(10, 30))
+        bill = pile.disconnect_vehicle()["bill"]
+        # 9:30-10:00平时15度*0.7 + 10:00-10:30峰时15度*1.0
+        self.assertEqual(bill["charging_cost"], 25.5, "详单电费应为25.5元")
+        self.assertIsNone(pile.session, "断开后应清除会话累计器")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -362,6 +362,38 @@ class TestWaitingQueue(unittest.TestCase):
         # 验证最大容量
         self.assertEqual(status["max_capacity"], 6, "最大容量应为6")
 
+    def test_indexed_lookup_large_queue(self):
+        """测试等候区扩大到数千个车位时按车辆和排队号码查找、移除"""
+        self.queue.max_capacity = 5000
+        for i in range(3000):
+            self.queue.add_vehicle("F" if i % 2 == 0 else "T",
+                                   {"car_id": f"car{i}", "username": f"用户{i}", "charging_amount": 10})
+
+        self.assertTrue(self.queue.is_vehicle_in_queue("car2999"), "应能找到最后加入的车辆")
+        self.assertEqual(self.queue.find_vehicle_by_queue_number("T1500")["vehicle_info"]["car_id"], "car2999",
+                         "应能按排队号码找到车辆")
+        with self.assertRaises(Exception):
+            self.queue.add_vehicle("F", {"car_id": "car10", "username": "用户10", "charging_amount": 10})
+
+        removed = self.queue.remove_vehicle("F2")
+        self.assertEqual(removed["vehicle_info"]["car_id"], "car2", "应移除排队号码对应的车辆")
+        self.assertFalse(self.queue.is_vehicle_in_queue("car2"), "移除后车辆不应在队列中")
+        self.assertEqual(self.queue.fast_queue[1]["queue_number"], "F3", "移除后应保持其余车辆的顺序")
+        self.assertEqual(len(self.queue.fast_queue), 1499, "快充队列应少一辆车")
+
+    def test_charging_vehicle_index(self):
+        """测试注册充电桩信息时维护正在充电车辆的索引"""
+        self.fast_pile_a["connected_vehicle"] = self.vehicle1
+        self.fast_pile_a["queue_vehicles"] = [self.vehicle1, self.vehicle2]
+        self.queue.register_charging_pile(self.fast_pile_a)
+        self.assertTrue(self.queue.is_vehicle_charging("car1"), "正在充电的车辆应被识别")
+        self.assertTrue(self.queue.is_vehicle_charging("car2"), "充电桩队列中的车辆应被识别")
+
+        self.fast_pile_a["connected_vehicle"] = None
+        self.fast_pile_a["queue_vehicles"] = []
+        self.queue.register_charging_pile(self.fast_pile_a)
+        self.assertFalse(self.queue.is_vehicle_charging("car1"), "离开充电桩后不应再被识别为充电中")
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file